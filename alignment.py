@@ -0,0 +1,85 @@
+import logging
+import re
+from string import punctuation
+
+log = logging.getLogger('hoodie.alignment')
+
+# Capitalize letters that start statements and appear after punctuation
+# I ripped this off StackOverflow. I can't regex my way out of a paragraph describing a paper bag.
+_sentence_starts = re.compile(r'([.?!\r])\s*([a-zA-Z])')
+
+
+# One whitespace-separated chunk of a punctuated transcript, and the TranscriptionWord it spells.
+# Punctuation that Deepgram left floating on its own (a lone dash, say) doesn't spell anything, so its word is None.
+class AlignedToken:
+    __slots__ = ('text', 'word', 'starts_statement')
+
+    def __init__(self, text, word, starts_statement=False):
+        self.text = text
+        self.word = word
+        self.starts_statement = starts_statement  # Gets a line break in front of it instead of a space
+
+    def __repr__(self):
+        return f'AlignedToken({self.text!r}, {self.word!r})'
+
+
+# Match a transcript up with its words, once, when it arrives - so render() never has to search through text again.
+# Returns the statement's tokens in order, already capitalized the way they'll be shown.
+def align_transcript(transcript, words):
+    # Deepgram transcripts aren't always capitalized... but they shoooooould...
+    transcript = _sentence_starts.sub(lambda p: p.group(0).upper(), '\r' + transcript)[1:]
+
+    tokens = []
+    position = 0  # Next word to match
+    for text in transcript.split():
+        if not text.strip(punctuation):
+            tokens.append(AlignedToken(text, None))
+            continue
+        if position < len(words):
+            word = words[position]
+            if not word.represents(text):
+                # Stay in step with the words rather than crashing - it's just a caption
+                log.warning('Word %r does not represent transcript token %r', word.text, text)
+            tokens.append(AlignedToken(text, word))
+            position += 1
+        else:
+            log.warning('Transcript token %r has no word to go with it', text)
+            tokens.append(AlignedToken(text, None))
+
+    if position < len(words):
+        log.warning('%d words never showed up in the transcript %r', len(words) - position, transcript)
+    if tokens:
+        tokens[0].starts_statement = True
+    return tokens
+
+
+# How many tokens at the front of this list come before first_kept_word, the first word that hasn't scrolled away.
+# Loose punctuation hanging off the last expired word goes with it; loose punctuation opening the next statement
+# stays. With first_kept_word None, everything's gone. Only walks the tokens it's throwing out (and one more), so it
+# costs as much as what scrolled away, not the whole transcript.
+def count_tokens_before(tokens, first_kept_word):
+    if first_kept_word is None:
+        return len(tokens)
+    count = 0
+    while count < len(tokens) and tokens[count].word is not first_kept_word:
+        count += 1
+    start = count
+    while start and tokens[start - 1].word is None:
+        start -= 1
+    for i in range(start, count):
+        if tokens[i].starts_statement:
+            return i
+    return count
+
+
+# Swap the previous result's tokens back in wherever the new ones say the same thing about the same word, up to the
+# first difference. Then render() can tell which part of the screen Deepgram actually changed with a plain `is`.
+# Returns how many got swapped.
+def keep_unchanged_tokens(previous, tokens):
+    count = 0
+    for old, new in zip(previous, tokens):
+        if old.word is not new.word or old.text != new.text or old.starts_statement != new.starts_statement:
+            break
+        tokens[count] = old
+        count += 1
+    return count
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# Everything that's been on my chest, kept after the screen clears so I can find out later what I actually said.
+#   - Finalized transcripts get appended to a batch in memory. That's all the hot path ever does.
+#   - Every so often a background thread gzips the batch and tacks it onto the end of the current segment file,
+#     so the SD card sees one small write every flush_interval instead of one per transcript.
+#   - Segments rotate once they're segment_bytes big. Each flushed batch is one gzip member, so a segment is
+#     still a plain .jsonl.gz that zcat can read.
+#   - index.jsonl gets one line per batch: which segment it's in, where, when it covers and which terms are in it
+#     (term -> positions in the batch). Searching only decompresses the batches the index says are worth it.
+# Search it and export SRT/VTT subtitles from the command line:
+#   python archive.py sessions
+#   python archive.py search chicago nuts
+#   python archive.py export --format srt --session latest -o hoodie.srt
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger('hoodie.archive')
+
+_terms = re.compile(r"[a-z0-9']+")
+
+
+def terms_in(text):
+    return _terms.findall(text.casefold())
+
+
+# Batches up finalized transcripts and writes them out in the background. Only record() is meant for the hot path.
+class TranscriptArchive:
+    def __init__(self, directory, flush_interval=10.0, flush_entries=64, segment_bytes=1024 * 1024,
+                 max_segments=None, clock=time.time):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_entries = flush_entries  # Flush early if a batch gets this big
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments  # Oldest segments get deleted past this many. None keeps everything.
+        self.clock = clock  # Wall clock, since the whole point is knowing when I said something
+        self.session = None  # When this run of the hoodie started, which is how exports tell runs apart
+        self.batch = []
+        self.flush_requested = None  # asyncio.Event, made once there's a running loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='archive')
+        self.task = None
+
+        self.entries_recorded = 0
+        self.batches_written = 0
+        self.bytes_written = 0
+
+    # Needs a running event loop
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.session = self.clock()
+        self.flush_requested = asyncio.Event()
+        self.task = asyncio.create_task(self.flush_loop())
+
+    # One finalized Deepgram result. words are Deepgram's word dicts, speaker labels and all.
+    def record(self, transcript, words, request_id):
+        self.batch.append({
+            'session': self.session,
+            'at': self.clock(),  # About when the last word was said
+            'request_id': request_id,
+            'transcript': transcript,
+            'words': [[word['word'], word['start'], word['end'], word.get('speaker')] for word in words],
+        })
+        self.entries_recorded += 1
+        if len(self.batch) >= self.flush_entries and self.flush_requested is not None:
+            self.flush_requested.set()
+
+    async def flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.write_batch, batch)
+        except OSError as e:
+            # A full or flaky SD card shouldn't take the captions down with it
+            log.error('Could not archive %d transcripts: %s', len(batch), e)
+
+    # Write whatever's left and stop
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        await self.flush()
+        self.executor.shutdown()
+
+    def _segments(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith('segment-'))
+
+    # Runs on the archive thread
+    def write_batch(self, batch):
+        segments = self._segments()
+        if segments and os.path.getsize(os.path.join(self.directory, segments[-1])) < self.segment_bytes:
+            segment = segments[-1]
+        else:
+            segment = f'segment-{int(self.clock() * 1000):015d}.jsonl.gz'
+            segments.append(segment)
+
+        member = gzip.compress(''.join(json.dumps(entry) + '\n' for entry in batch).encode())
+        path = os.path.join(self.directory, segment)
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(member)
+
+        postings = {}
+        for position, entry in enumerate(batch):
+            for term in set(terms_in(entry['transcript'])):
+                postings.setdefault(term, []).append(position)
+        # Written after the batch itself, so the index never points at something that isn't there
+        with open(os.path.join(self.directory, 'index.jsonl'), 'a') as f:
+            f.write(json.dumps({'segment': segment, 'offset': offset, 'length': len(member),
+                                'sessions': sorted({entry['session'] for entry in batch}),
+                                'first': batch[0]['at'], 'last': batch[-1]['at'], 'terms': postings}) + '\n')
+
+        self.batches_written += 1
+        self.bytes_written += len(member)
+        if self.max_segments is not None and len(segments) > self.max_segments:
+            self.forget_segments(segments[:-self.max_segments])
+
+    # Delete old segments along with their lines in the index
+    def forget_segments(self, segments):
+        for segment in segments:
+            os.remove(os.path.join(self.directory, segment))
+        doomed = set(segments)
+        index_path = os.path.join(self.directory, 'index.jsonl')
+        with open(index_path + '.new', 'w') as f:
+            f.writelines(json.dumps(line) + '\n' for line in read_index(self.directory)
+                         if line['segment'] not in doomed)
+        os.replace(index_path + '.new', index_path)
+
+    def stats(self):
+        return {'recorded': self.entries_recorded, 'pending': len(self.batch), 'batches_written': self.batches_written,
+                'bytes_written': self.bytes_written}
+
+
+# Index lines one at a time, straight off the disk, so a big archive never has to fit in memory.
+# must_contain skips lines without those bits of raw text before bothering to parse them.
+def read_index(directory, must_contain=()):
+    try:
+        with open(os.path.join(directory, 'index.jsonl')) as f:
+            for line in f:
+                if not all(text in line for text in must_contain):
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return  # A power cut mid-write can leave a torn last line. Everything before it is fine.
+    except FileNotFoundError:
+        return
+
+
+def read_batch(directory, line):
+    with open(os.path.join(directory, line['segment']), 'rb') as f:
+        f.seek(line['offset'])
+        member = f.read(line['length'])
+    return [json.loads(entry) for entry in gzip.decompress(member).decode().splitlines()]
+
+
+# Archived transcripts, oldest first, from the batches the index says could match.
+# Raises ValueError for a search term with nothing searchable in it, like '!!!', instead of matching everything.
+def find_entries(directory, terms=(), session=None, since=None, until=None):
+    searchable = []
+    for text in terms:
+        found = terms_in(text)
+        if not found:
+            raise ValueError(f'{text!r} has no words or numbers in it to search for')
+        searchable.extend(found)
+    return _find_entries(directory, searchable, session, since, until)
+
+
+def _find_entries(directory, terms, session, since, until):
+    # A batch with the term in it has it as a key in its postings, so lines without that text can't match
+    must_contain = [json.dumps(term) + ': [' for term in terms]
+    for line in read_index(directory, must_contain):
+        if session is not None and session not in line['sessions']:
+            continue
+        if (since is not None and line['last'] < since) or (until is not None and line['first'] > until):
+            continue
+        positions = None
+        for term in terms:
+            found = set(line['terms'].get(term, ()))
+            positions = found if positions is None else positions & found
+        if positions is not None and not positions:
+            continue
+
+        for position, entry in enumerate(read_batch(directory, line)):
+            if positions is not None and position not in positions:
+                continue
+            if session is not None and entry['session'] != session:
+                continue
+            if (since is not None and entry['at'] < since) or (until is not None and entry['at'] > until):
+                continue
+            yield entry
+
+
+# Wall clock time of each word. The transcript shows up right about when the last word ends, so work backwards from
+# that - close enough for subtitles.
+def word_times(entry):
+    words = entry['words']
+    if not words:
+        return []
+    said_at = entry['at'] - words[-1][2]
+    return [(word, said_at + start, said_at + end, speaker) for word, start, end, speaker in words]
+
+
+# Subtitle cues: (start, end, text), in seconds since the session started. Long statements get split up so each cue
+# fits on a screen at the bottom of a video.
+def make_cues(entries, session, max_words=12):
+    cues = []
+    for entry in entries:
+        shown = entry['transcript'].split()
+        timed = word_times(entry)
+        if len(shown) != len(timed):
+            # Loose punctuation or something. Give up on splitting and show the whole thing at once.
+            if timed:
+                cues.append((timed[0][1] - session, timed[-1][2] - session, entry['transcript']))
+            continue
+        for i in range(0, len(timed), max_words):
+            chunk = timed[i:i + max_words]
+            speaker = chunk[0][3]
+            text = ' '.join(shown[i:i + max_words])
+            if speaker is not None:
+                text = f'[Speaker {speaker}] {text}'
+            cues.append((max(0.0, chunk[0][1] - session), max(0.0, chunk[-1][2] - session), text))
+    return cues
+
+
+def _timestamp(seconds, separator):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}'
+
+
+def to_srt(cues):
+    return ''.join(f'{i}\n{_timestamp(start, ",")} --> {_timestamp(end, ",")}\n{text}\n\n'
+                   for i, (start, end, text) in enumerate(cues, 1))
+
+
+def to_vtt(cues):
+    return 'WEBVTT\n\n' + ''.join(f'{_timestamp(start, ".")} --> {_timestamp(end, ".")}\n{text}\n\n'
+                                  for start, end, text in cues)
+
+
+def sessions_in(directory):
+    return sorted({session for line in read_index(directory) for session in line['sessions']})
+
+
+def _describe_time(seconds):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search and export the hoodie\'s transcript archive')
+    parser.add_argument('--dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('sessions', help='List every run of the hoodie in the archive')
+    search = commands.add_parser('search', help='Every transcript with all these words in it')
+    search.add_argument('terms', nargs='+')
+    export = commands.add_parser('export', help='Subtitles for one session')
+    export.add_argument('--format', choices=('srt', 'vtt'), default='srt')
+    export.add_argument('--session', default='latest', help='Session start time from `sessions`, or latest')
+    export.add_argument('-o', '--output', help='Where to write them, instead of stdout')
+    args = parser.parse_args()
+
+    if args.command == 'sessions':
+        for session in sessions_in(args.dir):
+            print(f'{session!r}  {_describe_time(session)}')
+    elif args.command == 'search':
+        try:
+            entries = find_entries(args.dir, args.terms)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        for entry in entries:
+            print(f'{_describe_time(entry["at"])}  {entry["transcript"]}')
+    else:
+        sessions = sessions_in(args.dir)
+        if not sessions:
+            raise SystemExit(f'Nothing archived in {args.dir}')
+        session = sessions[-1] if args.session == 'latest' else float(args.session)
+        cues = make_cues(find_entries(args.dir, session=session), session)
+        subtitles = to_srt(cues) if args.format == 'srt' else to_vtt(cues)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(subtitles)
+        else:
+            sys.stdout.write(subtitles)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+# PortAudio's own numbers (pyaudio.paInt16, paInputOverflow and paContinue), so nobody has to load PortAudio just to
+# know what they are
+PA_INT16 = 0x8
+PA_INPUT_OVERFLOW = 0x2
+PA_CONTINUE = 0
+
+
+# A PyAudio, with PortAudio loaded only now. It takes a while, and a lot of devices get poked, so FAST_START does it
+# on a thread while the display comes up.
+def open_port_audio():
+    import pyaudio
+
+    return pyaudio.PyAudio()
+
+
+# Lets PortAudio push audio at us from its own thread instead of us busy-polling get_read_available().
+# Samples land in one big preallocated ring, so capturing doesn't allocate anything per chunk, and the event loop
+# only gets poked once a whole chunk's worth is waiting.
+class RingBufferCapture:
+    def __init__(self, loop, sample_rate, wake_frames, capacity_frames=None, sample_width=2, channels=1):
+        self.loop = loop
+        self.sample_rate = sample_rate
+        self.frame_size = sample_width * channels
+        self.wake_frames = wake_frames  # Wake the event loop once this many frames are ready
+        if capacity_frames is None:
+            capacity_frames = wake_frames * 16  # A few seconds of slack in case rendering hogs the loop
+        if capacity_frames < wake_frames:
+            raise ValueError(f'Ring of {capacity_frames} frames cannot hold a {wake_frames} frame chunk')
+        self.capacity_frames = capacity_frames
+
+        self.ring = memoryview(bytearray(capacity_frames * self.frame_size))
+        self.scratch = memoryview(bytearray(wake_frames * self.frame_size))  # For chunks that wrap around the end
+        self.lock = threading.Lock()  # Guards everything below - PortAudio writes from its own thread
+        self.frames_written = 0  # Total frames ever captured. Read/write positions are these mod capacity.
+        self.frames_read = 0
+        self.last_callback_time = None  # time.monotonic() of the most recent callback, IE the newest frame
+        self.ready = asyncio.Event()
+        self.wakeup_pending = False
+
+        # Overrun counters, so we know when things are falling behind
+        self.overruns = 0  # Times the ring filled up and we threw away the oldest audio
+        self.frames_dropped = 0  # How much audio that cost us
+        self.input_overflows = 0  # Times PortAudio itself said its buffer overflowed before we got to it
+
+    # Change how much audio get_chunk() waits for. The hoodie takes bigger, fewer chunks while it's idle.
+    def set_chunk_frames(self, frames):
+        if self.capacity_frames < frames:
+            raise ValueError(f'Ring of {self.capacity_frames} frames cannot hold a {frames} frame chunk')
+        with self.lock:
+            self.wake_frames = frames
+            if len(self.scratch) < frames * self.frame_size:
+                self.scratch = memoryview(bytearray(frames * self.frame_size))
+            # Whoever's waiting should check again against the new size
+            self.wakeup_pending = False
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    # Pass this to PyAudio.open() as stream_callback. Runs on PortAudio's thread, so no asyncio in here!
+    def callback(self, in_data, frame_count, time_info, status):
+        now = time.monotonic()
+        if status & PA_INPUT_OVERFLOW:
+            self.input_overflows += 1
+
+        data = memoryview(in_data)
+        if frame_count > self.capacity_frames:
+            # Absurdly long block - only the newest audio fits anyways
+            data = data[-self.capacity_frames * self.frame_size:]
+            self.frames_dropped += frame_count - self.capacity_frames
+            self.frames_written += frame_count - self.capacity_frames
+            frame_count = self.capacity_frames
+
+        with self.lock:
+            unread = self.frames_written - self.frames_read
+            if unread + frame_count > self.capacity_frames:
+                # Nobody's reading fast enough. Drop the oldest audio rather than blocking PortAudio.
+                lost = unread + frame_count - self.capacity_frames
+                self.frames_read += lost
+                self.frames_dropped += lost
+                self.overruns += 1
+
+            start = (self.frames_written % self.capacity_frames) * self.frame_size
+            first_part = min(len(data), len(self.ring) - start)
+            self.ring[start:start + first_part] = data[:first_part]
+            if first_part < len(data):
+                self.ring[:len(data) - first_part] = data[first_part:]
+
+            self.frames_written += frame_count
+            self.last_callback_time = now
+
+            wake = not self.wakeup_pending and self.frames_written - self.frames_read >= self.wake_frames
+            if wake:
+                self.wakeup_pending = True
+
+        if wake:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        return None, PA_CONTINUE
+
+    def frames_available(self):
+        with self.lock:
+            return self.frames_written - self.frames_read
+
+    # Wait for the next wake_frames of audio. Returns (monotonic time of its last frame, audio).
+    # The audio is a view into our buffers and only valid until the next call - copy it if you need to keep it.
+    async def get_chunk(self):
+        while True:
+            with self.lock:
+                if self.frames_written - self.frames_read >= self.wake_frames:
+                    break
+                self.wakeup_pending = False
+                self.ready.clear()
+            await self.ready.wait()
+
+        with self.lock:
+            start_frame = self.frames_read
+            self.frames_read += self.wake_frames
+            # Work backwards from the newest frame to when the end of this chunk was captured
+            timestamp = self.last_callback_time - (self.frames_written - self.frames_read) / self.sample_rate
+
+            start = (start_frame % self.capacity_frames) * self.frame_size
+            length = self.wake_frames * self.frame_size
+            if start + length <= len(self.ring):
+                chunk = self.ring[start:start + length]
+            else:
+                first_part = len(self.ring) - start
+                chunk = self.scratch[:length]  # Scratch stays as big as the biggest chunk we've ever asked for
+                chunk[:first_part] = self.ring[start:]
+                chunk[first_part:] = self.ring[:length - first_part]
+
+            # If there's already another chunk waiting, the next call shouldn't need a wakeup
+            if self.frames_written - self.frames_read < self.wake_frames:
+                self.wakeup_pending = False
+                self.ready.clear()
+
+        return timestamp, chunk
+
+    def stats(self):
+        return {
+            'overruns': self.overruns,
+            'frames_dropped': self.frames_dropped,
+            'input_overflows': self.input_overflows,
+            'frames_buffered': self.frames_available(),
+        }
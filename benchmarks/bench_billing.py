@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# How much audio Deepgram would bill us for, with and without TRAILING_SILENCE and MAX_SECONDS_WITHOUT_WORDS, through
+# the whole hoodie (see replay.py). Two scenes:
+#   talking    - the usual made-up babble, with pauses of all lengths
+#   noisy room - some talking, then a long stretch of loud racket with nobody talking, then more talking. It's run
+#                with the 'rms' gate, which has a fixed noise floor and falls for it.
+#   python benchmarks/bench_billing.py --seconds 60
+# Billed is what the fake server counted. The hoodie's own count (see metering.py) should match it.
+# Each run gets its own Python, and each takes as long as its audio.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import wave
+
+from bench_idle import make_audio
+
+REPLAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replay.py')
+
+
+def write_scene(directory, sample_rate, samples, spans):
+    path = os.path.join(directory, 'scene.wav')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    with open(os.path.splitext(path)[0] + '.txt', 'w') as labels:
+        for start, end in spans:
+            labels.write(f'{start}\t{end}\t\n')  # No text, so the fake server makes up some words
+    return path
+
+
+def run_replay(replay_args, send_all_audio):
+    with tempfile.TemporaryDirectory() as scratch:
+        results_path = os.path.join(scratch, 'results.json')
+        command = [sys.executable, REPLAY, *replay_args, '--interim', '--json', results_path]
+        if send_all_audio:
+            command.append('--send-all-audio')
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(results_path) as f:
+            return json.load(f)
+
+
+def report(scene, name, results):
+    usage = results['usage']
+    first_word = (results['time_to_first_word_ms'] or {}).get('p50', float('nan'))
+    print(f'  {scene:11s} {name:10s} {results["server"]["audio_seconds"]:8.1f} {usage["audio_seconds"]:8.1f} '
+          f'{usage["speech_seconds"]:8.1f} {usage["trimmed_seconds"]:8.1f} {results["server"]["connections"]:6d} '
+          f'{results["words_shown"]:6d}/{results["words_sent"]:<4d} {first_word:8.0f}   '
+          f'{", ".join(f"{reason} {count}" for reason, count in usage["closed_because"].items())}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=int, default=60, help='Length of the talking scene')
+    parser.add_argument('--racket', type=int, default=45, help='Seconds of noise in the noisy room')
+    parser.add_argument('--racket-level', type=float, default=400, help='RMS of the noise, over the rms gate\'s 125')
+    args = parser.parse_args()
+
+    print(f'  {"":11s} {"":10s} {"billed":>8s} {"counted":>8s} {"speech":>8s} {"held":>8s} {"conns":>6s} '
+          f'{"words":>11s} {"1st word":>8s}   hung up because')
+    print(f'  {"":11s} {"":10s} {"(s)":>8s} {"(s)":>8s} {"(s)":>8s} {"back (s)":>8s} {"":6s} {"shown":>11s} '
+          f'{"p50 (ms)":>8s}')
+    with tempfile.TemporaryDirectory() as scratch:
+        sample_rate, samples, spans, _, _ = make_audio(15, args.racket, noise_level=args.racket_level)
+        noisy_room = write_scene(scratch, sample_rate, samples, spans)
+        scenes = (('talking', ['--seconds', str(args.seconds)]),
+                  ('noisy room', [noisy_room, '--vad', 'rms']))
+        for scene, replay_args in scenes:
+            for name, send_all_audio in (('send all', True), ('policies', False)):
+                report(scene, name, run_replay(replay_args, send_all_audio))
+
+
+if __name__ == '__main__':
+    main()
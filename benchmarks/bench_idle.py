@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# What a long silence costs on battery, with and without dozing off (see IDLE_AFTER in main.py). Plays some talking,
+# a long quiet stretch and some more talking through the whole hoodie (see replay.py), once for each, and reports CPU
+# use and wakeups per second for each part.
+#   python benchmarks/bench_idle.py --talk 15 --silence 60 --idle-after 10
+# CPU is a percentage of one core, for the whole process. Wakeups are voluntary context switches from every thread,
+# WAV player included, since PortAudio's thread wakes up just as often on the real thing. The settled silence starts
+# once the VAD's hangover and IDLE_AFTER are over, so it's what hours of sitting quietly would cost.
+# The fake Deepgram server runs in this process too, and polls every socket it has, so pre-warming is off here -
+# otherwise the spare socket's polling would swamp everything else during the silence.
+import argparse
+import asyncio
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+from bench_vad import make_synthetic_speech  # noqa: E402
+from bench_wrapping import load_font  # noqa: E402
+from idle import PowerMeter  # noqa: E402
+from main import SubtitleHoodie  # noqa: E402
+from replay import replay, responses_from_spans, with_interim_results  # noqa: E402
+
+
+# Talking, then silence (just the room, at noise_level), then more talking. Returns the sample rate, the samples, the
+# speech spans, and when the silence starts and ends.
+def make_audio(talk, silence, sample_rate=44100, noise_level=60):
+    _, first, first_spans = make_synthetic_speech(sample_rate, talk, seed=0)
+    room = np.random.default_rng(2).normal(0, noise_level, int(silence * sample_rate)).astype(np.int16)
+    _, second, second_spans = make_synthetic_speech(sample_rate, talk, seed=1)
+    offset = talk + silence
+    spans = first_spans + [(start + offset, end + offset) for start, end in second_spans]
+    # make_synthetic_speech() leaves a few quiet seconds at either end, which belong to the silence
+    quiet_from = first_spans[-1][1]
+    quiet_until = second_spans[0][0] + offset
+    return sample_rate, np.concatenate([first, room, second]), spans, quiet_from, quiet_until
+
+
+async def measure(hoodie, sample_rate, samples, responses, phases):
+    meter = PowerMeter()
+    meter.install(asyncio.get_running_loop())
+    original_audio_interface = hoodie.audio_interface
+
+    # replay() swaps in its WAV player, and the phases go by the WAV's clock from when it starts playing
+    async def follow_phases():
+        while hoodie.audio_interface is original_audio_interface or hoodie.audio_interface().started_at is None:
+            await asyncio.sleep(0.01)
+        started_at = hoodie.audio_interface().started_at
+        for at, phase in phases:
+            await asyncio.sleep(max(0.0, started_at + at - meter.clock()))
+            meter.switch(phase)
+
+    follower = asyncio.create_task(follow_phases())
+    results = await replay(hoodie, sample_rate, samples, responses, server_latency=0.3, tail=3.0)
+    follower.cancel()
+    meter.switch(None)
+    return results, meter.stats()
+
+
+def run(font, audio, responses, idle_after):
+    sample_rate, samples, quiet_from, quiet_until, settled_from = audio
+    hoodie = SubtitleHoodie(subtitle_font=font)
+    hoodie.IDLE_AFTER = idle_after
+    hoodie.PREWARM_CONNECTION = False
+    hoodie.POWER_MEASUREMENT = True
+    hoodie.AUDIO_DEVICE_CACHE = None
+    hoodie.USAGE_LOG = None
+    hoodie.archive = hoodie.subtitle_display.archive = None
+    hoodie.STATS_INTERVAL = None
+    phases = [(0, 'talking'), (quiet_from, 'winding down'), (settled_from, 'settled silence'),
+              (quiet_until, 'talking again')]
+    results, by_phase = asyncio.run(measure(hoodie, sample_rate, samples, responses, phases))
+    return results, by_phase, hoodie.power.stats(), hoodie.instruments.summary()['stages'].get('wake')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--talk', type=int, default=15, help='Seconds of talking before and after the silence')
+    parser.add_argument('--silence', type=int, default=60)
+    parser.add_argument('--idle-after', type=float, default=10, help='IDLE_AFTER for the run that dozes off')
+    args = parser.parse_args()
+
+    sample_rate, samples, spans, quiet_from, quiet_until = make_audio(args.talk, args.silence)
+    responses = with_interim_results(responses_from_spans([(start, end, '') for start, end in spans]))
+    pygame.init()
+    font = load_font(125)
+    hangover = SubtitleHoodie(open_display=False).QUIET_DEADLINE
+    settled_from = quiet_from + hangover + args.idle_after + 1
+    if settled_from >= quiet_until:
+        raise SystemExit(f'{args.silence} s of silence is over before the hoodie could doze off - make it longer')
+    audio = (sample_rate, samples, quiet_from, quiet_until, settled_from)
+
+    print(f'{args.talk} s talking, {quiet_until - quiet_from:.1f} s quiet, {args.talk} s talking. '
+          f'Settled silence is the last {quiet_until - settled_from:.1f} s of the quiet.')
+    print(f'  {"":14s} {"":16s} {"CPU %":>7s} {"wakeups/s":>10s} {"loop/s":>8s}')
+    for name, idle_after in (('never dozes', None), ('dozes', args.idle_after)):
+        results, by_phase, power, wake = run(font, audio, responses, idle_after)
+        for phase, stats in by_phase.items():
+            print(f'  {name:14s} {phase:16s} {stats.get("cpu_percent", 0):7.2f} {stats.get("wakeups_per_s", 0):10.1f} '
+                  f'{stats.get("loop_wakeups_per_s", 0):8.1f}')
+        print(f'  {"":14s} {results["words_shown"]} of {results["words_sent"]} words shown, first word p50 '
+              f'{(results["time_to_first_word_ms"] or {}).get("p50", float("nan")):.0f} ms')
+        if power['naps']:
+            print(f'  {"":14s} dozed off {power["naps"]} times, woke up {power["wake_ups"]} '
+                  f'({power["false_alarms"]} false alarms), wake took {wake["p50_ms"]:.0f} ms p50, '
+                  f'{wake["max_ms"]:.0f} ms max')
+            for state, stats in power['by_state'].items():
+                print(f'  {"":14s} the hoodie\'s own count while {state}: {stats}')
+
+
+if __name__ == '__main__':
+    main()
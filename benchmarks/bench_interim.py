@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# Final results only vs. interim results, through the whole hoodie (see replay.py). With interim results, Deepgram
+# sends its running guess after every word, so captions show up while I'm still talking instead of once I'm done.
+#   python benchmarks/bench_interim.py [recording.wav] --seconds 60
+# Each mode runs in its own Python, and each takes as long as the audio.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPLAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replay.py')
+
+
+def run_replay(replay_args, interim):
+    with tempfile.TemporaryDirectory() as scratch:
+        results_path = os.path.join(scratch, 'results.json')
+        command = [sys.executable, REPLAY, *replay_args, '--json', results_path]
+        if interim:
+            command.append('--interim')
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(results_path) as f:
+            return json.load(f)
+
+
+def report(name, results):
+    columns = []
+    for metric in ('time_to_first_word_ms', 'speech_to_pixel_ms', 'render_ms'):
+        stats = results[metric] or {}
+        columns += [stats.get('p50', float('nan')), stats.get('p90', float('nan'))]
+    print(f'  {name:12s} ' + ' '.join(f'{value:9.1f}' for value in columns) +
+          f' {results["responses_delivered"]:9d} {results["words_shown"]:5d}/{results["words_sent"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('wav', nargs='?')
+    parser.add_argument('--seconds', type=int, default=30, help='Length of the made-up audio, with no WAV')
+    parser.add_argument('--server-latency', type=float, default=0.3, help='Seconds Deepgram takes to respond')
+    args = parser.parse_args()
+
+    replay_args = [*([args.wav] if args.wav else []), '--seconds', str(args.seconds),
+                   '--server-latency', str(args.server_latency)]
+    results = [(name, run_replay(replay_args, interim)) for name, interim in
+               (('final only', False), ('interim', True))]
+
+    print(f'{args.wav or "synthetic"}, {args.server_latency * 1000:g} ms server latency')
+    print(f'  {"":12s} {"first word (ms)":>19s} {"speech to pixel":>19s} {"render() (ms)":>19s} '
+          f'{"responses":>9s} {"words":>9s}')
+    print(f'  {"":12s} ' + ' '.join(f'{percentile:>9s}' for percentile in ('p50', 'p90') * 3) +
+          f' {"":9s} {"shown":>9s}')
+    for name, result in results:
+        report(name, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# How much does each render() allocate over a 10 minute monologue, and what did the old data structures cost?
+#   python benchmarks/bench_memory.py --minutes 10
+# The same monologue goes through twice, under the same tracemalloc harness:
+#   before - the old per-render allocations put back: dict-backed words, the combined word list glued together every
+#            render, and a deepcopy of the screen as the snapshot. Everything else render() does has changed since,
+#            so this is today's render() plus what the old one paid for on top of it.
+#   after  - the display as it is
+import argparse
+import asyncio
+import copy
+import os
+import statistics
+import sys
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame  # noqa: E402
+
+import main  # noqa: E402
+from bench_wrapping import load_font  # noqa: E402
+from synthetic import SimulatedClock, make_monologue, run_session  # noqa: E402
+
+
+# TranscriptionWord as it was before __slots__ - every instance dragged a dict around
+class DictBackedWord:
+    def __init__(self, text, start, end, time_offset=0, request_id=0):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.time_offset = time_offset
+        self.request_id = request_id
+
+
+def bytes_allocated(function):
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    return peak - before, result
+
+
+# TranscriptionWord's methods on a plain old class, so words can be dict-backed and mutable again, like they were
+class LegacyWord:
+    equality_tolerance = main.TranscriptionWord.equality_tolerance
+
+    def __init__(self, text, start, end, time_offset=0, request_id=0):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.time_offset = time_offset
+        self.request_id = request_id
+
+
+for _name, _method in vars(main.TranscriptionWord).items():
+    if callable(_method) and _name not in ('__init__', '__setattr__', '__delattr__'):
+        setattr(LegacyWord, _name, _method)
+
+
+# The display, paying what render() used to pay every time: a deepcopy of the screen so it could tell what changed,
+# and the finalized and interim words glued into one new list. Both stick around til render() is done.
+class LegacyDisplay(main.SubtitleDisplay):
+    async def render(self):
+        previously_displayed_words = copy.deepcopy([list(line) for line in self.currently_displayed_words])
+        combined_words = self.finalized_words + self.interim_words
+        await super().render()
+        del previously_displayed_words, combined_words
+
+
+def compare_words(count):
+    word_bytes, legacy_words = bytes_allocated(
+        lambda: [DictBackedWord('word', 0.1, 0.2, 3.0, 'request') for _ in range(count)])
+    slot_bytes, words = bytes_allocated(
+        lambda: [main.TranscriptionWord('word', 0.1, 0.2, 3.0, 'request') for _ in range(count)])
+    print(f'{count} words')
+    print(f'  dict-backed:        {word_bytes / count:8.1f} bytes per word')
+    print(f'  __slots__:          {slot_bytes / count:8.1f} bytes per word')
+
+    # A full screen is four lines of four-ish words
+    legacy_screen = [legacy_words[i:i + 4] for i in range(0, 16, 4)]
+    screen = tuple(tuple(words[i:i + 4]) for i in range(0, 16, 4))
+    deepcopy_bytes, _ = bytes_allocated(lambda: copy.deepcopy(legacy_screen))
+    snapshot_bytes, _ = bytes_allocated(lambda: screen)
+    print(f'  deepcopy snapshot:  {deepcopy_bytes:8d} bytes per render')
+    print(f'  tuple snapshot:     {snapshot_bytes:8d} bytes per render')
+
+
+# Runs the monologue through a display and returns bytes allocated by each render() and bytes still held at the end
+def measure_session(display_class, font, responses):
+    clock = SimulatedClock()
+    subtitle_display = display_class(pygame.display.set_mode((480, 1280)), font, clock=clock, render_thread=False)
+    render_bytes = []
+    original_render = subtitle_display.render
+
+    async def measured_render():
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await original_render()
+        _, peak = tracemalloc.get_traced_memory()
+        render_bytes.append(peak - before)
+
+    subtitle_display.render = measured_render
+    before, _ = tracemalloc.get_traced_memory()
+    asyncio.run(run_session(subtitle_display, responses, clock))
+    after, _ = tracemalloc.get_traced_memory()
+    return sorted(render_bytes), after - before
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=float, default=10)
+    parser.add_argument('--words-per-minute', type=float, default=150)
+    args = parser.parse_args()
+
+    pygame.init()
+    font = load_font(125)
+    responses = make_monologue(args.minutes, args.words_per_minute)
+
+    tracemalloc.start()
+    compare_words(10000)
+
+    print(f'{args.minutes:g} minute monologue: {len(responses)} statements')
+    print(f'  {"":8s} {"renders":>8s} {"allocated per render (KiB)":>32s} {"held afterwards":>16s}')
+    print(f'  {"":8s} {"":8s} {"median":>10s} {"p99":>10s} {"max":>10s} {"(KiB)":>16s}')
+    results = {}
+    original_word = main.TranscriptionWord
+    for name, display_class, word_class in (('before', LegacyDisplay, LegacyWord),
+                                            ('after', main.SubtitleDisplay, original_word)):
+        main.TranscriptionWord = word_class
+        try:
+            render_bytes, held = measure_session(display_class, font, responses)
+        finally:
+            main.TranscriptionWord = original_word
+        results[name] = statistics.median(render_bytes)
+        print(f'  {name:8s} {len(render_bytes):8d} {statistics.median(render_bytes) / 1024:10.1f} '
+              f'{render_bytes[int(len(render_bytes) * 0.99)] / 1024:10.1f} {render_bytes[-1] / 1024:10.1f} '
+              f'{held / 1024:16.1f}')
+    print(f'  median allocation per render is {results["after"] / results["before"]:.0%} of what it was')
+
+
+if __name__ == '__main__':
+    run()
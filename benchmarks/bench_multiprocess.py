@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# Single event loop vs. MULTIPROCESS mode, under load. Replays the same audio through both (see replay.py), with the
+# display's process made artificially slow, and compares how much audio got lost and how late captions showed up.
+#   python benchmarks/bench_multiprocess.py [recording.wav] --render-load 100 --busy-threads 2 --hogs 0
+# --hogs N also keeps N other processes burning a core each, like whatever else the Pi's up to.
+# Each mode runs in its own Python, so neither inherits the other's threads, and each takes as long as the audio.
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+REPLAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replay.py')
+
+
+def burn_a_core():
+    while True:
+        pass
+
+
+def run_replay(replay_args, multiprocess):
+    with tempfile.TemporaryDirectory() as scratch:
+        results_path = os.path.join(scratch, 'results.json')
+        command = [sys.executable, REPLAY, *replay_args, '--json', results_path]
+        if multiprocess:
+            command.append('--multiprocess')
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(results_path) as f:
+            return json.load(f)
+
+
+def stage(results, name, percentile):
+    return results['stages'].get(name, {}).get(percentile, float('nan'))
+
+
+def report(name, results):
+    audio = results['audio']
+    # Callback mode counts ring overruns and PortAudio overflows, polling mode counts dropped chunks
+    audio_lost = audio.get('overruns', 0) + audio.get('input_overflows', 0) + audio.get('dropped', 0)
+    ring_lost = (results.get('shared_audio') or {}).get('overruns', 0)
+    latency = results['speech_to_pixel_ms']
+    print(f'  {name:12s} {audio_lost:9d} {ring_lost:9d} '
+          f'{stage(results, "capture_to_send", "p99_ms"):9.1f} {stage(results, "capture_to_send", "max_ms"):9.1f} '
+          f'{latency.get("p50", float("nan")):9.1f} {latency.get("p90", float("nan")):9.1f} '
+          f'{latency.get("p99", float("nan")):9.1f} {results["words_shown"]:5d}/{results["words_sent"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('wav', nargs='?')
+    parser.add_argument('--seconds', type=int, default=30, help='Length of the made-up audio, with no WAV')
+    parser.add_argument('--capture-mode', choices=('callback', 'polling'), default='callback')
+    parser.add_argument('--render-load', type=float, default=100, help='Extra milliseconds of CPU per frame')
+    parser.add_argument('--busy-threads', type=int, default=2, help='GIL hogs in the display\'s process')
+    parser.add_argument('--hogs', type=int, default=0, help='Other processes burning a core each')
+    args = parser.parse_args()
+
+    replay_args = [*([args.wav] if args.wav else []), '--seconds', str(args.seconds),
+                   '--capture-mode', args.capture_mode, '--render-load', str(args.render_load),
+                   '--busy-threads', str(args.busy_threads)]
+
+    hogs = [multiprocessing.Process(target=burn_a_core, daemon=True) for _ in range(args.hogs)]
+    for hog in hogs:
+        hog.start()
+    try:
+        results = [(name, run_replay(replay_args, multiprocess)) for name, multiprocess in
+                   (('single loop', False), ('multiprocess', True))]
+    finally:
+        for hog in hogs:
+            hog.terminate()
+
+    print(f'{args.wav or "synthetic"}, {args.capture_mode} capture, {args.render_load:g} ms render load, '
+          f'{args.busy_threads} busy threads, {args.hogs} hogs, {os.cpu_count()} cores')
+    print(f'  {"":12s} {"audio":>9s} {"ring":>9s} {"capture to send (ms)":>19s} '
+          f'{"speech to pixel (ms)":>29s} {"words":>9s}')
+    print(f'  {"":12s} {"lost":>9s} {"lost":>9s} {"p99":>9s} {"max":>9s} {"p50":>9s} {"p90":>9s} {"p99":>9s} '
+          f'{"shown":>9s}')
+    for name, result in results:
+        report(name, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# Does the display keep up when I talk faster than lines scroll? Runs the same long monologue through SubtitleDisplay
+# on simulated time with a few different pacers, and reports how long words sat waiting for room on the screen.
+#   python benchmarks/bench_pacing.py --minutes 10 --words-per-second 10 --stall 30
+# Waiting is from a word's transcript arriving to it first showing up. The lag column is the display's own caption_lag,
+# worst in each minute, so you can see whether it keeps growing or levels off.
+# Three scenes:
+#   talking     - interim results, like the hoodie runs by default
+#   finals only - INTERIM_RESULTS off, so each statement shows up all at once, a statement's worth late
+#   stall       - nothing scrolls for --stall seconds a minute in, like the display hung, so there's a backlog to burn
+#                 through. That's what BURST_LAG and SKIP_LAG are for.
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+import main  # noqa: E402
+from bench_wrapping import load_font  # noqa: E402
+from pacing import CaptionPacer  # noqa: E402
+from synthetic import SimulatedClock, make_session, run_session  # noqa: E402
+
+PACERS = {
+    'fixed 0.75 s': lambda: CaptionPacer(0.75, 0.75, burst_lag=None, skip_lag=None),
+    'adaptive': lambda: CaptionPacer(burst_lag=None, skip_lag=None),
+    'adaptive+burst': lambda: CaptionPacer(skip_lag=None),
+    'adaptive+skip': CaptionPacer,
+}
+
+
+def run(font, responses, pacer, stall=None):
+    clock = SimulatedClock()
+    subtitle_display = main.SubtitleDisplay(pygame.display.set_mode((480, 1280)), font, clock=clock,
+                                            render_thread=False, pacer=pacer)
+    arrived = {}  # (request_id, word start) -> when its transcript showed up, til it's on screen
+    shown = set()  # Same keys, once they've been on screen. The final result brings 'em all again.
+    waits = []
+    worst_lag_by_minute = {}
+
+    original_handle_transcript = subtitle_display.handle_transcript
+    original_submit = subtitle_display.frames.submit
+
+    async def handle_transcript(transcript, words, request_id, is_final):
+        for word in words:
+            key = (request_id, word['start'])
+            if key not in shown:
+                arrived.setdefault(key, clock.seconds)
+        await original_handle_transcript(transcript, words, request_id, is_final)
+
+    def submit(lines, words):
+        for line in words:
+            for word in line:
+                key = (word.request_id, word.start)
+                if key in arrived:
+                    waits.append(clock.seconds - arrived.pop(key))
+                    shown.add(key)
+        original_submit(lines, words)
+
+    def on_step(seconds):
+        minute = int(seconds // 60)
+        worst_lag_by_minute[minute] = max(worst_lag_by_minute.get(minute, 0.0), subtitle_display.caption_lag())
+
+    subtitle_display.handle_transcript = handle_transcript
+    subtitle_display.frames.submit = submit
+    if stall is not None:
+        original_deadline = subtitle_display.next_expiration_deadline
+
+        def next_expiration_deadline():
+            deadline = original_deadline()
+            stall_start, stall_end = stall
+            if deadline is not None and stall_start <= clock.seconds < stall_end:
+                return max(deadline, stall_end)
+            return deadline
+
+        subtitle_display.next_expiration_deadline = next_expiration_deadline
+    asyncio.run(run_session(subtitle_display, responses, clock, on_step=on_step))
+    # Whatever's left in arrived never made it on screen - skipped, or scrolled off before a frame caught it
+    return waits, len(arrived), worst_lag_by_minute, pacer.stats()
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=float, default=10)
+    parser.add_argument('--words-per-second', type=float, default=10,
+                        help='Faster than lines scroll at a fixed pace, for a wordy bro')
+    parser.add_argument('--stall', type=float, default=30, help='Seconds the display hangs in the stall scene')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # Skipping's the whole point of the stall scene, no need to shout about it
+    pygame.init()
+    font = load_font(125)
+    # No jitter, so every word keeps the same start time from its first interim result to the screen
+    talking = make_session(args.minutes * 60, args.words_per_second, jitter=0)
+    scenes = (('talking', talking, None),
+              ('finals only', make_session(args.minutes * 60, args.words_per_second, interim_ratio=0), None),
+              ('stall', talking, (60, 60 + args.stall)))
+
+    for scene, responses, stall in scenes:
+        words = sum(len(response['channel']['alternatives'][0]['words']) for _, response in responses)
+        print(f'{scene}: {args.minutes:g} minutes at {args.words_per_second:g} words/s, {words} words')
+        print(f'  {"":16s} {"waited (s)":>23s} {"never":>7s} {"bursts":>7s} {"skips":>6s}   '
+              f'worst lag by minute (s)')
+        print(f'  {"":16s} {"p50":>7s} {"p90":>7s} {"max":>7s} {"shown":>7s}')
+        for name, make_pacer in PACERS.items():
+            waits, never_shown, worst_lag_by_minute, stats = run(font, responses, make_pacer(), stall)
+            waits = np.asarray(waits)
+            minutes = ' '.join(f'{worst_lag_by_minute[minute]:5.1f}' for minute in sorted(worst_lag_by_minute)
+                               if minute < args.minutes)
+            print(f'  {name:16s} {np.percentile(waits, 50):7.1f} {np.percentile(waits, 90):7.1f} {waits.max():7.1f} '
+                  f'{never_shown:7d} {stats["bursts"]:7d} {stats["skips"]:6d}   {minutes}')
+
+
+if __name__ == '__main__':
+    main_()
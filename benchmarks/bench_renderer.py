@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# Compares the RetainedRenderer against the old fill/allocate/render/rotate/full-update frame.
+# Feeds both a monologue one word at a time, the way captions actually grow, and checks they draw the same pixels.
+#   python benchmarks/bench_renderer.py --words 200
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame  # noqa: E402
+
+from bench_wrapping import load_font, make_transcript  # noqa: E402
+from renderer import RetainedRenderer  # noqa: E402
+from wrapping import LineWrapper  # noqa: E402
+
+
+# The frame as render() used to draw it, wrapping aside
+def legacy_frame(display, font, lines):
+    font_height = font.size("Tg")[1]
+    display.fill((0, 0, 0))
+    textbox = pygame.Surface((1280, 480))
+    y = 0
+    for line in lines:
+        image = font.render(line.replace('\r', ''), False, (0xff, 0xff, 0xff))
+        textbox.blit(image, (0, y))
+        y += font_height - 2
+    textbox = pygame.transform.rotate(textbox, 90)
+    display.blit(textbox, (0, 0))
+    pygame.display.update()
+
+
+# Every intermediate screenful you'd see while the transcript grows word by word, with old lines scrolling away
+def make_frames(wrapper, max_lines, words):
+    text = make_transcript(words)
+    frames = []
+    tokens = text.split(' ')
+    for i in range(1, len(tokens) + 1):
+        lines = list(wrapper.wrap(' '.join(tokens[:i])))
+        frames.append(lines[-max_lines:])
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=200)
+    args = parser.parse_args()
+
+    pygame.init()
+    display = pygame.display.set_mode((480, 1280))
+    font = load_font(125)
+    renderer = RetainedRenderer(display, font)
+    frames = make_frames(LineWrapper(font, renderer.page_width), renderer.max_lines, args.words)
+
+    mismatches = 0
+    legacy_total = 0
+    retained_total = 0
+    dirty_pixels = 0
+    cache_hits = 0
+    cache_misses = 0
+    for lines in frames:
+        start = time.perf_counter()
+        legacy_frame(display, font, lines)
+        legacy_total += time.perf_counter() - start
+        expected = pygame.image.tobytes(display, 'RGB')
+
+        # Put back whatever the renderer last drew, since the legacy frame clobbered it
+        renderer.invalidate()
+        renderer.draw(renderer.shown_lines)
+
+        hits, misses = renderer.cache_hits, renderer.cache_misses
+        start = time.perf_counter()
+        dirty_rects = renderer.draw(lines)
+        retained_total += time.perf_counter() - start
+        cache_hits += renderer.cache_hits - hits
+        cache_misses += renderer.cache_misses - misses
+        dirty_pixels += sum(rect.width * rect.height for rect in dirty_rects)
+
+        if pygame.image.tobytes(display, 'RGB') != expected:
+            mismatches += 1
+
+    print(f'{len(frames)} frames')
+    print(f'  legacy frame:     {legacy_total / len(frames) * 1000:8.3f} ms')
+    print(f'  retained frame:   {retained_total / len(frames) * 1000:8.3f} ms')
+    print(f'  pixels pushed:    {dirty_pixels / len(frames) / (480 * 1280) * 100:8.1f} % of the screen per frame')
+    print(f'  line cache:       {cache_hits} hits, {cache_misses} misses')
+    if mismatches:
+        raise SystemExit(f'{mismatches} frames differ from the legacy renderer!')
+
+
+if __name__ == '__main__':
+    main()
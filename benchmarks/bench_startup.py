@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# How long after systemd restarts the hoodie until something's on my chest, with FAST_START off and on.
+# Every run is a brand new Python, so imports are cold (well, as cold as the OS's file cache lets 'em be).
+#   python benchmarks/bench_startup.py --runs 5 --devices 12 --device-delay 0.02
+# Reports, in milliseconds since the process was launched:
+#   first frame   - anything at all on the display. With FAST_START, that's READY_TEXT.
+#   mic open      - the audio stream started
+#   first caption - a frame with words in it, from the fake Deepgram server
+# The mic is a WAV with speech right at the start, and there's no real PortAudio here, so --devices and
+# --device-delay fake how long ALSA takes to answer questions about each sound device.
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Runs in the parent, on its own thread, so the hoodie under test has the CPU... mostly to itself
+def run_fake_deepgram(ready):
+    from fake_deepgram import FakeDeepgramServer, scripted_responses
+    from synthetic import make_response
+
+    words = [{'word': word, 'start': 0.1 + 0.3 * i, 'end': 0.35 + 0.3 * i, 'confidence': 0.99}
+             for i, word in enumerate(['ready', 'or', 'not'])]
+    # Answers as soon as a connection has heard a little audio
+    script = scripted_responses([(0.2, make_response(words, 'cold-start'))])
+
+    async def serve():
+        server = await FakeDeepgramServer(script=script).start()
+        ready.append(server.url)
+        while True:
+            await asyncio.sleep(3600)
+
+    asyncio.run(serve())
+
+
+def child(args):
+    launched_at = args.launched_at  # The parent's time.monotonic(), which is the same clock as ours on Linux
+    marks = {}
+
+    def mark(name):
+        marks.setdefault(name, (time.monotonic() - launched_at) * 1000)
+
+    import frames
+    import renderer
+
+    # Note the first of everything that makes it to the display
+    original_present = renderer.RetainedRenderer.present
+    original_draw_frame = frames.FrameScheduler.draw_frame
+
+    def present(self, dirty_rects):
+        original_present(self, dirty_rects)
+        mark('first_frame')
+
+    def draw_frame(self, frame):
+        dirty_rects = original_draw_frame(self, frame)
+        if any(frame.words):
+            mark('first_caption')
+        return dirty_rects
+
+    renderer.RetainedRenderer.present = present
+    frames.FrameScheduler.draw_frame = draw_frame
+
+    from bench_vad import make_synthetic_speech
+    from fake_deepgram import FAKE_API_KEY
+    import pygame
+    from bench_wrapping import load_font
+    from main import SubtitleHoodie
+    from replay import WavAudioInterface
+
+    sample_rate, samples, spans = make_synthetic_speech(seconds=10)
+    samples = samples[int((spans[0][0] - 0.1) * sample_rate):]  # Start talking right away
+
+    # A sound card menu that takes a while to read, with the Codec Zero at the bottom
+    class SlowAudioInterface(WavAudioInterface):
+        def get_device_count(self):
+            return args.devices
+
+        def get_device_info_by_index(self, index):
+            time.sleep(args.device_delay)
+            if index == args.devices - 1:
+                return super().get_device_info_by_index(index)
+            if not 0 <= index < args.devices:
+                raise OSError('Invalid device index')
+            return {'name': f'Some other sound thing {index}', 'index': index}
+
+        def open(self, *open_args, **kwargs):
+            stream = super().open(*open_args, **kwargs)
+            original_start = stream.start_stream
+
+            def start_stream():
+                original_start()
+                mark('mic_open')
+
+            stream.start_stream = start_stream
+            return stream
+
+    audio_interface = SlowAudioInterface(samples, sample_rate)
+    hoodie = SubtitleHoodie(open_display=False)
+    hoodie.FAST_START = args.fast
+    hoodie.AUDIO_DEVICE_CACHE = args.cache
+    hoodie.ARCHIVE_DIR = None
+    hoodie.audio_interface = lambda: audio_interface
+    hoodie.DEEPGRAM_API_KEY = FAKE_API_KEY
+    hoodie.DEEPGRAM_API_URL = args.url
+    hoodie.STATS_INTERVAL = None
+    pygame.font.init()  # Early, for the stand-in font. It's cheap, and both modes pay for it.
+    hoodie.get_ready(load_font(125))
+
+    async def run():
+        session = asyncio.create_task(hoodie.do_the_thing())
+        give_up_at = time.monotonic() + args.timeout
+        while 'first_caption' not in marks and time.monotonic() < give_up_at:
+            await asyncio.sleep(0.005)
+            if session.done():
+                session.result()
+        hoodie.done = True
+        hoodie.subtitle_display.done = True
+        await session
+
+    asyncio.run(run())
+    print(json.dumps(marks))
+    sys.stdout.flush()
+    os._exit(0)  # Don't wait around for the SDK's stragglers
+
+
+def launch(url, fast, cache, args):
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--url', url, '--cache', cache,
+               '--devices', str(args.devices), '--device-delay', str(args.device_delay),
+               '--timeout', str(args.timeout)]
+    if fast:
+        command.append('--fast')
+    command += ['--launched-at', repr(time.monotonic())]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help='Runs of each mode')
+    parser.add_argument('--devices', type=int, default=12, help='Sound devices to pretend ALSA has')
+    parser.add_argument('--device-delay', type=float, default=0.02, help='Seconds to answer about each one')
+    parser.add_argument('--timeout', type=float, default=20.0)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--fast', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--cache', help=argparse.SUPPRESS)
+    parser.add_argument('--launched-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    ready = []
+    threading.Thread(target=run_fake_deepgram, args=(ready,), daemon=True).start()
+    while not ready:
+        time.sleep(0.01)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        cache = os.path.join(scratch, 'audio_device.json')
+        launch(ready[0], True, cache, args)  # Fill the device cache, like any restart after the first would find it
+        results = {'FAST_START off': [], 'FAST_START on': []}
+        for _ in range(args.runs):
+            # Take turns, so whatever else the machine's up to hits both the same
+            results['FAST_START off'].append(launch(ready[0], False, cache, args))
+            results['FAST_START on'].append(launch(ready[0], True, cache, args))
+
+    print(f'{args.runs} cold starts each, {args.devices} sound devices at {args.device_delay * 1000:g} ms apiece')
+    print(f'  {"":16s} {"first frame":>14s} {"mic open":>14s} {"first caption":>14s}   (median ms, worst in brackets)')
+    for name, runs in results.items():
+        columns = []
+        for mark in ('first_frame', 'mic_open', 'first_caption'):
+            times = [run[mark] for run in runs if mark in run]
+            columns.append(f'{statistics.median(times):6.0f} ({max(times):5.0f})' if times else f'{"never":>14s}')
+        print(f'  {name:16s} {" ".join(columns)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# How many bytes each uplink configuration puts on the phone hotspot, and how much CPU it costs to get there.
+#   python benchmarks/bench_uplink.py recording.wav
+# With no file, it uses the same made-up pseudo-speech as bench_vad.py.
+# Then it checks the resampler's frequency response against its spec, one pure tone at a time: flat in the passband,
+# and everything from the output's Nyquist on up (which would fold back into the speech band) way down.
+# Exits with an error if it's out of spec.
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from bench_vad import load_wav, make_synthetic  # noqa: E402
+from uplink import PolyphaseResampler, UplinkEncoder  # noqa: E402
+
+# (label, output sample rate or None for unchanged, encoding)
+CONFIGS = [
+    ('as captured, linear16', None, 'linear16'),
+    ('16 kHz linear16', 16000, 'linear16'),
+    ('16 kHz mulaw', 16000, 'mulaw'),
+    ('8 kHz mulaw', 8000, 'mulaw'),
+    ('16 kHz flac', 16000, 'flac'),
+]
+
+
+def evaluate(label, sample_rate, samples, output_rate, encoding, chunk_frames, send_chunk_seconds):
+    try:
+        # Synchronous, so the CPU time is all on this thread where we can measure it
+        uplink = UplinkEncoder(sample_rate, output_rate, encoding, send_chunk_seconds=send_chunk_seconds,
+                               worker_thread=False)
+        uplink.process(b'')  # Make the codec now, so FLAC's import doesn't count against it
+    except ImportError as e:
+        print(f'  {label:22s} skipped ({e})')
+        return
+
+    audio = samples.tobytes()
+    bytes_per_chunk = chunk_frames * 2
+    packets = 0
+    start = time.process_time()
+    for offset in range(0, len(audio), bytes_per_chunk):
+        packets += len(uplink.process(memoryview(audio)[offset:offset + bytes_per_chunk]))
+    packets += len(uplink.finish())
+    cpu = time.process_time() - start
+
+    seconds = len(samples) / sample_rate
+    print(f'  {label:22s} {uplink.bytes_out / seconds / 1000:7.1f} kB/s '
+          f'({uplink.bytes_out / uplink.bytes_in * 100:5.1f}% of raw), {packets / seconds:5.1f} messages/s, '
+          f'{cpu / seconds * 1000:6.2f} ms CPU per second of audio')
+
+
+# Gain in dB for a tone at each frequency, through the resampler in the hoodie's chunk size. Tones past the output's
+# Nyquist come out aliased, at some other frequency - the RMS counts them wherever they land.
+def frequency_response(resampler, input_rate, frequencies, chunk_frames, amplitude=10000):
+    times = np.arange(input_rate) / input_rate
+    settle = resampler.taps_per_phase * resampler.up // resampler.down  # Output samples before the filter's full
+    gains = []
+    for frequency in frequencies:
+        resampler.reset()
+        tone = np.rint(amplitude * np.sin(2 * np.pi * frequency * times)).astype(np.int16)
+        output = np.concatenate([resampler.process(tone[offset:offset + chunk_frames])
+                                 for offset in range(0, len(tone), chunk_frames)])
+        output = output[settle:len(output) - settle].astype(np.float64)
+        gains.append(20 * math.log10(max(np.sqrt(np.mean(output ** 2)), 1e-3) / (amplitude / math.sqrt(2))))
+    return gains
+
+
+def check_resampler(input_rate, output_rate, chunk_frames, passband_ripple_db=0.5):
+    resampler = PolyphaseResampler(input_rate, output_rate)
+    nyquist = min(input_rate, output_rate) / 2
+    passband = [nyquist * fraction for fraction in (0.05, 0.25, 0.5, 0.75, resampler.passband)]
+    stopband = [frequency for frequency in (nyquist, nyquist * 1.0625, nyquist * 1.25, nyquist * 1.5, nyquist * 2,
+                                            input_rate / 2 * 0.95) if frequency < input_rate / 2]
+    passband_gains = frequency_response(resampler, input_rate, passband, chunk_frames)
+    stopband_gains = frequency_response(resampler, input_rate, stopband, chunk_frames)
+
+    in_spec = max(abs(gain) for gain in passband_gains) <= passband_ripple_db and \
+        max(stopband_gains) <= -resampler.attenuation_db
+    print(f'  {input_rate} -> {output_rate} Hz, {resampler.taps_per_phase} taps per phase: '
+          f'{"in spec" if in_spec else "OUT OF SPEC"} (passband within {passband_ripple_db} dB, '
+          f'{resampler.attenuation_db:g} dB down past {nyquist:g} Hz)')
+    for frequency, gain in zip(passband + stopband, passband_gains + stopband_gains):
+        print(f'    {frequency:8.0f} Hz {gain:7.1f} dB')
+    return in_spec
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('wav', nargs='?')
+    parser.add_argument('--chunk-frames', type=int, default=2205, help='Same as CHUNK_FRAMES')
+    parser.add_argument('--send-chunk-seconds', type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.wav:
+        sample_rate, samples = load_wav(args.wav)
+    else:
+        sample_rate, samples, _ = make_synthetic()
+    print(f'{args.wav or "synthetic"}: {len(samples) / sample_rate:.1f} s at {sample_rate} Hz')
+
+    for label, output_rate, encoding in CONFIGS:
+        evaluate(label, sample_rate, samples, output_rate, encoding, args.chunk_frames, args.send_chunk_seconds)
+
+    print('Resampler frequency response')
+    output_rates = sorted({output_rate for _, output_rate, _ in CONFIGS if output_rate not in (None, sample_rate)})
+    if not all([check_resampler(sample_rate, output_rate, args.chunk_frames) for output_rate in output_rates]):
+        raise SystemExit('The resampler is out of spec')
+
+
+if __name__ == '__main__':
+    main()
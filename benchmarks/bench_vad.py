@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# Offline evaluation for the voice activity detectors: CPU per second of audio, how long after speech starts each one
+# decides so, and how close its own guess at the onset (onset_offset, which picks the pre-roll) comes to the truth.
+# Feed it WAV files, optionally with Audacity label files next to them (foo.wav + foo.txt, one "start<TAB>end<TAB>label"
+# line per stretch of speech) so it knows when speech really started:
+#   python benchmarks/bench_vad.py recordings/*.wav
+# With no files, it makes up some noisy pseudo-speech with known onsets, in a few different rooms.
+# Chunks default to the hoodie's own CHUNK_FRAMES, so onsets get decided as often as they do on the real thing.
+import argparse
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vad import create_vad  # noqa: E402
+
+
+def load_wav(path):
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise SystemExit(f'{path}: only 16-bit WAVs, please')
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+        if channels > 1:
+            samples = samples.reshape(-1, channels)[:, 0].copy()  # The hoodie's mono, so just take the left channel
+        return wav.getframerate(), samples
+
+
+# (start, end) of each stretch of speech, from an Audacity label file next to the WAV
+def load_labels(path):
+    label_path = os.path.splitext(path)[0] + '.txt'
+    if not os.path.exists(label_path):
+        return None
+    spans = []
+    with open(label_path) as labels:
+        for line in labels:
+            fields = line.split('\t')
+            if len(fields) >= 2:
+                spans.append((float(fields[0]), float(fields[1])))
+    return spans
+
+
+# Room noise with bursts of buzzy, wobbly tones standing in for speech, plus the (start, end) times of each burst
+def make_synthetic_speech(sample_rate=44100, seconds=60, seed=0, noise_level=60, loudness=(120, 2000)):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, noise_level, sample_rate * seconds)
+    spans = []
+    t = 1.5
+    while t < seconds - 4:
+        length = rng.uniform(0.8, 3.5)
+        start, end = int(t * sample_rate), int((t + length) * sample_rate)
+        times = np.arange(end - start) / sample_rate
+        pitch = rng.uniform(90, 220) * (1 + 0.1 * np.sin(2 * np.pi * 3 * times))
+        voiced = np.sign(np.sin(2 * np.pi * np.cumsum(pitch) / sample_rate)) * rng.uniform(*loudness)
+        envelope = np.minimum(1, times / 0.05) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * times) ** 2)
+        samples[start:end] += voiced * envelope
+        spans.append((t, t + length))
+        t += length + rng.uniform(0.5, 5)
+    return sample_rate, np.clip(samples, -32768, 32767).astype(np.int16), spans
+
+
+# Same, but just the onset times
+def make_synthetic(sample_rate=44100, seconds=60, seed=0):
+    sample_rate, samples, spans = make_synthetic_speech(sample_rate, seconds, seed)
+    return sample_rate, samples, [start for start, end in spans]
+
+
+def evaluate(kind, sample_rate, samples, spans, chunk_frames):
+    vad = create_vad(kind, sample_rate)
+    chunk_bytes = samples.tobytes()
+    bytes_per_chunk = chunk_frames * 2
+    chunk_seconds = chunk_frames / sample_rate
+    detected = []  # (time the decision was available, time the detector thinks speech started)
+    forwarding = []  # (chunk start, whether the detector was already forwarding going into that chunk)
+    cpu = 0.0
+    active_chunks = 0
+    active = False
+    for offset in range(0, len(chunk_bytes) - bytes_per_chunk + 1, bytes_per_chunk):
+        chunk = memoryview(chunk_bytes)[offset:offset + bytes_per_chunk]
+        chunk_start = offset / 2 / sample_rate
+        forwarding.append((chunk_start, active))
+        start = time.process_time()
+        active = vad.process(chunk)
+        cpu += time.process_time() - start
+        active_chunks += active
+        if vad.onset_offset is not None:
+            detected.append((chunk_start + chunk_seconds, chunk_start + vad.onset_offset))
+
+    seconds = len(samples) / sample_rate
+    print(f'  {kind:7s} {cpu / seconds * 1000:7.3f} ms CPU per second of audio, '
+          f'forwarding {active_chunks * chunk_frames / len(samples) * 100:5.1f}% of it, {len(detected)} onsets')
+    if spans is None:
+        return None
+
+    # Each real onset either got caught by a detection during that stretch of speech, was already being forwarded
+    # (the hangover from the last one hadn't run out, so nothing was lost), or got missed entirely.
+    latencies = []  # From speech starting to the end of the chunk that decided so, IE when the socket could open
+    errors = []  # How far the detector's own estimate of the onset was from the real one
+    already_forwarding = 0
+    missed = 0
+    for onset, end in spans:
+        chunk = int(onset / chunk_seconds)
+        if chunk < len(forwarding) and forwarding[chunk][1]:
+            already_forwarding += 1
+            continue
+        caught = [(decided, estimated) for decided, estimated in detected if onset <= decided <= end + chunk_seconds]
+        if caught:
+            decided, estimated = caught[0]
+            latencies.append(decided - onset)
+            errors.append(estimated - onset)
+        else:
+            missed += 1
+
+    print(f'          {len(latencies)} of {len(spans)} onsets caught, {already_forwarding} already forwarding, '
+          f'{missed} missed')
+    if latencies:
+        errors = np.asarray(errors)
+        print(f'          decision latency: mean {np.mean(latencies) * 1000:6.0f} ms, '
+              f'max {np.max(latencies) * 1000:6.0f} ms')
+        print(f'          estimated onset error: mean {np.mean(errors) * 1000:+6.0f} ms, '
+              f'mean abs {np.mean(np.abs(errors)) * 1000:6.0f} ms, max abs {np.max(np.abs(errors)) * 1000:6.0f} ms')
+    return missed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('wavs', nargs='*')
+    parser.add_argument('--chunk-frames', type=int, help='Defaults to the hoodie\'s CHUNK_FRAMES')
+    parser.add_argument('--detectors', default='rms,energy')
+    args = parser.parse_args()
+
+    chunk_frames = args.chunk_frames
+    if chunk_frames is None:
+        from main import SubtitleHoodie  # Not up top, so replay.py and friends can borrow the audio for free
+        chunk_frames = SubtitleHoodie(open_display=False).CHUNK_FRAMES
+
+    if args.wavs:
+        inputs = [(path, *load_wav(path), load_labels(path)) for path in args.wavs]
+    else:
+        # The usual, then a loud room that a fixed noise floor falls for, then a soft talker that's easy to miss
+        inputs = [('synthetic', *make_synthetic_speech()),
+                  ('synthetic, loud room', *make_synthetic_speech(noise_level=250, loudness=(500, 4000))),
+                  ('synthetic, soft talker', *make_synthetic_speech(noise_level=40, loudness=(60, 400)))]
+
+    for name, sample_rate, samples, spans in inputs:
+        print(f'{name}: {len(samples) / sample_rate:.1f} s at {sample_rate} Hz, {chunk_frames}-frame chunks')
+        missed = {kind: evaluate(kind, sample_rate, samples, spans, chunk_frames)
+                  for kind in args.detectors.split(',')}
+        if spans is not None and len(missed) > 1 and len(set(missed.values())) == 1:
+            print('  Every detector missed as many onsets as the others, so this audio can\'t tell them apart')
+
+
+if __name__ == '__main__':
+    main()
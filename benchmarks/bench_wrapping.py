@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# Compares the cached LineWrapper against the old measure-every-prefix loop from the pygame wiki.
+# Runs headless, so you can run it on the Pi over SSH or on your desktop:
+#   python benchmarks/bench_wrapping.py --words 400 --repeats 20
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame  # noqa: E402
+
+from wrapping import LineWrapper  # noqa: E402
+
+VOCABULARY = ('four score and seven years ago our fathers brought forth on this continent a new nation conceived '
+              'in liberty dedicated to the proposition that all men are created equal now we are engaged in a great '
+              'civil war testing whether that nation or any nation so conceived can long endure').split()
+
+
+# The wrapping loop as it was before LineWrapper, minus the blitting, so we can compare apples to apples
+def legacy_wrap(font, text, width, max_lines):
+    output = []
+    while text and len(output) < max_lines:
+        i = 1
+        while font.size(text[:i])[0] < width and i < len(text) and text[i] != '\r':
+            i += 1
+        if i < len(text):
+            if text[i] == '\r':
+                i += 1
+            else:
+                i = text.rfind(" ", 0, i) + 1
+        output.append(text[:i])
+        text = text[i:]
+    return output
+
+
+def cached_wrap(wrapper, text, max_lines):
+    output = []
+    for line in wrapper.wrap(text):
+        if len(output) >= max_lines:
+            break
+        output.append(line)
+    return output
+
+
+# Something that looks like a monologue - runs of words with the occasional statement break
+def make_transcript(word_count, seed=0):
+    rng = random.Random(seed)
+    statements = []
+    remaining = word_count
+    while remaining > 0:
+        length = min(remaining, rng.randint(4, 30))
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        words[-1] += rng.choice('.?!,')
+        statements.append(' '.join(words))
+        remaining -= length
+    return '\r'.join(statements)
+
+
+def load_font(size):
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    font_path = os.path.join(project_root, 'res/VCR_OSD_MONO_1.001.ttf')
+    if os.path.exists(font_path):
+        return pygame.font.Font(font_path, size)
+    print('VCR font not found, falling back to the pygame default font (which has kerning, so this is the hard case)')
+    return pygame.font.Font(None, size)
+
+
+def time_it(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=400, help='Words in the synthetic transcript')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--max-lines', type=int, default=1000, help='Lines to wrap before stopping (the hoodie fits 4)')
+    args = parser.parse_args()
+
+    pygame.init()
+    font = load_font(125)
+    text = make_transcript(args.words)
+
+    legacy_seconds, legacy_lines = time_it(lambda: legacy_wrap(font, text, args.width, args.max_lines), args.repeats)
+    # Fresh wrapper, so the first run pays for filling the glyph cache like it would on boot
+    wrapper = LineWrapper(font, args.width)
+    cached_seconds, cached_lines = time_it(lambda: cached_wrap(wrapper, text, args.max_lines), args.repeats)
+
+    if legacy_lines != cached_lines:
+        raise SystemExit('LineWrapper disagrees with the legacy loop! That breaks currently_displayed_words.')
+
+    print(f'{len(text)} characters, {len(legacy_lines)} lines')
+    print(f'  legacy loop:  {legacy_seconds * 1000:9.3f} ms per wrap')
+    print(f'  LineWrapper:  {cached_seconds * 1000:9.3f} ms per wrap')
+    print(f'  speedup:      {legacy_seconds / cached_seconds:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# Plays a WAV file through the whole hoodie - VAD, uplink, websocket, queue, wrapping and rendering - against the fake
+# Deepgram server, with no mic, no display and no Deepgram bill. Then tells you how long words took to go from my
+# mouth to the pixels, and how long rendering took.
+#   python benchmarks/replay.py recording.wav
+# The server needs to know what was said and when. Either of these go next to the WAV:
+#   recording.txt - Audacity labels, one "start<TAB>end<TAB>what I said" line per utterance. Words get spread evenly
+#                   over the utterance, and the transcript arrives server_latency seconds after it ends.
+#   recording.jsonl - responses recorded from one live Deepgram connection that heard the whole WAV, one per line.
+#                     Interim results are replayed too.
+# With no WAV at all, it makes up some pseudo-speech and babbles random words over it.
+# --interim turns on interim results. Labels and made-up audio then get one after every word, like Deepgram sends.
+# Everything runs in real time, so a one minute WAV takes a minute.
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from string import punctuation
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+from bench_vad import load_wav, make_synthetic_speech  # noqa: E402
+from bench_wrapping import VOCABULARY, load_font  # noqa: E402
+from archive import TranscriptArchive  # noqa: E402
+from fake_deepgram import FAKE_API_KEY, FakeDeepgramServer  # noqa: E402
+from synthetic import make_response  # noqa: E402
+
+from main import SubtitleHoodie  # noqa: E402
+
+
+# Quacks like a PyAudio input stream, but plays a WAV in real time. Once the WAV runs out, it's silence forever,
+# the way a mic keeps hearing an empty room.
+class WavStream:
+    def __init__(self, samples, sample_rate, frames_per_buffer, stream_callback=None, shared_start=None):
+        self.audio = samples.astype('<i2').tobytes()
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.stream_callback = stream_callback
+        self.started_at = None  # time.monotonic() of the first sample
+        self.shared_start = shared_start  # Where to tell the replay about started_at, even from a capture process
+        self.frames_read = 0
+        self.thread = None
+        self.running = False
+
+    def _frames(self, start, count):
+        data = self.audio[start * 2:(start + count) * 2]
+        return data + bytes(count * 2 - len(data))
+
+    def start_stream(self):
+        if self.started_at is not None:
+            return
+        self.started_at = time.monotonic()
+        if self.shared_start is not None and not self.shared_start.value:
+            self.shared_start.value = self.started_at
+        self.running = True
+        if self.stream_callback is not None:
+            self.thread = threading.Thread(target=self._pump, name='wav-stream', daemon=True)
+            self.thread.start()
+
+    # Plays PortAudio, calling back with a block of audio whenever it would've been recorded
+    def _pump(self):
+        while self.running:
+            due = self.started_at + (self.frames_read + self.frames_per_buffer) / self.sample_rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            data = self._frames(self.frames_read, self.frames_per_buffer)
+            self.frames_read += self.frames_per_buffer
+            self.stream_callback(data, self.frames_per_buffer, {}, 0)
+
+    def get_read_available(self):
+        if self.started_at is None:
+            return 0
+        return int((time.monotonic() - self.started_at) * self.sample_rate) - self.frames_read
+
+    def read(self, frame_count, exception_on_overflow=True):
+        while self.get_read_available() < frame_count:
+            time.sleep(0.001)
+        data = self._frames(self.frames_read, frame_count)
+        self.frames_read += frame_count
+        return data
+
+    def stop_stream(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+
+# Quacks like pyaudio.PyAudio, with one device that's named so do_the_thing() picks it
+class WavAudioInterface:
+    def __init__(self, samples, sample_rate):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.streams = []
+        # time.monotonic() when the first stream started, or 0. Shared memory, since in MULTIPROCESS mode the
+        # stream gets opened in the capture process and we'd never see it.
+        self.shared_start = multiprocessing.RawValue('d', 0.0)
+
+    @property
+    def started_at(self):
+        return self.shared_start.value or None
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, index):
+        return {'name': 'IQaudIOCODEC (replayed from a WAV)', 'index': index}
+
+    def open(self, rate, frames_per_buffer=1024, stream_callback=None, **kwargs):
+        if rate != self.sample_rate:
+            raise ValueError(f'The WAV is {self.sample_rate} Hz but the hoodie wants {rate} Hz - set SAMPLE_RATE')
+        stream = WavStream(self.samples, self.sample_rate, frames_per_buffer, stream_callback, self.shared_start)
+        self.streams.append(stream)
+        return stream
+
+
+def load_label_spans(path):
+    spans = []
+    with open(path) as labels:
+        for line in labels:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) >= 2:
+                spans.append((float(fields[0]), float(fields[1]), fields[2] if len(fields) > 2 else ''))
+    return spans
+
+
+# One final response per utterance, timed in seconds since the start of the WAV. Utterances with no text get
+# random words at a chatty two and a half words per second.
+def responses_from_spans(spans, seed=0):
+    rng = random.Random(seed)
+    responses = []
+    for start, end, text in spans:
+        tokens = [token.strip(punctuation).casefold() for token in text.split()]
+        tokens = [token for token in tokens if token] or \
+            [rng.choice(VOCABULARY) for _ in range(max(1, round((end - start) * 2.5)))]
+        step = (end - start) / len(tokens)
+        words = [{'word': token, 'start': round(start + i * step, 3), 'end': round(start + (i + 0.9) * step, 3),
+                  'confidence': 0.99} for i, token in enumerate(tokens)]
+        response = make_response(words, request_id=None)
+        response['start'] = start
+        response['duration'] = end - start
+        responses.append(response)
+    return responses
+
+
+# What Deepgram sends with interim results on: a growing interim result as each word ends, then the final one
+def with_interim_results(responses):
+    expanded = []
+    for response in responses:
+        words = response['channel']['alternatives'][0]['words']
+        for count in range(1, len(words)):
+            interim = make_response(words[:count], request_id=None, is_final=False)
+            interim['start'] = response['start']
+            interim['duration'] = words[count - 1]['end'] - response['start']
+            expanded.append(interim)
+        expanded.append(response)
+    return expanded
+
+
+def load_recorded_responses(path):
+    with open(path) as recording:
+        responses = [json.loads(line) for line in recording if line.strip()]
+    return [response for response in responses if 'channel' in response]  # Just the transcripts
+
+
+def percentiles(values):
+    if not len(values):
+        return None
+    values = np.asarray(values) * 1000
+    return {'count': len(values), 'p50': float(np.percentile(values, 50)), 'p90': float(np.percentile(values, 90)),
+            'p99': float(np.percentile(values, 99)), 'max': float(values.max())}
+
+
+def describe(name, stats):
+    if stats is None:
+        return f'  {name:22s} (nothing measured)'
+    return (f'  {name:22s} p50 {stats["p50"]:7.1f} ms   p90 {stats["p90"]:7.1f} ms   p99 {stats["p99"]:7.1f} ms   '
+            f'max {stats["max"]:7.1f} ms   (n={stats["count"]})')
+
+
+# Plays Deepgram: hands out each response on whichever connection actually heard that bit of the WAV, once the
+# audio's arrived and server_latency has passed. If nobody heard it (the VAD gated it out, say), it's missed.
+class ReplayScript:
+    def __init__(self, responses, server_latency=0.3, give_up_after=3.0, poll_interval=0.01):
+        self.pending = sorted(responses, key=lambda response: response['start'] + response['duration'])
+        self.server_latency = server_latency
+        self.give_up_after = give_up_after
+        self.poll_interval = poll_interval
+        self.started_at = None  # time.monotonic() when the WAV started playing
+        self.spoken_at = {}  # (request_id, word start) -> time.monotonic() when I finished saying the word
+        self.sent_at = {}  # Same keys -> time.monotonic() when the server sent it
+        self.stream_starts = {}  # Request ID -> where in the WAV that connection's audio started
+        self.started_saying = {}  # First word of each utterance's key -> time.monotonic() when I started saying it
+        self.delivered = 0
+        self.missed = 0
+
+    # What part of the WAV this connection has heard, in seconds since the WAV started. Audio arrives in real time,
+    # so the newest sample is about as old as the newest message, and the rest came before it.
+    def heard(self, record):
+        if self.started_at is None or record.last_audio_at is None:
+            return None
+        newest = record.last_audio_at - self.started_at
+        return newest - record.audio_seconds, newest
+
+    async def __call__(self, record):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            now = time.monotonic()
+            while self.pending and self.started_at is not None:
+                response = self.pending[0]
+                end = response['start'] + response['duration']
+                due = self.started_at + end + self.server_latency
+                if now < due:
+                    break
+                heard = self.heard(record) if record.closed_at is None else None
+                if heard is not None and heard[0] < end <= heard[1] + self.poll_interval:
+                    self.pending.pop(0)
+                    # Pin down where the connection's audio started the first time, so every response about the
+                    # same word - interim or final - times it the same way
+                    stream_start = self.stream_starts.setdefault(record.request_id, heard[0])
+                    yield self.shift(response, stream_start, record.request_id)
+                elif now > due + self.give_up_after:
+                    self.pending.pop(0)
+                    self.missed += 1
+                else:
+                    break  # Maybe the audio's still on its way, or another connection heard it
+
+    # Deepgram times everything from the start of the connection's audio, not the start of the WAV
+    def shift(self, response, stream_start, request_id):
+        response = copy.deepcopy(response)
+        response['start'] = round(response['start'] - stream_start, 3)
+        now = time.monotonic()
+        for i, word in enumerate(response['channel']['alternatives'][0]['words']):
+            key = (request_id, round(word['start'] - stream_start, 3))
+            self.spoken_at.setdefault(key, self.started_at + word['end'])
+            self.sent_at.setdefault(key, now)
+            if not i:
+                self.started_saying.setdefault(key, self.started_at + word['start'])
+            word['start'] = key[1]
+            word['end'] = round(word['end'] - stream_start, 3)
+        self.delivered += 1
+        return response
+
+
+# Watches render() and the frame scheduler, noting how long each took and when each word first made it onto the screen
+class PixelWatcher:
+    def __init__(self, subtitle_display):
+        self.render_times = []
+        self.draw_times = []
+        self.first_shown = {}  # (request_id, word start) -> time.monotonic() it was first drawn
+
+        original_render = subtitle_display.render
+        original_draw_frame = subtitle_display.frames.draw_frame
+
+        async def render():
+            start = time.perf_counter()
+            await original_render()
+            self.render_times.append(time.perf_counter() - start)
+
+        # Runs on the frame scheduler's worker thread. The frame's on screen a hair later, once it's been presented.
+        def draw_frame(frame):
+            start = time.perf_counter()
+            dirty_rects = original_draw_frame(frame)
+            self.draw_times.append(time.perf_counter() - start)
+            self.note_displayed(frame, time.monotonic())
+            return dirty_rects
+
+        subtitle_display.render = render
+        subtitle_display.frames.draw_frame = draw_frame
+
+    def note_displayed(self, frame, now):
+        for line in frame.words:
+            for word in line:
+                self.first_shown.setdefault((word.request_id, word.start), now)
+
+
+async def replay(hoodie, sample_rate, samples, responses, server_latency, tail):
+    script = ReplayScript(responses, server_latency)
+    server = await FakeDeepgramServer(script=script).start()
+    audio_interface = WavAudioInterface(samples, sample_rate)
+    hoodie.audio_interface = lambda: audio_interface
+    hoodie.DEEPGRAM_API_KEY = FAKE_API_KEY
+    hoodie.DEEPGRAM_API_URL = server.url
+    watcher = PixelWatcher(hoodie.subtitle_display)
+
+    session = asyncio.create_task(hoodie.do_the_thing())
+    while audio_interface.started_at is None:
+        await asyncio.sleep(0.001)
+        if session.done():
+            session.result()  # Blew up before the audio even started
+    script.started_at = audio_interface.started_at
+
+    await asyncio.sleep(len(samples) / sample_rate + tail)
+    hoodie.done = True
+    await session
+    hoodie.subtitle_display.done = True
+    await server.stop()
+
+    speech_to_pixel = [shown - script.spoken_at[key] for key, shown in watcher.first_shown.items()
+                       if key in script.spoken_at]
+    transcript_to_pixel = [shown - script.sent_at[key] for key, shown in watcher.first_shown.items()
+                           if key in script.sent_at]
+    # From opening my mouth to the first word of it on my chest - what interim results are for
+    first_word = [watcher.first_shown[key] - started for key, started in script.started_saying.items()
+                  if key in watcher.first_shown]
+    summary = hoodie.instruments.summary()
+    stages = dict(summary['stages'])
+    audio = summary.get('audio')
+    if hoodie.MULTIPROCESS:
+        # The other processes mailed their stats home on the way out
+        for name in ('capture', 'connection'):
+            stages.update(summary.get(name, {}).get('stages', {}))
+        audio = summary.get('capture', {}).get('audio')
+        usage = summary.get('connection', {}).get('usage')
+    else:
+        usage = summary.get('usage')
+    return {
+        'audio_seconds': len(samples) / sample_rate,
+        'responses': len(responses),
+        'responses_delivered': script.delivered,
+        'responses_missed': script.missed + len(script.pending),
+        'words_sent': len(script.spoken_at),
+        'words_shown': len(speech_to_pixel),
+        'speech_to_pixel_ms': percentiles(speech_to_pixel),
+        'time_to_first_word_ms': percentiles(first_word),
+        'interim_results': hoodie.INTERIM_RESULTS,
+        'transcript_to_pixel_ms': percentiles(transcript_to_pixel),
+        'render_ms': percentiles(watcher.render_times),
+        'draw_ms': percentiles(watcher.draw_times),
+        'server': server.stats(),
+        'usage': usage or {},
+        'frames': hoodie.subtitle_display.frames.stats(),
+        'worst_loop_stall_ms': hoodie.instruments.worst_loop_stall * 1000,
+        'multiprocess': hoodie.MULTIPROCESS,
+        'audio': audio or {},
+        'shared_audio': summary.get('shared_audio'),
+        'stages': stages,
+    }
+
+
+# Makes every frame cost this much more CPU, holding the GIL the whole time, the way slow font rasterization on the
+# Pi does. That's the load that starves the audio loop when everything shares one process.
+def burn_cpu_while_drawing(subtitle_display, seconds):
+    original_draw_frame = subtitle_display.frames.draw_frame
+
+    def draw_frame(frame):
+        until = time.monotonic() + seconds
+        while time.monotonic() < until:
+            pass
+        return original_draw_frame(frame)
+
+    subtitle_display.frames.draw_frame = draw_frame
+
+
+# Pure Python forever. In MULTIPROCESS mode, the capture and connection processes get forked before this starts, so it
+# only slows down the display.
+def hog_the_gil():
+    while True:
+        sum(range(1000))
+
+
+def report(name, results):
+    print(f'{name}: {results["audio_seconds"]:.1f} s of audio, {results["responses_delivered"]} of '
+          f'{results["responses"]} responses delivered ({results["responses_missed"]} gated out or missed), '
+          f'{results["words_shown"]} of {results["words_sent"]} words shown')
+    print(describe('time to first word', results['time_to_first_word_ms']))
+    print(describe('speech to pixel', results['speech_to_pixel_ms']))
+    print(describe('transcript to pixel', results['transcript_to_pixel_ms']))
+    print(describe('render() layout', results['render_ms']))
+    print(describe('frame drawing', results['draw_ms']))
+    server = results['server']
+    print(f'  Deepgram would\'ve heard {server["audio_seconds"]:.1f} s of audio over {server["connections"]} '
+          f'connections, with {server["keep_alives"]} keep-alives')
+    usage = results['usage']
+    if usage:
+        print(f'  The hoodie thinks it sent {usage["audio_seconds"]:.1f} s: {usage["speech_seconds"]:.1f} s speech, '
+              f'{usage["silence_seconds"]:.1f} s silence, and held back {usage["trimmed_seconds"]:.1f} s more')
+    frames = results['frames']
+    print(f'  {frames["drawn"]} frames drawn, {frames["coalesced"]} coalesced, {frames["failed"]} failed, '
+          f'{frames["slots_overrun"]} frame slots overrun, '
+          f'worst event loop stall {results["worst_loop_stall_ms"]:.1f} ms')
+    print(f'  Audio lost: {results["audio"]}')
+    if results['shared_audio'] is not None:
+        print(f'  Shared audio ring: {results["shared_audio"]}')
+    print('  The hoodie\'s own stage timings:')
+    for stage, stats in results['stages'].items():
+        if 'p50_ms' in stats:
+            print(describe(f'  {stage}', dict(stats, p50=stats['p50_ms'], p90=stats['p90_ms'], p99=stats['p99_ms'],
+                                              max=stats['max_ms'])))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('wav', nargs='?')
+    parser.add_argument('--responses', help='Labels (.txt) or recorded responses (.jsonl), if not next to the WAV')
+    parser.add_argument('--server-latency', type=float, default=0.3, help='Seconds Deepgram takes to respond')
+    parser.add_argument('--tail', type=float, default=5.0, help='Seconds to keep going after the WAV ends')
+    parser.add_argument('--capture-mode', choices=('callback', 'polling'))
+    parser.add_argument('--vad', choices=('energy', 'rms'))
+    parser.add_argument('--seconds', type=int, default=30, help='Length of the made-up audio, with no WAV')
+    parser.add_argument('--multiprocess', action='store_true', help='Capture, connection and display in 3 processes')
+    parser.add_argument('--interim', action='store_true',
+                        help='Interim results on, with one after every word for labels and made-up audio')
+    parser.add_argument('--render-load', type=float, default=0,
+                        help='Milliseconds of extra pure-Python CPU per frame, like a Pi that rasterizes slowly')
+    parser.add_argument('--busy-threads', type=int, default=0,
+                        help='Threads that hog the GIL in the display\'s process for the whole run')
+    parser.add_argument('--send-all-audio', action='store_true',
+                        help='No TRAILING_SILENCE or MAX_SECONDS_WITHOUT_WORDS, IE pay for everything the VAD lets by')
+    parser.add_argument('--json', help='Also write the results here')
+    parser.add_argument('--archive', help='Archive the transcripts here, instead of not at all')
+    parser.add_argument('--log-level', default='WARNING', help='DEBUG for the hoodie\'s full running commentary')
+    args = parser.parse_args()
+
+    if args.wav:
+        sample_rate, samples = load_wav(args.wav)
+        responses_path = args.responses
+        if responses_path is None:
+            for extension in ('.jsonl', '.txt'):
+                if os.path.exists(os.path.splitext(args.wav)[0] + extension):
+                    responses_path = os.path.splitext(args.wav)[0] + extension
+                    break
+        if responses_path is None:
+            raise SystemExit(f'Nothing to tell the fake server what was said in {args.wav} - see the top of {__file__}')
+        if responses_path.endswith('.jsonl'):
+            responses = load_recorded_responses(responses_path)
+        else:
+            responses = responses_from_spans(load_label_spans(responses_path))
+    else:
+        sample_rate, samples, spans = make_synthetic_speech(seconds=args.seconds)
+        responses = responses_from_spans([(start, end, '') for start, end in spans])
+    if args.interim and not any(not response.get('is_final', True) for response in responses):
+        responses = with_interim_results(responses)
+
+    pygame.init()
+    hoodie = SubtitleHoodie(subtitle_font=load_font(125))
+    if sample_rate != hoodie.SAMPLE_RATE:
+        # Rather than resample the WAV, pretend the mic runs at its rate
+        hoodie.SAMPLE_RATE = sample_rate
+        hoodie.CHUNK_FRAMES = sample_rate // 20
+    if args.capture_mode:
+        hoodie.CAPTURE_MODE = args.capture_mode
+    if args.vad:
+        hoodie.VAD = args.vad
+    hoodie.MULTIPROCESS = args.multiprocess
+    hoodie.INTERIM_RESULTS = args.interim
+    if args.send_all_audio:
+        hoodie.TRAILING_SILENCE = hoodie.MAX_SECONDS_WITHOUT_WORDS = None
+    hoodie.AUDIO_DEVICE_CACHE = None  # Don't make the real hoodie think its mic is a WAV file
+    hoodie.USAGE_LOG = None  # Or bill it for made-up babble
+    # Made-up babble doesn't belong in the real archive
+    hoodie.archive = TranscriptArchive(args.archive) if args.archive else None
+    hoodie.subtitle_display.archive = hoodie.archive
+    if args.render_load:
+        burn_cpu_while_drawing(hoodie.subtitle_display, args.render_load / 1000)
+    for i in range(args.busy_threads):
+        threading.Thread(target=hog_the_gil, name=f'busy-{i}', daemon=True).start()
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    results = asyncio.run(replay(hoodie, sample_rate, samples, responses, args.server_latency, args.tail))
+
+    report(args.wav or 'synthetic', results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# Regression suite for the caption pipeline: pushes a made-up session through SubtitleDisplay on simulated time and
+# times the bits that decide how far captions lag behind me. Headless, so it runs anywhere pygame does.
+#   python benchmarks/suite.py                   # print the numbers
+#   python benchmarks/suite.py --check           # and exit 1 if anything's worse than baselines.json allows
+#   python benchmarks/suite.py --save-baseline   # make this machine's numbers the new baseline
+# Baselines only mean something on the machine that made 'em. The checked-in one is from a dev box, so save your own
+# (on the Pi, ideally) before trusting --check.
+#
+# Cases:
+#   handle_transcript - a whole Deepgram response, from words to render() submitting a frame
+#   render            - just render(): wrapping, mapping lines to words, the expiration timer
+#   wrap              - wrap_as_much_text_as_possible() on a long backlog of tokens
+#   expire            - blowing the top line away: moving the discard cursor, compacting, re-rendering
+#   compact           - just compact_expired_words(), IE reconciling what's been discarded
+#   draw              - RetainedRenderer.draw() for every frame the session produced
+#   coincides_with    - TranscriptionWord.coincides_with(), per 1000 calls
+# For each: throughput, p50 and p99 latency, and the peak memory a single call allocates (from a second, traced pass,
+# so tracemalloc doesn't mess up the timing).
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame  # noqa: E402
+
+import main  # noqa: E402
+from alignment import align_transcript  # noqa: E402
+from bench_wrapping import load_font  # noqa: E402
+from synthetic import SimulatedClock, make_session, run_session  # noqa: E402
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# Metric -> whether bigger is better
+METRICS = {'ops_per_s': True, 'p50_us': False, 'p99_us': False, 'peak_kib': False}
+
+# How much worse than the baseline counts as a regression: a fraction of the baseline, plus a little slack so tiny
+# numbers don't flap. Timings are noisy, memory isn't.
+DEFAULT_THRESHOLDS = {
+    'time': {'fraction': 0.5, 'slack_us': 20},
+    'memory': {'fraction': 0.2, 'slack_kib': 4},
+}
+
+
+# Times (or, when tracing, measures the peak allocation of) every call to a method, without changing what it does
+class Probe:
+    def __init__(self, tracing):
+        self.tracing = tracing
+        self.samples = {}
+
+    def _measure(self, name, call):
+        samples = self.samples.setdefault(name, [])
+        if self.tracing:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = call()
+            _, peak = tracemalloc.get_traced_memory()
+            samples.append(peak - before)
+        else:
+            started = time.perf_counter()
+            result = call()
+            samples.append(time.perf_counter() - started)
+        return result
+
+    def wrap(self, owner, name, label=None):
+        original = getattr(owner, name)
+        label = label or name
+        if asyncio.iscoroutinefunction(original):
+            async def probed(*args, **kwargs):
+                samples = self.samples.setdefault(label, [])
+                if self.tracing:
+                    tracemalloc.reset_peak()
+                    before, _ = tracemalloc.get_traced_memory()
+                    result = await original(*args, **kwargs)
+                    _, peak = tracemalloc.get_traced_memory()
+                    samples.append(peak - before)
+                else:
+                    started = time.perf_counter()
+                    result = await original(*args, **kwargs)
+                    samples.append(time.perf_counter() - started)
+                return result
+        else:
+            def probed(*args, **kwargs):
+                return self._measure(label, lambda: original(*args, **kwargs))
+        setattr(owner, name, probed)
+
+
+def make_display(font, clock):
+    display = pygame.display.set_mode((480, 1280))
+    # No frame task runs here, so frames just pile up as pending - we draw them ourselves in the draw case
+    return main.SubtitleDisplay(display, font, clock=clock, render_thread=False)
+
+
+# Everything that happens in a live session, in one pass: handle_transcript, render, expire, compact, plus every frame
+def session_cases(font, config, probe):
+    clock = SimulatedClock()
+    subtitle_display = make_display(font, clock)
+    for name in ('handle_transcript', 'render', 'expire_top_line', 'compact_expired_words'):
+        probe.wrap(subtitle_display, name, {'expire_top_line': 'expire', 'compact_expired_words': 'compact'}.get(name))
+
+    frames = []
+    original_submit = subtitle_display.frames.submit
+
+    def submit(lines, words):
+        frames.append(list(lines))
+        original_submit(lines, words)
+
+    subtitle_display.frames.submit = submit
+    responses = make_session(config['minutes'] * 60, config['words_per_second'], config['interim_ratio'])
+    asyncio.run(run_session(subtitle_display, responses, clock))
+
+    # Now push every one of those frames through a fresh renderer, in order, the way the frame task would've
+    renderer = subtitle_display.renderer
+    renderer.invalidate()
+    probe.wrap(renderer, 'draw')
+    for lines in frames:
+        renderer.draw(lines)
+
+
+# Wrapping a screenful out of a long backlog - what render() does when I've been talking faster than lines expire
+def wrap_case(font, config, probe):
+    subtitle_display = make_display(font, SimulatedClock())
+    rng = random.Random(1)
+    tokens = []
+    for _, response in make_session(120, config['words_per_second'], 0, seed=1):
+        alternative = response['channel']['alternatives'][0]
+        words = [main.TranscriptionWord(word['word'], word['start'], word['end']) for word in alternative['words']]
+        tokens.extend(align_transcript(alternative['transcript'], words))
+    probe.wrap(subtitle_display, 'wrap_as_much_text_as_possible', 'wrap')
+    for _ in range(config['repeats']):
+        start = rng.randrange(len(tokens) // 2)
+        subtitle_display.wrap_as_much_text_as_possible(tokens[start:])
+
+
+def coincides_with_case(font, config, probe):
+    rng = random.Random(2)
+    words = [main.TranscriptionWord('word', t, t + rng.uniform(0.1, 0.5), rng.uniform(0, 60))
+             for t in (rng.uniform(0, 5) for _ in range(2000))]
+    pairs = [(rng.choice(words), rng.choice(words)) for _ in range(1000)]
+
+    def thousand_calls():
+        for a, b in pairs:
+            a.coincides_with(b)
+
+    for _ in range(config['repeats']):
+        probe._measure('coincides_with', thousand_calls)
+
+
+def summarize(timings, peaks):
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'ops_per_s': round(len(ordered) / total, 1) if total else None,
+        'p50_us': round(ordered[len(ordered) // 2] * 1e6, 1),
+        'p99_us': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6, 1),
+        'peak_kib': round(max(peaks) / 1024, 2) if peaks else 0.0,
+    }
+
+
+def run_suite(config):
+    pygame.init()
+    font = load_font(125)
+    cases = (session_cases, wrap_case, coincides_with_case)
+
+    timing = Probe(tracing=False)
+    for case in cases:
+        case(font, config, timing)
+
+    memory = Probe(tracing=True)
+    tracemalloc.start()
+    for case in cases:
+        case(font, config, memory)
+    tracemalloc.stop()
+
+    return {name: summarize(samples, memory.samples.get(name, [])) for name, samples in timing.samples.items()}
+
+
+# Returns a description of every metric that got worse than the thresholds allow
+def find_regressions(results, baseline):
+    thresholds = baseline.get('thresholds', DEFAULT_THRESHOLDS)
+    regressions = []
+    for case, old in baseline['cases'].items():
+        new = results.get(case)
+        if new is None:
+            regressions.append(f'{case}: missing')
+            continue
+        for metric, bigger_is_better in METRICS.items():
+            if old.get(metric) is None or new.get(metric) is None:
+                continue
+            if metric == 'peak_kib':
+                limit = old[metric] * (1 + thresholds['memory']['fraction']) + thresholds['memory']['slack_kib']
+                worse = new[metric] > limit
+            elif bigger_is_better:
+                limit = old[metric] / (1 + thresholds['time']['fraction'])
+                worse = new[metric] < limit
+            else:
+                limit = old[metric] * (1 + thresholds['time']['fraction']) + thresholds['time']['slack_us']
+                worse = new[metric] > limit
+            if worse:
+                regressions.append(f'{case} {metric}: {new[metric]} vs baseline {old[metric]} (limit {limit:.1f})')
+    return regressions
+
+
+def report(results, baseline):
+    print(f'  {"":18s} {"ops/s":>11s} {"p50 us":>10s} {"p99 us":>10s} {"peak KiB":>10s}   vs baseline')
+    for case, metrics in results.items():
+        old = (baseline or {}).get('cases', {}).get(case)
+        versus = ''
+        if old and old.get('p99_us'):
+            versus = f'p99 {metrics["p99_us"] / old["p99_us"] * 100:5.0f}%'
+        print(f'  {case:18s} {metrics["ops_per_s"] or 0:11.1f} {metrics["p50_us"]:10.1f} {metrics["p99_us"]:10.1f} '
+              f'{metrics["peak_kib"]:10.2f}   {versus}')
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=float, default=5, help='Length of the simulated session')
+    parser.add_argument('--words-per-second', type=float, default=2.5)
+    parser.add_argument('--interim-ratio', type=float, default=2.0, help='Interim results per final one')
+    parser.add_argument('--repeats', type=int, default=500, help='Calls for the wrap and coincides_with cases')
+    parser.add_argument('--baseline', default=BASELINES)
+    parser.add_argument('--check', action='store_true', help='Exit 1 if anything regressed past the thresholds')
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    config = {'minutes': args.minutes, 'words_per_second': args.words_per_second,
+              'interim_ratio': args.interim_ratio, 'repeats': args.repeats}
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = run_suite(config)
+    print(f'{args.minutes:g} minute session, {args.words_per_second:g} words/s, '
+          f'{args.interim_ratio:g} interims per final, on {platform.machine()} with Python {platform.python_version()}')
+    report(results, baseline)
+
+    if args.save_baseline:
+        thresholds = baseline.get('thresholds', DEFAULT_THRESHOLDS) if baseline else DEFAULT_THRESHOLDS
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': f'{platform.machine()} {platform.processor()}'.strip(),
+                       'python': platform.python_version(), 'config': config, 'thresholds': thresholds,
+                       'cases': results}, f, indent=2)
+            f.write('\n')
+        print(f'Saved as the baseline in {args.baseline}')
+
+    if args.check:
+        if baseline is None:
+            raise SystemExit(f'No baseline at {args.baseline} - run with --save-baseline first')
+        if baseline['config'] != config:
+            raise SystemExit(f'The baseline was made with {baseline["config"]}, not {config} - apples and oranges')
+        regressions = find_regressions(results, baseline)
+        if regressions:
+            print('REGRESSIONS:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print('No regressions')
+
+
+if __name__ == '__main__':
+    main_()
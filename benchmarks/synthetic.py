@@ -0,0 +1,125 @@
+# Synthetic Deepgram traffic and a simulated clock, so we can push a whole monologue through SubtitleDisplay
+# in a couple seconds without a mic, a network, or a live audience.
+import random
+import uuid
+
+from bench_wrapping import VOCABULARY
+
+
+# Looks enough like a Deepgram live response for SubtitleDisplay's purposes.
+# If the words come with punctuated_word, the transcript's made from those, like Deepgram's is.
+def make_response(words, request_id, is_final=True):
+    if words and 'punctuated_word' in words[0]:
+        transcript = ' '.join(word['punctuated_word'] for word in words)
+    else:
+        text = ' '.join(word['word'] for word in words)
+        transcript = text[:1].upper() + text[1:] + '.' if text else ''
+    return {
+        'channel': {'alternatives': [{'transcript': transcript, 'confidence': 0.99, 'words': words}]},
+        'metadata': {'request_id': request_id},
+        'is_final': is_final,
+        'start': 0.0,
+        'duration': words[-1]['end'] if words else 0.0,
+    }
+
+
+# A nonstop talker. Returns (arrival seconds, response) pairs in arrival order.
+# Each statement gets its own request ID, and its words are timed relative to the start of the statement.
+def make_monologue(minutes=10, words_per_minute=150, latency=0.3, seed=0):
+    rng = random.Random(seed)
+    seconds_per_word = 60 / words_per_minute
+    responses = []
+    now = 0.0
+    while now < minutes * 60:
+        words = []
+        offset = 0.0
+        for _ in range(rng.randint(4, 25)):
+            duration = seconds_per_word * rng.uniform(0.6, 0.9)
+            words.append({'word': rng.choice(VOCABULARY), 'start': round(offset, 3),
+                          'end': round(offset + duration, 3), 'confidence': 0.99})
+            offset += seconds_per_word
+        now += offset
+        responses.append((now + latency, make_response(words, str(uuid.UUID(int=rng.getrandbits(128))))))
+        now += rng.uniform(0.2, 1.0)  # Catch my breath
+    return responses
+
+
+# A talker that looks more like what Deepgram actually sends, for the stress suite. Returns (arrival seconds, response)
+# pairs in arrival order, like make_monologue().
+#   - words_per_second is how fast I talk, pauses aside
+#   - interim_ratio is how many interim results show up per final one, on average. Each is a growing chunk of the
+#     statement, with the word bounds jittered by up to jitter seconds, the way they wander around until they're final
+#   - Transcripts are punctuated and words carry diarization speaker labels
+def make_session(seconds=300, words_per_second=2.5, interim_ratio=2.0, latency=0.3, jitter=0.03, seed=0):
+    rng = random.Random(seed)
+    seconds_per_word = 1 / words_per_second
+    responses = []
+    now = 0.0
+    while now < seconds:
+        request_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        speaker = rng.randint(0, 1)
+        words = []
+        offset = 0.0
+        count = rng.randint(4, 25)
+        for i in range(count):
+            text = rng.choice(VOCABULARY)
+            punctuated = text.capitalize() if i == 0 else text
+            if i == count - 1:
+                punctuated += rng.choice('...?!')
+            elif rng.random() < 0.08:
+                punctuated += ','
+            duration = seconds_per_word * rng.uniform(0.6, 0.9)
+            words.append({'word': text, 'punctuated_word': punctuated, 'start': round(offset, 3),
+                          'end': round(offset + duration, 3), 'confidence': 0.99, 'speaker': speaker})
+            offset += seconds_per_word
+
+        interims = int(interim_ratio) + (rng.random() < interim_ratio % 1)
+        for k in range(1, interims + 1):
+            heard = words[:max(1, count * k // (interims + 1))]
+            jittered = []
+            for word in heard:
+                start = max(0.0, word['start'] + rng.uniform(-jitter, jitter))
+                end = max(start + 0.01, word['end'] + rng.uniform(-jitter, jitter))
+                jittered.append(dict(word, start=round(start, 3), end=round(end, 3)))
+            responses.append((now + heard[-1]['end'] + latency, make_response(jittered, request_id, is_final=False)))
+        now += offset
+        responses.append((now + latency, make_response(words, request_id)))
+        now += rng.uniform(0.2, 1.0)  # Catch my breath
+    responses.sort(key=lambda pair: pair[0])
+    return responses
+
+
+# A clock that only moves when we say so. Hand it to SubtitleDisplay(clock=...) and the display runs on simulated time.
+class SimulatedClock:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+
+    def __call__(self):
+        return self.seconds
+
+
+# Feed responses to the display in simulated time, expiring lines at their deadlines the way expiration_timing_loop
+# does. Time jumps straight to the next response or deadline, but never more than step at once.
+# Calls on_step(seconds) after every step if you want to sample something.
+async def run_session(subtitle_display, responses, clock, step=0.1, on_step=None):
+    pending = list(responses)
+    end = (pending[-1][0] if pending else 0) + 30  # Give the last lines time to scroll away
+    while clock.seconds < end:
+        while pending and pending[0][0] <= clock.seconds:
+            _, response = pending.pop(0)
+            alternative = response['channel']['alternatives'][0]
+            await subtitle_display.handle_transcript(alternative['transcript'], alternative['words'],
+                                                     response['metadata']['request_id'], response['is_final'])
+        deadline = subtitle_display.next_expiration_deadline()
+        if deadline is not None and deadline <= clock.seconds:
+            await subtitle_display.expire_top_line()
+            continue  # The next line might be due already too
+        if on_step is not None:
+            on_step(clock.seconds)
+
+        next_time = clock.seconds + step
+        if pending:
+            next_time = min(next_time, pending[0][0])
+        if deadline is not None:
+            next_time = min(next_time, deadline)
+        clock.seconds = max(next_time, clock.seconds + 1e-6)
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+from collections import deque
+
+from metering import UsageMeter
+
+log = logging.getLogger('hoodie.connection')
+
+
+# The SDK starts a couple of background tasks for every socket (_start and _receiver) and doesn't hang on to either.
+# _receiver can get stuck for good after finish() - it waits on a queue nobody ever marks done - so the only way to
+# find 'em again is to ask asyncio which tasks belong to that LiveTranscription. That's SDK 2.12 internals (see the
+# README for the pinned version), so anything that doesn't look like a task we can see into just gets skipped.
+def _tasks_for(live):
+    tasks = []
+    for task in asyncio.all_tasks():
+        frame = getattr(task.get_coro(), 'cr_frame', None)
+        f_locals = getattr(frame, 'f_locals', None)
+        if isinstance(f_locals, dict) and f_locals.get('self') is live and task is not asyncio.current_task():
+            tasks.append(task)
+    return tasks
+
+
+# Owns the Deepgram live websocket so the gating loop doesn't have to.
+#   - Keeps a rolling pre-roll of the audio we DIDN'T send, and flushes it into a fresh socket when speech starts.
+#     Otherwise the start of my first word is gone before the VAD even notices I'm talking.
+#   - Can speculatively open the next socket while I'm quiet, so the TLS/websocket handshake isn't in the way of the
+#     first caption. Spare sockets get KeepAlive messages so Deepgram doesn't hang up on 'em.
+#   - We never need a socket "just so we have one", so no more paying for a buffer of zeros at startup.
+#   - If there's an UplinkEncoder, audio goes through it on the way out, with a fresh stream for each socket.
+#   - Everything that goes out gets counted by a UsageMeter, since that's what we're billed for. Two things keep the
+#     bill down without making captions any slower:
+#       - Once I go quiet, only trailing_silence seconds of silence get sent straight away - plenty for Deepgram to
+#         finalize my last words. The rest of the VAD's hangover is held back, and only sent if I start talking again
+#         before we hang up, so Deepgram's timestamps still line up with the audio.
+#       - A connection that goes max_seconds_without_words without Deepgram hearing a single word gets hung up on, and
+#         stays hung up til it's quiet again. That's the VAD falling for a noisy room, not me talking.
+class LiveConnectionManager:
+    keep_alive_message = json.dumps({'type': 'KeepAlive'})
+
+    # connect is an async function that returns a fresh, handler-equipped LiveTranscription
+    def __init__(self, connect, sample_rate, preroll_seconds=0.5, prewarm=True, keep_alive_interval=5.0,
+                 sample_width=2, uplink=None, meter=None, trailing_silence=None, max_seconds_without_words=None,
+                 finish_timeout=5.0):
+        self.connect = connect
+        self.uplink = uplink
+        self.meter = meter if meter is not None else UsageMeter(sample_rate, sample_width)
+        # None for either of these turns it off
+        self.trailing_silence_limit = None if trailing_silence is None else \
+            int(trailing_silence * sample_rate) * sample_width  # In bytes
+        self.max_seconds_without_words = max_seconds_without_words
+        self.preroll_limit = int(preroll_seconds * sample_rate) * sample_width  # In bytes
+        self.prewarm = prewarm
+        self.keep_alive_interval = keep_alive_interval
+        self.finish_timeout = finish_timeout  # How long to wait for Deepgram's last transcripts when hanging up
+
+        self.live = None  # The socket that's getting audio right now, if any
+        self.spare = None  # Task that opens (or has opened) the next socket ahead of time
+        self.preroll = deque()
+        self.preroll_bytes = 0
+        self.keep_alive_task = None
+        self.trailing_silence_sent = 0  # Bytes of silence sent since I last said anything
+        self.held = []  # Silence past that, in case I start talking again
+        self.ignoring_noise = False  # Hung up for hearing no words. The hoodie clears it once it's quiet.
+
+        self.connections_opened = 0
+        self.spares_used = 0
+        self.keep_alives_sent = 0
+
+    @property
+    def is_open(self):
+        return self.live is not None and not self.live.done
+
+    # Kick off pre-warming and the keep-alive loop. Needs a running event loop.
+    def start(self):
+        if self.prewarm:
+            self.warm_up()
+            self.keep_alive_task = asyncio.create_task(self.keep_alive_loop())
+
+    # Hang on to audio we didn't send, in case it turns out to be the start of something
+    def remember(self, chunk):
+        self.preroll.append(bytes(chunk))  # Might be a view into the capture ring, which gets recycled
+        self.preroll_bytes += len(self.preroll[-1])
+        # Keep just enough whole chunks to cover the pre-roll time
+        while self.preroll and self.preroll_bytes - len(self.preroll[0]) >= self.preroll_limit:
+            self.preroll_bytes -= len(self.preroll.popleft())
+
+    def forget(self):
+        self.preroll.clear()
+        self.preroll_bytes = 0
+
+    # Start opening the next socket in the background, unless we're already on it
+    def warm_up(self):
+        if self.spare is None or (self.spare.done() and not self._spare_is_usable()):
+            self.spare = asyncio.create_task(self._open_socket())
+
+    def _spare_is_usable(self):
+        return self.spare is not None and self._task_succeeded(self.spare) and not self.spare.result().done
+
+    async def _open_socket(self):
+        live = await self.connect()
+        self.connections_opened += 1
+        return live
+
+    # Get a socket ready for audio - the pre-warmed one if it's alive, a brand new one otherwise - and send it
+    # the pre-roll. Does nothing if we're already connected.
+    async def open(self):
+        if self.is_open:
+            return
+
+        live = None
+        if self.spare is not None:
+            spare, self.spare = self.spare, None
+            try:
+                # If it's still handshaking, waiting for it beats starting from scratch
+                live = await spare
+            except Exception as e:
+                log.warning('Pre-warmed socket didn\'t make it: %s', e)
+            if live is not None and live.done:
+                await self._hang_up(live)
+                live = None  # Deepgram hung up on it while we weren't looking
+            elif live is not None:
+                self.spares_used += 1
+
+        if live is None:
+            live = await self._open_socket()
+
+        if self.live is not None:
+            await self._hang_up(self.live)
+            self.meter.closed('Deepgram hung up')  # The old one died on its own, without us calling finish()
+        self.live = live
+        self.meter.opened()
+        self.trailing_silence_sent = 0
+        if self.uplink is not None:
+            self.uplink.reset()  # Compressed streams start with a header, so every socket gets its own stream
+        preroll = list(self.preroll)
+        self.forget()
+        for chunk in preroll:
+            await self._send(chunk, speech=False)
+
+    async def _send(self, chunk, speech):
+        if self.uplink is None:
+            self.live.send(chunk)
+            encoded_bytes = len(chunk)
+        else:
+            encoded_bytes = 0
+            for packet in await self.uplink.encode(chunk):
+                self.live.send(packet)
+                encoded_bytes += len(packet)
+        self.meter.sent(len(chunk), encoded_bytes, speech)
+
+    # Forward audio, or keep it as pre-roll if there's nowhere to send it.
+    # speech is whether there might be any in this chunk. If not, it's a pause or the VAD's hangover, IE silence.
+    async def send(self, chunk, speech=True):
+        if not self.is_open:
+            self.remember(chunk)
+            return
+
+        if self.max_seconds_without_words is not None and \
+                self.meter.current.seconds_without_words(self.meter.clock()) >= self.max_seconds_without_words:
+            log.warning('Deepgram hasn\'t heard a word in %g s - hanging up til it\'s quiet',
+                        self.max_seconds_without_words)
+            await self.finish('no words')
+            self.ignoring_noise = True
+            self.remember(chunk)
+            return
+
+        if speech:
+            # Turns out it was a pause, not the end, so Deepgram needs to hear what we held back after all
+            held, self.held = self.held, []
+            for quiet_chunk in held:
+                await self._send(quiet_chunk, speech=False)
+            self.trailing_silence_sent = 0
+            await self._send(chunk, speech=True)
+        elif self.trailing_silence_limit is None or self.trailing_silence_sent < self.trailing_silence_limit:
+            self.trailing_silence_sent += len(chunk)
+            await self._send(chunk, speech=False)
+        else:
+            self.held.append(bytes(chunk))  # Might be a view into the capture ring, which gets recycled
+
+    # Hang up the current socket, waiting for the last transcripts, and get the next one warming up.
+    # The reason's just for the meter.
+    async def finish(self, reason='quiet'):
+        for chunk in self.held:
+            self.meter.trimmed(len(chunk))  # Nobody said anything after all, so nobody pays for it
+        self.held = []
+        if self.is_open:
+            if self.uplink is not None:
+                for packet in await self.uplink.drain():
+                    self.live.send(packet)
+                    self.meter.flushed(len(packet))
+        elif self.live is not None:
+            reason = 'Deepgram hung up'
+        if self.live is not None:
+            await self._hang_up(self.live)
+            self.meter.closed(reason)
+        self.live = None
+        if self.prewarm:
+            self.warm_up()
+
+    async def keep_alive_loop(self):
+        while True:
+            await asyncio.sleep(self.keep_alive_interval)
+            if self._spare_is_usable():
+                self.spare.result().send(self.keep_alive_message)
+                self.keep_alives_sent += 1
+            elif self.spare is not None and self.spare.done():
+                spare, self.spare = self.spare, None
+                if self._task_succeeded(spare):
+                    await self._hang_up(spare.result())
+                self.warm_up()  # The spare died, so make another
+
+    # Wait for Deepgram's last transcripts if it's still listening, then close the websocket and clean up after the SDK.
+    # Hanging up goes through the SDK's own finish(). The cleanup after it is best effort, since it pokes at internals.
+    async def _hang_up(self, live):
+        if not live.done:
+            try:
+                await asyncio.wait_for(live.finish(), self.finish_timeout)
+            except asyncio.TimeoutError:
+                log.warning('Deepgram didn\'t finish up within %g s. Hanging up anyways.', self.finish_timeout)
+        try:
+            tasks = _tasks_for(live)
+            for task in tasks:
+                task.cancel()
+            socket = getattr(live, '_socket', None)
+            if socket is not None:
+                await asyncio.wait_for(socket.close(), self.finish_timeout)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except Exception as e:
+            # Newer SDK, probably. Worst case its tasks hang around til shutdown.
+            log.warning('Couldn\'t clean up after the Deepgram SDK: %r', e)
+
+    # Hang up everything for good
+    async def close(self):
+        self.prewarm = False  # Otherwise finish() would start warming up another one
+        if self.keep_alive_task is not None:
+            self.keep_alive_task.cancel()
+            await asyncio.gather(self.keep_alive_task, return_exceptions=True)
+            self.keep_alive_task = None
+        await self.finish('shutdown')
+        if self.spare is not None:
+            spare, self.spare = self.spare, None
+            spare.cancel()  # Does nothing if it's already connected
+            await asyncio.gather(spare, return_exceptions=True)
+            if self._task_succeeded(spare):
+                await self._hang_up(spare.result())
+
+    @staticmethod
+    def _task_succeeded(task):
+        return task.done() and not task.cancelled() and task.exception() is None
+
+    def stats(self):
+        return {'connections_opened': self.connections_opened, 'spares_used': self.spares_used,
+                'keep_alives_sent': self.keep_alives_sent, 'preroll_bytes': self.preroll_bytes}
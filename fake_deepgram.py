@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# A local stand-in for Deepgram's live transcription websocket, for poking at the hoodie without paying for it.
+# Speaks just enough of the protocol for the SDK: takes binary audio, KeepAlive and CloseStream messages, sends back
+# whatever transcripts you script, then a final metadata object when the stream closes. It also keeps count of
+# what it was sent, so you can check what we would've been billed for.
+# Run it, then point SubtitleHoodie.DEEPGRAM_API_URL at http://127.0.0.1:8765
+# (newer SDKs insist the API key looks real, so use FAKE_API_KEY if yours is still the placeholder)
+#   python fake_deepgram.py --port 8765
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+FAKE_API_KEY = '0' * 40  # Looks enough like a Deepgram key to get past the SDK's sanity check
+
+
+# Everything one websocket connection did, as far as billing's concerned
+class ConnectionRecord:
+    def __init__(self, path):
+        query = parse_qs(urlparse(path).query)
+        self.options = {key: values[-1] for key, values in query.items()}
+        self.sample_rate = int(self.options.get('sample_rate', 16000))
+        self.encoding = self.options.get('encoding', 'linear16')
+        self.request_id = str(uuid.uuid4())
+        self.opened_at = time.monotonic()
+        self.closed_at = None
+        self.first_audio_at = None
+        self.last_audio_at = None
+        self.audio_bytes = 0
+        self.audio_messages = 0
+        self.keep_alives = 0
+        self.close_reason = None
+
+    @property
+    def audio_seconds(self):
+        # Mono, one or two bytes a sample. FLAC we'd have to decode to know, so it counts as linear16 - an underestimate
+        bytes_per_sample = 1 if self.encoding == 'mulaw' else 2
+        return self.audio_bytes / bytes_per_sample / self.sample_rate
+
+    @property
+    def duration(self):
+        return (self.closed_at or time.monotonic()) - self.opened_at
+
+
+class FakeDeepgramServer:
+    # script(record) is an optional async generator function. Whatever it yields gets sent as a response - see
+    # scripted_responses() for the usual way to build one. idle_timeout mimics Deepgram hanging up on quiet sockets.
+    def __init__(self, host='127.0.0.1', port=0, script=None, idle_timeout=10.0):
+        self.host = host
+        self.port = port
+        self.script = script
+        self.idle_timeout = idle_timeout
+        self.connections = []
+        self.server = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    async def start(self):
+        self.server = await websockets.serve(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # In case we asked for any free port
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, websocket, path=None):
+        if path is None:
+            # Newer websockets versions stopped passing the path separately, and the newest moved it again
+            path = getattr(websocket, 'path', None) or websocket.request.path
+        record = ConnectionRecord(path)
+        self.connections.append(record)
+
+        script_task = None
+        if self.script is not None:
+            script_task = asyncio.create_task(self._run_script(websocket, record))
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(websocket.recv(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    record.close_reason = 'idle timeout'
+                    break
+
+                if isinstance(message, bytes):
+                    if not len(message):
+                        record.close_reason = 'empty message'  # How older SDKs said they were done
+                        break
+                    record.last_audio_at = time.monotonic()
+                    if record.first_audio_at is None:
+                        record.first_audio_at = record.last_audio_at
+                    record.audio_bytes += len(message)
+                    record.audio_messages += 1
+                else:
+                    kind = json.loads(message).get('type')
+                    if kind == 'KeepAlive':
+                        record.keep_alives += 1
+                    elif kind == 'CloseStream':
+                        record.close_reason = 'CloseStream'
+                        break
+
+            if script_task is not None:
+                script_task.cancel()
+            # The SDK considers the stream finished once it gets this
+            await websocket.send(json.dumps({
+                'type': 'Metadata', 'request_id': record.request_id, 'sha256': '0' * 64,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'duration': record.audio_seconds, 'channels': 1,
+            }))
+            await websocket.close()
+        except websockets.exceptions.ConnectionClosed:
+            record.close_reason = record.close_reason or 'client went away'
+        finally:
+            record.closed_at = time.monotonic()
+            if script_task is not None:
+                script_task.cancel()
+
+    async def _run_script(self, websocket, record):
+        async for response in self.script(record):
+            # Like the real thing, every response on a connection carries its request ID
+            response = dict(response, metadata=dict(response.get('metadata', {}), request_id=record.request_id))
+            await websocket.send(json.dumps(response))
+
+    def stats(self):
+        return {
+            'connections': len(self.connections),
+            'audio_seconds': sum(record.audio_seconds for record in self.connections),
+            'keep_alives': sum(record.keep_alives for record in self.connections),
+            'connected_seconds': sum(record.duration for record in self.connections),
+        }
+
+
+# Build a script that sends each response once the connection has received at least that many seconds of audio.
+# responses is a list of (audio seconds, response dict) pairs, in order.
+def scripted_responses(responses, poll_interval=0.01):
+    async def script(record):
+        for audio_seconds, response in responses:
+            while record.audio_seconds < audio_seconds:
+                await asyncio.sleep(poll_interval)
+            yield response
+    return script
+
+
+async def serve_forever(host, port, idle_timeout):
+    server = await FakeDeepgramServer(host, port, idle_timeout=idle_timeout).start()
+    print(f'Pretending to be Deepgram at {server.url}')
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(server.stats())
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--idle-timeout', type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(serve_forever(args.host, args.port, args.idle_timeout))
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import Instruments
+
+log = logging.getLogger('hoodie.frames')
+
+
+# One screenful, frozen. The lines and the TranscriptionWords on each are tuples, and the words are immutable,
+# so the frame task can take its sweet time drawing it without holding anybody's lock.
+class Frame:
+    __slots__ = ('lines', 'words', 'submitted_at')
+
+    def __init__(self, lines, words, submitted_at):
+        self.lines = lines
+        self.words = words
+        self.submitted_at = submitted_at
+
+
+# Owns getting pixels onto my chest. Whoever changes what should be shown just submits a new Frame, which marks the
+# display dirty, and one task draws the newest frame at most max_fps times a second.
+#   - A burst of transcripts becomes one frame instead of a pile of back-to-back full draws (coalesced).
+#   - Font rasterization, rotation and blitting onto the display surface happen on a worker thread, so the audio loop
+#     isn't stuck behind 'em. Rasterizing text doesn't let go of the GIL, so when wrapping measures text with the
+#     same font on the event loop, the two threads' font calls take turns instead of trampling each other.
+#   - display.update() comes back to the event loop's thread, though. That's the thread that made the window, and
+#     it's the only one SDL promises display calls work from - on the Pi's KMS/DRM driver, others can fail or tear.
+#     The frame loop waits for the worker to finish painting before it updates, so they never overlap.
+#   - If drawing a frame blows up, it gets logged and skipped. The next frame gets its own shot, so one bad draw
+#     doesn't freeze my chest while captions keep piling up.
+class FrameScheduler:
+    def __init__(self, renderer, max_fps=30, worker_thread=True, instruments=None):
+        self.renderer = renderer
+        self.frame_interval = 1 / max_fps
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frames') if worker_thread else None
+        self.instruments = instruments if instruments is not None else Instruments(enabled=False)
+
+        self.pending = None  # Newest Frame nobody's drawn yet
+        self.shown = None  # Last Frame that made it to the display
+        self.dirty = None  # asyncio.Event, made once there's a running loop
+        self.next_frame_at = float('-inf')
+        self.task = None
+
+        self.submitted = 0
+        self.drawn = 0
+        self.coalesced = 0  # Frames replaced by a newer one before they got drawn
+        self.failed = 0  # Frames that blew up while drawing
+        self.slots_overrun = 0  # Frame slots we blew through because drawing took longer than frame_interval
+
+    # Needs a running event loop
+    def start(self):
+        self.dirty = asyncio.Event()
+        if self.pending is not None:
+            self.dirty.set()
+        self.task = asyncio.create_task(self.frame_loop())
+
+    def submit(self, lines, words):
+        if self.pending is not None:
+            self.coalesced += 1
+        self.pending = Frame(tuple(lines), words, time.monotonic())
+        self.submitted += 1
+        if self.dirty is not None:
+            self.dirty.set()
+
+    # Runs on the worker thread, if there is one. Returns the rects present_frame() needs to push.
+    def draw_frame(self, frame):
+        return self.renderer.compose(frame.lines)
+
+    # Always runs on the event loop's thread
+    def present_frame(self, dirty_rects):
+        self.renderer.present(dirty_rects)
+
+    async def frame_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.dirty.wait()
+            wait = self.next_frame_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)  # Anything submitted meanwhile just replaces the pending frame
+
+            self.dirty.clear()
+            frame, self.pending = self.pending, None
+            started = time.monotonic()
+            try:
+                if self.executor is not None:
+                    dirty_rects = await loop.run_in_executor(self.executor, self.draw_frame, frame)
+                else:
+                    dirty_rects = self.draw_frame(frame)
+                self.present_frame(dirty_rects)
+            except Exception:
+                log.exception('Could not draw a frame, skipping it')
+                self.failed += 1
+                self.renderer.invalidate()  # Who knows how much of it made it to the screen. Next one starts over.
+                self.next_frame_at = time.monotonic() + self.frame_interval
+                continue
+            finished = time.monotonic()
+
+            self.shown = frame
+            self.drawn += 1
+            self.slots_overrun += int((finished - started) / self.frame_interval)
+            self.next_frame_at = started + self.frame_interval
+            self.instruments.record('frame', finished - started)
+            self.instruments.record('submit_to_pixels', finished - frame.submitted_at)
+
+    def stats(self):
+        return {'submitted': self.submitted, 'drawn': self.drawn, 'coalesced': self.coalesced, 'failed': self.failed,
+                'slots_overrun': self.slots_overrun}
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import math
+import resource
+import time
+
+import numpy as np
+
+log = logging.getLogger('hoodie.idle')
+
+ACTIVE = 'active'
+IDLE = 'idle'
+
+
+# The VAD's idea of how loud speech is, in dB relative to full scale, so the wake detector can use the same bar
+def speech_threshold_db(vad):
+    if getattr(vad, 'noise_db', None) is not None:
+        return max(vad.noise_db + vad.margin_db, vad.minimum_db)
+    if hasattr(vad, 'noise_floor'):
+        return 20 * math.log10(max(vad.noise_floor, 1) / 32768.0)
+    return -50.0
+
+
+# What listens while the hoodie naps. The full VAD looks at every sample of every 10ms block, tracks the noise floor
+# and counts zero crossings. This just checks the loudness of every stride-th sample in 20ms blocks, so it costs next
+# to nothing. It's allowed to be jumpy - waking up for a door slam only costs a few chunks of real VAD.
+class WakeDetector:
+    def __init__(self, sample_rate, threshold_db=-50.0, stride=4, block_time=0.02):
+        self.threshold_db = threshold_db
+        self.stride = stride
+        self.block_size = max(1, int(sample_rate * block_time) // stride)  # In samples we actually look at
+        self.loudest_db = float('-inf')  # Of the last chunk, for the curious
+
+    def process(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16)[::self.stride]
+        block_count = len(samples) // self.block_size
+        if not block_count:
+            return False
+        blocks = samples[:block_count * self.block_size].reshape(block_count, self.block_size).astype(np.float32)
+        loudest = float(np.square(blocks).mean(axis=1).max())
+        self.loudest_db = 10 * math.log10(loudest / (32768.0 ** 2) + 1e-12)
+        return self.loudest_db >= self.threshold_db
+
+
+# How much CPU and how many wakeups each power state costs, for the POWER_MEASUREMENT config.
+#   - CPU is user + system time for the whole process, every thread included, as a percentage of one core.
+#   - Wakeups are voluntary context switches, IE any thread in the process going to sleep and getting woken up later.
+#     That's what keeps the Pi's cores out of their low-power states.
+#   - Loop wakeups are the event loop coming back from select(), IE how often asyncio had anything to do.
+class PowerMeter:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.totals = {}  # state -> {'seconds', 'cpu_seconds', 'wakeups', 'loop_wakeups'}
+        self.state = None
+        self.entered = None  # Readings when we entered the current state
+        self.loop_wakeups = 0
+
+    # Counts every time the loop's selector returns. Pokes at asyncio's privates, so it's only for measuring.
+    def install(self, loop):
+        selector = getattr(loop, '_selector', None)
+        if selector is None:
+            log.warning('Can\'t count event loop wakeups on %s', type(loop).__name__)
+            return
+        original_select = selector.select
+
+        def select(timeout=None):
+            events = original_select(timeout)
+            self.loop_wakeups += 1
+            return events
+
+        selector.select = select
+
+    def read(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {'seconds': self.clock(), 'cpu_seconds': usage.ru_utime + usage.ru_stime, 'wakeups': usage.ru_nvcsw,
+                'loop_wakeups': self.loop_wakeups}
+
+    # Charge everything since the last switch to the old state
+    def switch(self, state):
+        now = self.read()
+        if self.state is not None:
+            totals = self.totals.setdefault(self.state, dict.fromkeys(now, 0.0))
+            for key, value in now.items():
+                totals[key] += value - self.entered[key]
+        self.state = state
+        self.entered = now
+
+    def stats(self):
+        totals = {state: dict(values) for state, values in self.totals.items()}
+        if self.state is not None:
+            # Include the state we're in so far
+            now = self.read()
+            current = totals.setdefault(self.state, dict.fromkeys(now, 0.0))
+            for key, value in now.items():
+                current[key] += value - self.entered[key]
+
+        stats = {}
+        for state, values in totals.items():
+            seconds = values['seconds']
+            stats[state] = {'seconds': round(seconds, 1)}
+            if seconds > 0:
+                stats[state].update(cpu_percent=round(values['cpu_seconds'] / seconds * 100, 2),
+                                    wakeups_per_s=round(values['wakeups'] / seconds, 1),
+                                    loop_wakeups_per_s=round(values['loop_wakeups'] / seconds, 1))
+        return stats
+
+
+# Decides when the hoodie naps and when it wakes up. Running on a power bank, there's no sense in running the full VAD
+# on 20 chunks a second while I'm sitting in silence for half an hour.
+#   - ACTIVE: normal operation. Once nothing's happened for idle_after seconds - no speech, no socket open, nothing
+#     on my chest - it's time to doze.
+#   - IDLE: capture reads big chunks a few times a second, and only the WakeDetector looks at 'em. The display loops
+#     are asleep anyways with nothing on screen, and the stall watcher gets paused.
+# Anything loud wakes it back up, and that same chunk goes through the real VAD, so the worst wake latency is one
+# idle chunk plus however long it takes to read it. It only decides and keeps score - SubtitleHoodie does the dozing.
+class PowerManager:
+    def __init__(self, idle_after=30.0, clock=time.monotonic, meter=None):
+        self.idle_after = idle_after  # None never dozes
+        self.clock = clock
+        self.meter = meter  # A PowerMeter, if we're measuring
+        self.state = ACTIVE
+        self.last_busy = clock()
+        self.changed_at = self.last_busy
+        self.naps = 0
+        self.wake_ups = 0
+        self.false_alarms = 0  # Woke up, then dozed off again without anybody saying anything
+        self.heard_speech_since_waking = True
+        self.detector = None
+        if meter is not None:
+            meter.switch(ACTIVE)
+
+    @property
+    def dozing(self):
+        return self.state == IDLE
+
+    # While active, call this for every chunk. busy is whether anything's going on. Returns True if it's time to doze.
+    def should_doze(self, busy, speech=False):
+        now = self.clock()
+        if speech:
+            self.heard_speech_since_waking = True
+        if busy:
+            self.last_busy = now
+            return False
+        return self.idle_after is not None and now - self.last_busy >= self.idle_after
+
+    def doze(self, detector):
+        self.detector = detector
+        if not self.heard_speech_since_waking:
+            self.false_alarms += 1
+        self._switch(IDLE)
+        self.naps += 1
+        log.info('Nothing going on for %g s, dozing off (wake up over %.1f dBFS)', self.idle_after,
+                 detector.threshold_db)
+
+    # While idle, call this for every chunk. Returns True if it's time to wake up.
+    def should_wake(self, chunk, busy=False):
+        return busy or self.detector.process(chunk)
+
+    def wake(self):
+        self._switch(ACTIVE)
+        self.wake_ups += 1
+        self.last_busy = self.clock()
+        self.heard_speech_since_waking = False
+        log.info('Waking up (heard %.1f dBFS)', self.detector.loudest_db)
+
+    def _switch(self, state):
+        self.state = state
+        self.changed_at = self.clock()
+        if self.meter is not None:
+            self.meter.switch(state)
+            log.info('Power so far: %s', self.meter.stats())
+
+    def stats(self):
+        stats = {'state': self.state, 'naps': self.naps, 'wake_ups': self.wake_ups, 'false_alarms': self.false_alarms}
+        if self.meter is not None:
+            stats['by_state'] = self.meter.stats()
+        return stats
+
+
+# Runs a command that turns the panel off or on, like ['vcgencmd', 'display_power', '0'] on a Pi.
+# Make it a task, so nobody waits on the panel.
+async def run_display_command(command):
+    try:
+        process = await asyncio.create_subprocess_exec(*command)
+        await process.wait()
+        if process.returncode:
+            log.warning('%s exited with %d', ' '.join(command), process.returncode)
+    except OSError as e:
+        log.warning('Could not run %s: %s', ' '.join(command), e)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+log = logging.getLogger('hoodie.stats')
+
+
+# The last few hundred timings of one stage, in seconds. Recording is just a deque append, so it's fine to do on the
+# hot path - the sorting only happens when somebody asks for a summary.
+class RollingHistogram:
+    def __init__(self, window=512):
+        self.samples = deque(maxlen=window)
+        self.count = 0  # Ever, not just in the window
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {'count': self.count}
+        ordered = sorted(self.samples)
+
+        def percentile(fraction):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+        return {'count': self.count, 'p50_ms': percentile(0.5), 'p90_ms': percentile(0.9),
+                'p99_ms': percentile(0.99), 'max_ms': round(ordered[-1] * 1000, 3)}
+
+
+# Where every stage of the hoodie reports how long it took, plus anything with a stats() worth keeping an eye on.
+# Stages, all timed with time.monotonic():
+#   capture_to_vad     - mic to the VAD's decision, IE how far behind live audio we are
+#   vad                - the VAD itself
+#   capture_to_send    - mic to the websocket
+#   transcript_queue   - Deepgram response arriving to the interpreter picking it up
+#   interpret          - turning a response into words, before rendering
+#   render             - all of render(), wrapping and drawing included
+#   wrap, blit, update - the pieces of drawing a frame; update is display.update()
+#   receipt_to_update  - Deepgram response arriving to render() working out the new screen
+#   frame              - drawing one frame, on the frame scheduler's worker thread
+#   submit_to_pixels   - render() submitting a frame to it being on my chest, waiting and coalescing included
+#   expiry_lateness    - how far past its deadline the top line actually scrolled away
+#   caption_lag        - how far behind me the captions were whenever lines scrolled (not a duration, but it's seconds)
+#   wake               - from the start of the chunk that woke a dozing hoodie up to it being fully awake
+#   loop_stall         - how late the event loop got around to a timer, IE how long something hogged it
+# When it's disabled, record() returns straight away, so the worst the hot path pays is a clock read.
+class Instruments:
+    def __init__(self, enabled=True, window=512):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.gauges = {}  # name -> function returning a dict of counters, queue depths and such
+        self.worst_loop_stall = 0.0
+        self.stall_watch_awake = None  # asyncio.Event, cleared while the hoodie's idle so the watcher stops waking it
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = RollingHistogram(self.window)
+        histogram.record(seconds)
+
+    # Include somebody's stats() in every summary
+    def watch(self, name, stats):
+        self.gauges[name] = stats
+
+    def summary(self):
+        summary = {'stages': {stage: histogram.summary() for stage, histogram in self.stages.items()},
+                   'worst_loop_stall_ms': round(self.worst_loop_stall * 1000, 3)}
+        for name, stats in self.gauges.items():
+            summary[name] = stats()
+        return summary
+
+    # Sleeps for interval over and over. Whenever it wakes up late, somebody was hogging the event loop - and the
+    # audio receiver along with it.
+    async def stall_watch_loop(self, interval):
+        while True:
+            await self.stall_watch_awake.wait()
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            stall = max(0.0, time.monotonic() - expected)
+            self.record('loop_stall', stall)
+            self.worst_loop_stall = max(self.worst_loop_stall, stall)
+
+    async def summary_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            log.info('Stats: %s', json.dumps(self.summary()))
+
+    # Poke it with `nc localhost <port>` and get a JSON summary back
+    async def serve(self, host='127.0.0.1', port=8766):
+        async def reply(reader, writer):
+            writer.write(json.dumps(self.summary(), indent=2).encode() + b'\n')
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(reply, host, port)
+        log.info('Stats socket listening on %s:%d', host, port)
+        return server
+
+    # Nothing to watch while the hoodie naps, and 20 wakeups a second is a lot of battery to spend not watching it
+    def pause_stall_watch(self):
+        if self.stall_watch_awake is not None:
+            self.stall_watch_awake.clear()
+
+    def resume_stall_watch(self):
+        if self.stall_watch_awake is not None:
+            self.stall_watch_awake.set()
+
+    # Kick off whichever of the periodic summary, the stats socket and the stall watcher are asked for.
+    # Needs a running event loop.
+    def start(self, summary_interval=None, port=None, stall_check_interval=None):
+        if not self.enabled:
+            return
+        if stall_check_interval:
+            self.stall_watch_awake = asyncio.Event()
+            self.stall_watch_awake.set()
+            asyncio.create_task(self.stall_watch_loop(stall_check_interval))
+        if summary_interval:
+            asyncio.create_task(self.summary_loop(summary_interval))
+        if port is not None:
+            asyncio.create_task(self.serve(port=port))
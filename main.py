@@ -1,30 +1,68 @@
 import asyncio
-import audioop
-import copy
-import datetime
+import importlib
+import itertools
+import json
+import logging
+import multiprocessing
 import os
-import re
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
 from string import punctuation
 
-import pyaudio
 import pygame
-from deepgram import Deepgram
-from deepgram.transcription import LiveTranscription
+
+from alignment import align_transcript, count_tokens_before, keep_unchanged_tokens
+from archive import TranscriptArchive
+from audio_capture import PA_INT16, RingBufferCapture, open_port_audio
+from connection import LiveConnectionManager
+from frames import FrameScheduler
+from idle import ACTIVE, IDLE, PowerManager, PowerMeter, WakeDetector, run_display_command, speech_threshold_db
+from instrumentation import Instruments
+from metering import UsageMeter
+from pacing import CaptionPacer
+from processes import AUDIBLE, SPEECH_STARTED, WORTH_SENDING, ProcessSupervisor, SharedChunkRing
+from queues import AudioQueue, TranscriptQueue
+from uplink import UplinkEncoder
+from vad import create_vad
+from renderer import RetainedRenderer
+from wrapping import LineWrapper
+
+# Everything that used to be a print(). Chatty per-transcript and per-frame stuff is DEBUG, so it costs nothing unless
+# you ask for it - print() under systemd with PYTHONUNBUFFERED is a blocking write, right in the middle of rendering.
+log = logging.getLogger('hoodie')
 
 
 # Data structure to help associate words with their timestamps.
 # We display Deepgram's transcription, but we need to track the individual words to make old lines scroll away.
 # Note that the words' text DOES NOT necessarily match the transcription - that has capitalization, punctuation, etc.
 class TranscriptionWord:
+    # A long monologue makes thousands of these, so skip the per-instance __dict__
+    __slots__ = ('text', 'start', 'end', 'time_offset', 'request_id')
+
     equality_tolerance = 0.01  # If two offset times are within this many seconds, they're equal enough for me
 
     def __init__(self, text, start, end, time_offset=0, request_id=0):
-        self.text = text
-        self.start = start  # Note that Deepgram's API returns times in seconds since the beginning of the snippet.
-        self.end = end
-        self.time_offset = time_offset  # We're stringing multiple snippets into one, so we need a global time offset.
-        self.request_id = request_id  # Used to confirm that Deepgram's API doesn't juggle multiple interim transcripts
+        # Words never change once Deepgram hands 'em over, so they're immutable.
+        # That way the display can hang on to them without copying anything.
+        object.__setattr__(self, 'text', text)
+        # Note that Deepgram's API returns times in seconds since the beginning of the snippet.
+        object.__setattr__(self, 'start', start)
+        object.__setattr__(self, 'end', end)
+        # We're stringing multiple snippets into one, so we need a global time offset.
+        object.__setattr__(self, 'time_offset', time_offset)
+        # Used to confirm that Deepgram's API doesn't juggle multiple interim transcripts
         # It would be an absolute nightmare to code for that, so I want to make sure it's a real possibility.
+        object.__setattr__(self, 'request_id', request_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'TranscriptionWord is immutable, make a new one instead of setting {name}')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'TranscriptionWord is immutable, you can\'t delete {name}')
+
+    def __repr__(self):
+        return f'TranscriptionWord({self.text!r}, {self.get_offset_start():.2f}-{self.get_offset_end():.2f}s)'
 
     # Number of seconds between the time this whole set of transcripts began, and the time this word began
     def get_offset_start(self):
@@ -53,24 +91,74 @@ class TranscriptionWord:
     def represents(self, stringerino):
         stripped = stringerino.strip(punctuation)
         if not len(stripped):
-            print(f'WARNING: String {stringerino} was all punctuation. Probably gonna cause problems')
+            log.warning('String %r was all punctuation. Probably gonna cause problems', stringerino)
         return self.text.casefold() == stripped.casefold()
 
     # Convenience method to cull words before a threshold - IE, the last time we blew a line off the display.
     def ended_before(self, offset):
         return self.end + self.time_offset < offset
 
+    # Checks whether Deepgram's latest take on a word (straight out of a response) is still this word.
+    # Same word, and the bounds only wobbled a bit - no need to make a new one.
+    def still_matches(self, response_word):
+        return self.text == response_word['word'] and \
+            self._roughly_equals(self.start, response_word['start']) and \
+            self._roughly_equals(self.end, response_word['end'])
+
+
+# How many words at the front of this list have already been blown off the display.
+# Words arrive in time order, so a binary search on their end times does the trick - no need to check every one.
+def count_expired_words(words, discarded_through):
+    threshold = discarded_through + TranscriptionWord.equality_tolerance  # Deepgram's jitter strikes again
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if words[mid].get_offset_end() <= threshold:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+# How many words at the front of the last interim result Deepgram hasn't changed its mind about.
+# It mostly tacks words onto the end, so that's usually all but the last one or two.
+def count_stable_words(words, response_words):
+    count = 0
+    for word, response_word in zip(words, response_words):
+        if not word.still_matches(response_word):
+            break
+        count += 1
+    return count
+
 
 class SubtitleDisplay:
-    word_discard_pile: list[TranscriptionWord]
     finalized_words: list[TranscriptionWord]
     interim_words: list[TranscriptionWord]
-    currently_displayed_words: list[list[TranscriptionWord]]
+    currently_displayed_words: tuple[tuple[TranscriptionWord, ...], ...]
 
-    def __init__(self, display, font):
+    # clock is anything that returns seconds and never goes backwards. Pass in a fake one to run on simulated time.
+    # Frames get drawn at most max_fps times a second, on a worker thread if render_thread is set.
+    # Finalized transcripts also go to the archive, if there is one. The pacer decides how fast lines scroll away.
+    def __init__(self, display, font, instruments=None, clock=time.monotonic, max_fps=30, render_thread=True,
+                 archive=None, pacer=None):
         self.display = display
         self.font = font
+        # Monotonic, so NTP yanking the wall clock around at boot can't make lines stick or vanish
+        self.clock = clock
         self.font_height = self.font.size("Tg")[1]
+        # Stage timings go here. Nobody's listening unless the hoodie hands us its own.
+        self.instruments = instruments if instruments is not None else Instruments(enabled=False)
+        # Only repaints lines that actually changed
+        self.renderer = RetainedRenderer(self.display, self.font, instruments=self.instruments)
+        # render() just works out what should be on screen - this draws it when it gets a chance, outside the lock
+        self.frames = FrameScheduler(self.renderer, max_fps=max_fps, worker_thread=render_thread,
+                                     instruments=self.instruments)
+        # Remembers glyph widths so we don't re-measure every frame
+        self.wrapper = LineWrapper(self.font, self.renderer.page_width)
+        # What I said, kept after it scrolls away. Writes happen in the background, in batches.
+        self.archive = archive
+        # Speeds up scrolling when the captions fall behind me
+        self.pacer = pacer if pacer is not None else CaptionPacer()
 
         self.done = False
 
@@ -82,30 +170,44 @@ class SubtitleDisplay:
         By carefully tracking the individual words as well as the transcripts, we can use timestamps to
         figure out which SOUNDS have been shown to the viewer, so we don't end up showing the same WORDS repeatedly.  
         '''
-        self.minimum_line_display_time = 0.75  # Minimum number of seconds that each word should display on the top line
-        self.timebase = None  # Datetime when first word of this caption set was displayed
-        self.request_time_offsets = {}  # Seconds since timebase when each batch of words started arriving
-        self.line_expiration_start_time = datetime.datetime.min  # Datetime when the previous top line expired
-        self.word_discard_pile = []  # These words have been shown already. Even if they change, it's too late.
-        self.finalized_transcript = ''  # Finalized transcripts will not change.
+        self.timebase = None  # clock() when the first request of this caption set started, give or take
+        self.request_time_offsets = {}  # Seconds since timebase when each request started
+        self.line_expiration_start_time = float('-inf')  # clock() when the previous top line expired
+        # Every sound up to this many seconds since timebase has been shown already. Even if it changes, it's too late.
+        # Only ever moves forward, so it's all we need to remember about the words we've scrolled away.
+        self.discarded_through = float('-inf')
+        # Transcripts get chopped into AlignedTokens the moment they arrive, each pointing at the word it spells,
+        # so rendering just strings together the tokens that fit on screen.
+        self.finalized_tokens = []      # Finalized transcripts will not change.
         self.finalized_words = []       # No matter what interim bullhonkey takes place, it can miss these.
-        self.interim_transcript = ''    # Interim transcripts change constantly. I clear these when they become final.
-        self.interim_words = []         # This collection is blown out every time new data arrives and recreated.
+        self.interim_tokens = []        # Interim transcripts change constantly. I clear these when they become final.
+        self.interim_words = []         # Replaced every time new data arrives, keeping the words that didn't change.
         self.current_request_id = -1    # We use this to offset the timestamps of interim data.
         '''
         We also need to track what's being SHOWN ON MY CHEST, too!
             - If the top line changes, we need to reset the timer to let the viewer catch up.
             - When the line display time elapses, we'll use this to figure out which words are FRICKIN DEAD.
         '''
-        self.currently_displayed_words = []  # Current TranscriptionWords being shown onscreen, one list per line.
+        # Current TranscriptionWords being shown onscreen, one tuple per line.
+        # It's immutable and gets replaced wholesale every render, so the old one doubles as a free snapshot.
+        self.currently_displayed_words = ()
+        # What render() wrapped last time, as (line, its tokens) pairs, so it can skip re-wrapping what didn't change
+        self.laid_out_lines = []
+        # The newest word on my chest, and whether there are newer ones waiting for room. That's how far behind we are.
+        self.newest_shown_word = None
+        self.words_waiting = False
 
         self.unprocessed_transcription_queue = None     # Depositing transcripts and interpreting them are separate ops.
+        self.transcript_queue_limit = 32                # Past this, stale interim results get tossed
         self.transcript_lock = asyncio.Lock()           # Don't mess with the data while we're using em!
+        self.expiration_rescheduled = None              # Pokes the expiration loop when the deadline moves
 
     def start_the_loops_brother(self):
         # DE LÖÖPS and the queue must be started in the same method so asyncio can align their chakras or something
 
-        self.unprocessed_transcription_queue = asyncio.Queue()
+        # Bounded, and newer interim results replace stale ones, so a slow render can't make us replay ancient history
+        self.unprocessed_transcription_queue = TranscriptQueue(self.transcript_queue_limit)
+        self.expiration_rescheduled = asyncio.Event()
 
         '''
         For responsiveness, both of the things that update my chest, the audio RX, and the Web poppycock
@@ -114,6 +216,9 @@ class SubtitleDisplay:
         '''
         asyncio.create_task(self.transcription_interpreter_loop())
         asyncio.create_task(self.expiration_timing_loop())
+        self.frames.start()
+        if self.archive is not None:
+            self.archive.start()
 
     # I'm not using this method
     def brother_the_loops_must_end(self):
@@ -124,25 +229,52 @@ class SubtitleDisplay:
     async def handle_transcript(self, transcript, response_words, request_id, is_final):
         # Lock out the expiration timer loop - we don't want to delete lines as we're editing them
         async with self.transcript_lock:
+            started = time.monotonic()
             # Track changes to the request ID to maintain global timestamp offsets.
             # This should only happen when an interim transcript becomes final, but Murphy's a bitch.
             if self.current_request_id != request_id:
-                print(f'Now receiving results from request {request_id}')
+                log.debug('Now receiving results from request %s', request_id)
                 self.current_request_id = request_id
+                # Only the current request's offset is ever looked up again, so don't let these pile up all day
+                self.request_time_offsets.clear()
+                # Deepgram sends a result right about when the last word in it ends, so that's about when this
+                # request started. Without interim results, the first we hear of a request is the whole statement,
+                # so going by when it showed up would make every word look a statement's worth too recent.
+                request_started = self.clock()
+                if len(response_words):
+                    request_started -= response_words[-1]['end']
                 if self.timebase is None:
                     # Record T0 - the wall-clock time when the first of this whole procession of transcripts began.
-                    self.timebase = datetime.datetime.now()
+                    self.timebase = request_started
                     self.request_time_offsets[request_id] = 0
                 else:
-                    # Time offsets are in seconds since T0
-                    self.request_time_offsets[request_id] = (datetime.datetime.now() - self.timebase).total_seconds()
-
-            words = [TranscriptionWord(i['word'],  # These should never brick - we already validated them
-                                       i['start'],
-                                       i['end'],
-                                       time_offset=self.request_time_offsets[request_id],
-                                       request_id=request_id)
-                     for i in response_words]
+                    # Time offsets are in seconds since T0. Guessing when a request started can make it look like it
+                    # started before the last one ended - and then the last one's lines scrolling away would take this
+                    # one's words with 'em. Don't let it.
+                    offset = request_started - self.timebase
+                    if len(response_words):
+                        latest = self.discarded_through
+                        if len(self.finalized_words):
+                            latest = max(latest, self.finalized_words[-1].get_offset_end())
+                        offset = max(offset,
+                                     latest + TranscriptionWord.equality_tolerance - response_words[0]['start'])
+                    self.request_time_offsets[request_id] = offset
+
+            # Deepgram keeps revising the interim result til it's final, mostly by tacking words onto the end.
+            # Whatever it didn't change its mind about stays the same objects, so nothing downstream sees a change.
+            stable_count = 0
+            if len(self.interim_words) and self.interim_words[0].request_id == request_id:
+                stable_count = count_stable_words(self.interim_words, response_words)
+            words = self.interim_words[:stable_count]
+            words.extend(TranscriptionWord(i['word'],  # These should never brick - we already validated them
+                                           i['start'],
+                                           i['end'],
+                                           time_offset=self.request_time_offsets[request_id],
+                                           request_id=request_id)
+                         for i in response_words[stable_count:])
+            tokens = align_transcript(transcript, words)
+            if stable_count:
+                keep_unchanged_tokens(self.interim_tokens, tokens)
 
             '''
             Final transcripts don't change. By tracking them separately, we don't need to compare every incoming word
@@ -151,19 +283,23 @@ class SubtitleDisplay:
             There should only be a single interim request going at a time, but Murphy's got my number.
             '''
             if is_final:
-                print('This transcript has been finalized.')
+                log.debug('This transcript has been finalized.')
                 # Append this to the ever-growing katamari of finalized transcripts.
-                # The linebreak makes more visual sense than smooshing distinct thoughts into one big paragraph.
-                self.finalized_transcript = self.finalized_transcript + '\r' + transcript
+                # Each statement starts on a new line, which makes more visual sense than one big paragraph.
+                self.finalized_tokens.extend(tokens)
                 self.finalized_words.extend(words)
+                if self.archive is not None:
+                    self.archive.record(transcript, response_words, request_id)
+                # If the interim version of these words already scrolled by, don't bring 'em back
+                self.compact_expired_words()
                 # When no interim transcript in the works, those data are obsolete.
                 del self.interim_words[:]
-                self.interim_transcript = ''
+                del self.interim_tokens[:]
                 self.current_request_id = -1
             else:
-                # Just overwrite the old interim stuff with the new.
+                # Just overwrite the old interim stuff with the new, reused bits and all.
                 # Changes come into play when we RENDER - remember that we still have currently_displayed_words
-                self.interim_transcript = transcript
+                self.interim_tokens = tokens
                 self.interim_words = words
 
             '''
@@ -177,14 +313,25 @@ class SubtitleDisplay:
             for word in self.interim_words:
                 assert word.request_id == self.current_request_id
 
+            self.instruments.record('interpret', time.monotonic() - started)
+
             # All that crap for this.
             await self.render()
 
     # At our leisure, we pull Deepgram API responses from their queue and chooch 'em up.
     # This should always INCREASE the amount of stuff to display, never remove stuff.
     async def transcription_interpreter_loop(self):
+        skipped = 0
+        queue = self.unprocessed_transcription_queue
         while not self.done:
-            response = await self.unprocessed_transcription_queue.get()
+            response = await queue.get()
+            received_at = queue.last_received_at
+            self.instruments.record('transcript_queue', time.monotonic() - received_at)
+
+            # Let me know whenever we skip stale interim results - that's caption lag we just saved
+            if queue.coalesced + queue.dropped != skipped:
+                skipped = queue.coalesced + queue.dropped
+                log.info('Skipped stale interim results: %s', queue.stats())
 
             try:
                 # I should probably move this back to the bit of the code that inserts it into the queue.
@@ -195,11 +342,18 @@ class SubtitleDisplay:
                 is_final = response['is_final']
 
                 await self.handle_transcript(transcript, words, request_id, is_final)
+                self.instruments.record('receipt_to_update', time.monotonic() - received_at)
             except KeyError:
                 # Status messages, metadata, confirmation, and who knows what else
-                print('Not a transcription')
+                log.debug('Not a transcription')
 
-        print('Transcription interpreter loop is dead')
+        log.info('Transcription interpreter loop is dead')
+
+    # Whether there's anything on my chest, or on its way there. The hoodie doesn't doze off til there isn't.
+    def has_something_to_show(self):
+        queue = self.unprocessed_transcription_queue
+        return bool(len(self.currently_displayed_words) or len(self.interim_words) or
+                    (queue is not None and queue.qsize()))
 
     '''
     It doesn't matter how fast I talk - the subtitles are meaningless unless the viewer has time to read 'em. 
@@ -210,212 +364,453 @@ class SubtitleDisplay:
     '''
     async def expiration_timing_loop(self):
         while not self.done:
-            # If there's nothing on muh chest, this loop should idle as non-blockingly as possible.
-            if len(self.currently_displayed_words):
-                # line_expiration_start_time doesn't necessarily represent the last time we cleared a line.
-                # If the top line changes or grows, we need to adjust it to give the viewer time to catch up.
-                seconds_since_last_clear = (datetime.datetime.now() - self.line_expiration_start_time).total_seconds()
-                if seconds_since_last_clear >= self.minimum_line_display_time:
-                    # We're maintaining our data - keep other loop from adding more til we're done.
-                    async with self.transcript_lock:
-                        print('Top line expired')
-                        self.line_expiration_start_time = datetime.datetime.now()
-
-                        # Transfer cleared words to a buffer so we know not to display them again
-                        self.word_discard_pile.extend(self.currently_displayed_words[0])
-
-                        # Show the carnage
-                        await self.render()
-
-                        if not len(self.currently_displayed_words):
-                            # This is the worst place to do this, except for the alternatives
-                            print('CLEARED THE BOARD!!! WOOOO')
-                            self.timebase = None
-                            self.request_time_offsets.clear()
-                            self.line_expiration_start_time = datetime.datetime.min
-                            del self.word_discard_pile[:]
-                            self.finalized_transcript = ''
-                            del self.finalized_words[:]
-                            self.interim_transcript = ''
-                            del self.interim_words[:]
-                            self.current_request_id = -1
-                            del self.currently_displayed_words[:]
-                            print('Wiped everything')
-
-            # Asyncio's sleep releases control instead of blocking
-            await asyncio.sleep(0.1)
+            self.expiration_rescheduled.clear()
+            deadline = self.next_expiration_deadline()
+            if deadline is None:
+                # Nothing on muh chest, so sleep til render() puts something there
+                await self.expiration_rescheduled.wait()
+                continue
+
+            remaining = deadline - self.clock()
+            if remaining > 0:
+                # Sleep right up to the deadline, unless render() moves it first
+                try:
+                    await asyncio.wait_for(self.expiration_rescheduled.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue  # Either way, check the deadline again - it might've moved, or we might've woken up early
+
+            self.instruments.record('expiry_lateness', -remaining)
+            await self.expire_top_line()
+
+        log.info('Expiration timing loop is dead')
+
+    # clock() time when the top line should scroll away, or None if there's nothing to scroll.
+    # line_expiration_start_time doesn't necessarily represent the last time we cleared a line.
+    # If the top line changes or grows, render() pushes it back to give the viewer time to catch up.
+    # The more we're lagging, the less time each line gets - see pacing.py. The lag keeps growing while words wait, so
+    # the deadline's worked out for wherever the lag will be by then, not where it is now.
+    def next_expiration_deadline(self):
+        if not len(self.currently_displayed_words):
+            return None
+        lag_zero = None
+        if self.words_waiting and self.newest_shown_word is not None and self.timebase is not None:
+            lag_zero = self.timebase + self.newest_shown_word.get_offset_end()
+        return self.pacer.deadline(self.line_expiration_start_time, lag_zero)
+
+    # How far behind me the captions are, in seconds: how long ago the newest word on my chest was said, if there's
+    # anything newer waiting for room. Nothing waiting means we're caught up, no matter how long ago I shut up.
+    def caption_lag(self):
+        if not self.words_waiting or self.newest_shown_word is None or self.timebase is None:
+            return 0.0
+        return max(0.0, self.clock() - self.timebase - self.newest_shown_word.get_offset_end())
+
+    # The expiration loop needs to know when render() moves the goalposts
+    def reset_expiration_timer(self):
+        self.line_expiration_start_time = self.clock()
+        if self.expiration_rescheduled is not None:
+            self.expiration_rescheduled.set()
+
+    # Blow the top line off the display and scroll everything up, wiping the slate when the display's empty.
+    # If we're falling behind, the pacer might say to blow off a few lines at once, or skip the stale stuff entirely.
+    async def expire_top_line(self):
+        # We're maintaining our data - keep other loop from adding more til we're done.
+        async with self.transcript_lock:
+            log.debug('Top line expired')
+            now = self.clock()
+            self.line_expiration_start_time = now
+            lag = self.caption_lag()
+            self.instruments.record('caption_lag', lag)
+
+            # Move the cursor past the cleared words so we know not to display them again
+            lines = min(self.pacer.lines_to_scroll(lag), len(self.currently_displayed_words))
+            for line in self.currently_displayed_words[:lines]:
+                if len(line):
+                    self.discarded_through = max(self.discarded_through, line[-1].get_offset_end())
+
+            skipped = 0.0
+            if self.pacer.should_skip(lag):
+                newest_words = self.interim_words if len(self.interim_words) else self.finalized_words
+                if len(newest_words):
+                    skip_through = newest_words[-1].get_offset_end() - self.pacer.skip_keeps
+                    skipped = max(0.0, skip_through - self.discarded_through)
+                    self.discarded_through = max(self.discarded_through, skip_through)
+                    log.warning('Captions are %.1f s behind me. Skipped %.1f s of them to catch up.', lag, skipped)
+            self.pacer.note(now, lag, lines, skipped)
+            self.compact_expired_words()
+
+            # Show the carnage
+            await self.render()
 
-        print('Expiration timing loop is dead')
+            # If I'm partway through a statement, its final result is still on the way. Wiping now would forget that
+            # the start of it already scrolled by, and it'd all come back.
+            if not len(self.currently_displayed_words) and not len(self.interim_words):
+                # This is the worst place to do this, except for the alternatives
+                log.debug('CLEARED THE BOARD!!! WOOOO')
+                self.timebase = None
+                self.request_time_offsets.clear()
+                self.line_expiration_start_time = float('-inf')
+                self.discarded_through = float('-inf')
+                del self.finalized_tokens[:]
+                del self.finalized_words[:]
+                del self.interim_tokens[:]
+                del self.interim_words[:]
+                self.current_request_id = -1
+                self.currently_displayed_words = ()
+                self.newest_shown_word = None
+                self.words_waiting = False
+                log.debug('Wiped everything')
+
+    # Finalized words never change, so once they've scrolled away we can throw them AND their tokens out for good.
+    # This keeps render() and memory from growing no matter how long I keep yapping.
+    def compact_expired_words(self):
+        expired_count = count_expired_words(self.finalized_words, self.discarded_through)
+        if expired_count:
+            del self.finalized_words[:expired_count]
+            # Cut the tokens wherever the words got cut, so the two can't disagree about what's left
+            first_kept_word = self.finalized_words[0] if self.finalized_words else None
+            del self.finalized_tokens[:count_tokens_before(self.finalized_tokens, first_kept_word)]
 
     # Take whatever we got and display it on my fat, hairy pecs.
+    # This only lays the text out and figures out which words are where. The pixels happen later, in the frame
+    # scheduler, from a snapshot of the result - so holding transcript_lock through this is cheap.
     async def render(self):
-        print('Rendering start')
+        started = time.monotonic()
+        log.debug('Rendering start')
 
         # For displaying, there's no difference between the final and interim transcripts.
-        # Combine 'em as if the interim was finalized.
-        combined_words = self.finalized_words + self.interim_words
-
-        if len(self.finalized_transcript):
-            # Carriage return between distinct statements makes more visual sense
-            if len(self.interim_transcript):
-                combined_transcript = self.finalized_transcript + '\r' + self.interim_transcript
+        # Treat 'em as one long run of tokens as if the interim was finalized, without gluing the lists together.
+        # Expired finalized tokens are already compacted away. If we've scrolled into the interim transcript,
+        # the discard cursor tells us how much of it we've shown - it gets rebuilt from scratch every time, after all.
+        first_interim_token = 0
+        if not len(self.finalized_words):
+            expired_count = count_expired_words(self.interim_words, self.discarded_through)
+            if expired_count:
+                kept_words = self.interim_words[expired_count:expired_count + 1]
+                first_kept_word = kept_words[0] if kept_words else None
+                first_interim_token = count_tokens_before(self.interim_tokens, first_kept_word)
+        interim_tokens = itertools.islice(self.interim_tokens, first_interim_token, None)
+        tokens = itertools.chain(self.finalized_tokens, interim_tokens)
+
+        # We're about to replace these when we update the display. Words are immutable and so are the line tuples,
+        # so hanging on to the old reference is as good as a copy.
+        previously_displayed_words = self.currently_displayed_words
+        previous_deadline = self.next_expiration_deadline()
+
+        # Lines in front of whatever changed wrap exactly the same way they did last time, so only wrap the rest
+        kept_lines, kept_tokens, tokens = self.reuse_unchanged_lines(tokens)
+        display_state, shown_tokens = self.wrap_as_much_text_as_possible(
+            tokens, self.renderer.max_lines - len(kept_lines), capitalize=not kept_lines)
+        display_state = kept_lines + display_state
+        shown_tokens = kept_tokens + shown_tokens
+
+        # Don't even build the dump unless somebody's gonna read it
+        if log.isEnabledFor(logging.DEBUG):
+            if len(display_state):
+                log.debug('Display is now:\n%s', '\n'.join(f'  {line}' for line in display_state))
             else:
-                combined_transcript = self.finalized_transcript
-        else:
-            combined_transcript = self.interim_transcript
-
-        # Remove whitespace and occasional double spaces
-        combined_transcript = combined_transcript.strip().replace('  ', ' ')
-
-        if len(combined_transcript):  # Remember that we also call render() to clear the screen when we're all done.
-            # Deepgram transcripts aren't always capitalized... but they shoooooould...
-            combined_transcript = combined_transcript[0].upper() + combined_transcript[1:]
-
-            # The TranscriptionWords got the timestamps, but we're displaying the formatted transcript.
-            # This method figures out which WORDS have expired, then slices 'em off the TRANSCRIPT.
-            for spent_word in self.word_discard_pile:
-                # This assumes words stay in order. I sure hope they do...
-                if spent_word.coincides_with(combined_words[0]) or combined_words[0].coincides_with(spent_word):
-                    # We've already given plenty of time to read this word by now. Do not render it.
-                    delete_up_to_here = combined_transcript.casefold().index(combined_words[0].text) \
-                                        + len(combined_words[0].text)  # Delete the end of the word too!
-                    # This can leave some cruft behind, so git it.
-                    combined_transcript = combined_transcript[delete_up_to_here:].lstrip(punctuation).lstrip()
-                    # Seems weird to maintain a temporary list, but we need this to reconstruct
-                    # the currently_displayed_words from the output of the blit() method.
-                    del combined_words[0]
-
-            # Capitalize letters that start statements and appear after punctuation
-            # I ripped this off StackOverflow. I can't regex my way out of a paragraph describing a paper bag.
-            combined_transcript = re.sub("([.?!\r])\s*([a-zA-Z])", lambda p: p.group(0).upper(), combined_transcript)
-        else:
-            combined_words = []
-
-        # We're about to overwrite these when we update the display, so we need to copy them by value.
-        previously_displayed_words = copy.deepcopy(self.currently_displayed_words)
-
-        self.display.fill((0, 0, 0))  # Black
-        display_state = self.blit_as_much_wrapped_text_as_possible(combined_transcript)
-
-        if len(display_state):
-            print(f"Display is now:")
-            for line in display_state:
-                print(f'  {line}')
-        else:
-            print('Display is now BLANK!')
-
-        pygame.display.update()
-
-        # Match display state output strings to TranscriptionWords to track what's being displayed onscreen
-        del self.currently_displayed_words[:]
-        pointerino = 0
-        for i, line in enumerate(display_state):
+                log.debug('Display is now BLANK!')
+
+        # Each line holds the next few tokens in order, and every token already knows its word
+        displayed_words = []
+        laid_out_lines = []
+        position = 0
+        for line in display_state:
+            line_tokens = shown_tokens[position:position + len(line.split())]
+            position += len(line_tokens)
+            laid_out_lines.append((line, line_tokens))
             if len(line):
-                self.currently_displayed_words.append([])
-            for token in line.split():
-                if combined_words[pointerino].represents(token):
-                    self.currently_displayed_words[i].append(combined_words[pointerino])
-                    pointerino += 1
-                else:
-                    # The transcript fell out of sync with the words! Shouldn't happen, but...
-                    raise RuntimeError(f'Zack is a bad programmer - word {combined_words[pointerino].text} '
-                                       f'does not represent transcript token {token}.')
+                displayed_words.append(tuple(token.word for token in line_tokens if token.word is not None))
+        self.currently_displayed_words = tuple(displayed_words)
+        self.laid_out_lines = laid_out_lines
+        shown_words = [words for words in self.currently_displayed_words if len(words)]
+        self.newest_shown_word = shown_words[-1][-1] if shown_words else None
+        self.words_waiting = any(token.word is not None for token in shown_tokens[position:])
+        # Mark the display dirty. If there's already a frame waiting, this one replaces it.
+        self.frames.submit(display_state, self.currently_displayed_words)
 
         # If the top line changed, we need to reset the expiration timer so folks catch up with my very important words
         if len(self.currently_displayed_words) and len(self.currently_displayed_words[0]):
             # If the top line now represents a longer stretch of time, we added a word!
+            # Unless its end just wobbled a hair later - interim jitter doesn't get to hold the line hostage.
             if not len(previously_displayed_words) or \
                     not len(previously_displayed_words[0]) or \
                     previously_displayed_words[0][-1].ended_before(
-                        self.currently_displayed_words[0][-1].get_offset_end()):
-                print('Put a new word on the top line! Reset that timer!')
-                self.line_expiration_start_time = datetime.datetime.now()
+                        self.currently_displayed_words[0][-1].get_offset_end() - TranscriptionWord.equality_tolerance):
+                log.debug('Put a new word on the top line! Reset that timer!')
+                self.reset_expiration_timer()
 
             # If the line was full and is still full, it still might have changed
             elif len(self.currently_displayed_words) and len(previously_displayed_words) and \
                     len(self.currently_displayed_words[0]) == len(previously_displayed_words[0]):
                 for x, y in zip(self.currently_displayed_words[0], previously_displayed_words[0]):
                     if x.text != y.text:
-                        print(f'Top line changed - {y} is now {x}. Reset that timer!')
-                        self.line_expiration_start_time = datetime.datetime.now()
+                        log.debug('Top line changed - %s is now %s. Reset that timer!', y, x)
+                        self.reset_expiration_timer()
+
+        # More words waiting for room than before means we're lagging, so the top line might have less time left than
+        # the expiration loop thinks. Wake it up to check.
+        deadline = self.next_expiration_deadline()
+        if previous_deadline is not None and deadline is not None and deadline < previous_deadline and \
+                self.expiration_rescheduled is not None:
+            self.expiration_rescheduled.set()
 
         # Jeez finally
-        print('Rendering done')
-
-    # Draw some text straight to the display, automatically wrapping words and doing the carriage return rhumba.
-    # Returns current state of screen as a list of strings. Each str is one displayed line of text.
-    # Adapted from https://www.pygame.org/wiki/TextWrap
-    def blit_as_much_wrapped_text_as_possible(self, text_to_render, aa=False, bkg=None):
-        output = []
-        text = copy.deepcopy(text_to_render)
-
-        color = (0xff, 0xff, 0xff)
-        textbox = pygame.Surface((1280, 480))
-        rect = pygame.Rect(0, 0, 1280, 480)
-        y = rect.top
-        line_spacing = -2
-
-        while text:
-            i = 1
-
-            # determine if the row of text will be outside our area
-            if y + self.font_height > rect.bottom:
+        self.instruments.record('render', time.monotonic() - started)
+        log.debug('Rendering done')
+
+    # How much of the last layout still holds. Greedy wrapping only looks at a line's own tokens and the first token
+    # of the next one, so if those are the very same objects as last time, the line comes out the same.
+    # Unchanged words and tokens get reused when an interim result comes in, so that's usually everything but the
+    # last line or two. The last line always gets wrapped again, since its break hinged on a token we didn't keep.
+    # Returns the lines that can stay, their tokens, and the rest of the tokens, still to be wrapped.
+    def reuse_unchanged_lines(self, tokens):
+        tokens = iter(tokens)
+        laid_out = self.laid_out_lines
+        wanted = sum(len(line_tokens) for _, line_tokens in laid_out[:-1]) + 1 if len(laid_out) > 1 else 0
+        pulled = list(itertools.islice(tokens, wanted))
+
+        same = 0
+        previous = itertools.chain.from_iterable(line_tokens for _, line_tokens in laid_out)
+        for new, old in zip(pulled, previous):
+            if new is not old:
                 break
+            same += 1
 
-            # determine maximum width of line
-            while self.font.size(text[:i])[0] < rect.width and i < len(text) and text[i] != '\r':
-                i += 1
-
-            # if we've wrapped the text, then adjust the wrap to the last word
-            if i < len(text):
-                # Pygame totally ignores control chars in font rendering
-                if text[i] == '\r':
-                    i += 1
-                else:
-                    i = text.rfind(" ", 0, i) + 1
-
-            # render the line and blit it to the surface
-            if bkg:
-                image = self.font.render(text[:i].replace('\r', ''), 1, color, bkg)
-                image.set_colorkey(bkg)
-            else:
-                image = self.font.render(text[:i].replace('\r', ''), aa, color)
-
-            textbox.blit(image, (rect.left, y))
-            output.append(text[:i])
-            y += self.font_height + line_spacing
-
-            # remove the text we just blitted
-            text = text[i:]
+        kept_lines = []
+        kept_count = 0
+        for index, (line, line_tokens) in enumerate(laid_out[:-1]):
+            # Lines with no tokens are the one-word-wider-than-the-screen disaster. Don't get clever.
+            if not line_tokens or not laid_out[index + 1][1] or kept_count + len(line_tokens) + 1 > same:
+                break
+            kept_lines.append(line)
+            kept_count += len(line_tokens)
+        return kept_lines, pulled[:kept_count], itertools.chain(pulled[kept_count:], tokens)
+
+    # Wrap tokens to the display, doing the carriage return rhumba, and keep as many lines as fit.
+    # Returns what the screen should show as a list of strings (each str is one displayed line of text),
+    # plus the tokens that went into them.
+    # Only strings together about a screenful of tokens - more if that didn't fill the screen - so this costs the same
+    # whether I've been talking for a minute or an hour.
+    # When picking up partway down the screen, pass in how many lines are left, and don't capitalize the first one.
+    # Line breaking is adapted from https://www.pygame.org/wiki/TextWrap
+    def wrap_as_much_text_as_possible(self, tokens, max_lines=None, capitalize=True):
+        started = time.monotonic()
+        if max_lines is None:
+            max_lines = self.renderer.max_lines
+        tokens = iter(tokens)
+        taken = []
+        pieces = []
+        batch = max_lines * 16  # Plenty of words for a screenful, usually
+        while True:
+            pulled = 0
+            for token in itertools.islice(tokens, batch):
+                if taken:
+                    # Carriage return between distinct statements makes more visual sense
+                    pieces.append('\r' if token.starts_statement else ' ')
+                pieces.append(token.text)
+                taken.append(token)
+                pulled += 1
+
+            text = ''.join(pieces)
+            if len(text) and capitalize:  # Remember that we also call render() to clear the screen when we're done.
+                # Whatever's on top gets a capital, even if it's mid-sentence after a scroll
+                text = text[0].upper() + text[1:]
+
+            output = []
+            consumed = 0
+            # The wrapper finds the line breaks from cached glyph widths instead of measuring every prefix
+            for line in self.wrapper.wrap(text):
+                # determine if the row of text will be outside our area
+                if len(output) >= max_lines:
+                    break
+                output.append(line)
+                consumed += len(line)
+
+            # Lines that end before the text does can't change, however much more text we tack on
+            if pulled < batch or (len(output) >= max_lines and consumed < len(text)):
+                break
+            batch *= 2
 
-        textbox = pygame.transform.rotate(textbox, 90)
-        self.display.blit(textbox, (0, 0))
-        return output
+        self.instruments.record('wrap', time.monotonic() - started)
+        return output, taken
 
 
 # THIS ONE'S GONNA MAKE ME A STAH
 class SubtitleHoodie:
     subtitle_display: SubtitleDisplay
 
-    def __init__(self):
+    # Pass in a font if you don't have the VCR one handy, like benchmarks/replay.py does.
+    # With open_display off, call open_display() yourself - that's how FAST_START gets a head start on the rest.
+    def __init__(self, subtitle_font=None, open_display=True):
         # Your Deepgram API Key
         self.DEEPGRAM_API_KEY = 'PUT YOUR API KEY HERE YOU JABRONI'
+        self.DEEPGRAM_API_URL = None  # Leave it None for the real thing, or point it at fake_deepgram.py
         self.FRAMES_PER_BUFFER = 8192  # We need to read audio samples seriously fast, or its tiny buffer overflows
         self.SAMPLE_RATE = 44100  # I want more samples for faster peak detection
-
-        # TODO: Noise floor is too crude to detect start-of-message, pick something sensitive
-        self.NOISE_FLOOR = 125  # Quietest block that could be speech - don't send anything quieter to Deepgram
-        self.QUIET_DEADLINE = 2  # If I'm quiet for this many seconds (using noise floor), stop forwarding audio
-
-        # TODO: Anything with this
+        # 'callback' lets PortAudio push audio into a ring buffer from its own thread. 'polling' is the old busy-wait.
+        self.CAPTURE_MODE = 'callback'
+        self.CALLBACK_FRAMES = 1024  # In callback mode, PortAudio hands us this much at a time
+        # In callback mode, we gate and send audio in chunks this big - 50ms, a whole number of the VAD's 10ms blocks.
+        # FRAMES_PER_BUFFER is nearly 200ms, which is 200ms of lag before Deepgram hears a thing.
+        self.CHUNK_FRAMES = 2205
+        self.RING_BUFFER_FRAMES = self.FRAMES_PER_BUFFER * 16  # About 3 seconds of slack before we start dropping audio
+        # In polling mode, chunks wait in a queue this deep. When it's full, 'drop-oldest' tosses the stalest chunk
+        # and 'block' stops reading til there's room. Callback mode's ring buffer always drops the oldest audio.
+        self.AUDIO_QUEUE_LIMIT = 16
+        self.AUDIO_BACKPRESSURE = 'drop-oldest'
+        self.audio_interface = open_port_audio  # Anything that returns something shaped like PyAudio, like a WAV player
+
+        # 'energy' adapts to the room and looks at 10ms blocks. 'rms' is the old whole-chunk noise floor gate.
+        self.VAD = 'energy'
+        self.NOISE_FLOOR = 125  # For the 'rms' gate - quietest chunk that could be speech
+        self.QUIET_DEADLINE = 2  # If I'm quiet for this many seconds, stop forwarding audio
+        self.PREROLL_SECONDS = 0.5  # How much audio from before the VAD noticed me talking gets sent along too
+        self.PREWARM_CONNECTION = True  # Open the next websocket while I'm quiet, so it's ready when I'm not
+        # Deepgram bills by the second of audio, so every second that goes out gets counted, in the stats as 'usage'.
+        # Once I stop talking, only TRAILING_SILENCE seconds of silence go out right away - enough for Deepgram to
+        # finalize my last words. The rest of QUIET_DEADLINE's worth only gets sent if I start talking again.
+        # Only chunks that are SILENCE_MARGIN_DB quieter than what the VAD calls speech count as silence, though.
+        # Anything louder might be me trailing off too quietly for the VAD to be sure, and that goes out regardless.
+        # A connection that goes MAX_SECONDS_WITHOUT_WORDS without a single word back is the VAD falling for a noisy
+        # room, so it hangs up til things quiet down. None turns either one off.
+        # USAGE_LOG gets a line for every connection, so `python metering.py` can add up the bill. None to not bother.
+        self.TRAILING_SILENCE = 0.5
+        self.SILENCE_MARGIN_DB = 6.0
+        self.MAX_SECONDS_WITHOUT_WORDS = 15
+        self.USAGE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'usage.jsonl')
+        self.usage = None  # UsageMeter, once there's a connection
+        self.loudness = None  # Cheap loudness check for what the VAD calls silence, once there's a VAD
+        # Deepgram's running guesses at what I'm saying, a word or two at a time, instead of waiting til I finish the
+        # whole thought. Only the part of each guess that changed gets rebuilt and re-wrapped.
+        self.INTERIM_RESULTS = True
+
+        # What actually goes over the phone hotspot. Speech recognition doesn't need 44.1kHz, so resample it down.
+        self.UPLINK_SAMPLE_RATE = 16000  # None sends audio at SAMPLE_RATE
+        # 'linear16' is what Deepgram's always heard. The others are opt-in, and nobody's checked their accuracy yet:
+        #   - 'mulaw' is half the bytes, but it's lossy 8 bit
+        #   - 'flac' is lossless, but needs soundfile and adds up to 256ms of lag
+        self.UPLINK_ENCODING = 'linear16'
+        self.SEND_CHUNK_SECONDS = 0.05  # Size of each websocket message, whatever size the capture chunks are
+        self.uplink = None  # UplinkEncoder, built from all that by create_connection()
+
+        # 'DEBUG' gets you the old play-by-play of every transcript and frame. It's slow, so only when debugging.
+        self.LOG_LEVEL = 'INFO'
+        self.INSTRUMENTATION = True  # Time every stage from mic to pixels
+        self.STATS_INTERVAL = 60  # Log a summary of those timings this often, in seconds. None to shut up about it.
+        self.STATS_PORT = None  # Or something like 8766, then `nc localhost 8766` for the same summary on demand
+        self.STALL_CHECK_INTERVAL = 0.05  # How often to check whether something's hogging the event loop, in seconds
+        self.instruments = None  # Built by open_display(), so it goes by whatever INSTRUMENTATION is by then
+
+        # How long each top line stays before scrolling away. It's MAX_LINE_DISPLAY_TIME while the captions keep up
+        # with me, shrinking to MIN_LINE_DISPLAY_TIME as they fall behind. Past BURST_LAG seconds behind, lines scroll
+        # a few at a time, and past SKIP_LAG, whatever's stale gets skipped. None turns either of those off.
+        self.MIN_LINE_DISPLAY_TIME = 0.35
+        self.MAX_LINE_DISPLAY_TIME = 0.75
+        self.BURST_LAG = 4.0
+        self.SKIP_LAG = 12.0
+
+        # Running off a power bank, there's no sense burning it while I'm quiet. After IDLE_AFTER seconds of nothing -
+        # no speech, no socket open, nothing on my chest - the hoodie dozes off:
+        #   - Capture hands over IDLE_CHUNK_SECONDS of audio at a time (or polls every IDLE_POLL_INTERVAL, in polling
+        #     mode), and a bare-bones loudness check looks at it instead of the VAD. That's also the worst wake latency.
+        #   - The stall watcher stops, and the display's loops are asleep anyways with nothing to show
+        #   - With IDLE_BLANK, the screen goes black, and DISPLAY_OFF_COMMAND runs if there is one - like
+        #     ['vcgencmd', 'display_power', '0'] to turn off the panel for real. DISPLAY_ON_COMMAND turns it back on.
+        # Anything WAKE_MARGIN_DB short of what the VAD calls speech wakes it up.
+        self.IDLE_AFTER = 30  # None to never doze
+        self.IDLE_CHUNK_SECONDS = 0.25
+        self.IDLE_POLL_INTERVAL = 0.09  # Half of FRAMES_PER_BUFFER, so its buffer still can't overflow
+        self.WAKE_MARGIN_DB = 3.0
+        self.IDLE_BLANK = True
+        self.DISPLAY_OFF_COMMAND = None
+        self.DISPLAY_ON_COMMAND = None
+        # Keep track of CPU use and wakeups per second while awake and dozing, in the stats as 'power'
+        self.POWER_MEASUREMENT = False
+        self.capture_poll_interval = 0.005  # How often get_a_chunk() checks for a full buffer, in polling mode
+        self.power = None  # PowerManager, once do_the_thing() gets going
+        self.display_blanked = False
+        self.blanking = None  # In MULTIPROCESS mode, waits for the captions to clear before blanking
+
+        # Captions don't need video frame rates. Bursts of transcripts get squished into one frame.
+        self.MAX_FPS = 30
+        # Rasterize and blit on a worker thread, so the audio loop doesn't wait on fonts. display.update() always
+        # happens back on the main thread, which made the window, since that's the only one SDL wants it from.
+        self.RENDER_THREAD = True
+
+        # Split capture+VAD, the Deepgram connection and the display into three processes, one core each.
+        # Audio gets from one to the other through a ring of this many chunks in shared memory.
+        self.MULTIPROCESS = False
+        self.SHARED_AUDIO_SLOTS = 64  # About 3 seconds of callback-mode chunks
+        self.PROCESS_REPORT_INTERVAL = 1.0  # How often the other processes send their stats home, in seconds
+        self.process_stats = {}  # The latest of those, by process name
+
+        # Every finalized transcript gets saved here, for `python archive.py` to search or turn into subtitles later.
+        # None to forget everything the moment it scrolls off.
+        self.ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+        self.ARCHIVE_FLUSH_INTERVAL = 10  # Seconds between writes, to go easy on the SD card
+
+        # After a crash, systemd restarts us, and nobody's captioned til we're up. With FAST_START on:
+        #   - PortAudio and the Deepgram SDK load on background threads while pygame sets up the display
+        #   - The mic's device index gets remembered in AUDIO_DEVICE_CACHE, and next time we just check it's still there
+        #   - READY_TEXT goes on my chest the moment there's a display, so I know it's alive
+        #   - The websocket starts warming up before the mic's even open
+        self.FAST_START = True
+        self.AUDIO_DEVICE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.audio_device.json')
+        self.READY_TEXT = 'READY'
+        self.warming_up_audio = None  # Future for (PyAudio, mic index) while FAST_START gets it ready
+        self.warming_up_sdk = None  # Future for the Deepgram SDK's import
+
+        # Set it and everything winds down. In MULTIPROCESS mode, SIGTERM or any process dying sets it too.
         self.done = False
 
+        self.archive = None
+        self.subtitle_display = None
+        if open_display:
+            self.open_display(subtitle_font)
+
+    # Everything between the script starting and do_the_thing(), the fast way if FAST_START says so
+    def get_ready(self, subtitle_font=None):
+        # I have no idea where I'm supposed to do this.
+        if self.FAST_START:
+            self.start_warming_up()
+            # pygame.init() wakes up every module it's got, the mixer included. We only need these two.
+            pygame.display.init()
+            pygame.font.init()
+        else:
+            pygame.init()
+        pygame.mouse.set_visible(False)
+        self.open_display(subtitle_font)
+
+    # Kick off the slow, blocking parts of starting up that don't need the display, so they happen while pygame
+    # does its thing. Call it before open_display().
+    def start_warming_up(self):
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='warm-up')
+        # The SDK drags in aiohttp, which is a big chunk of startup all by itself
+        self.warming_up_sdk = executor.submit(importlib.import_module, 'deepgram')
+        if not self.MULTIPROCESS:
+            # PortAudio doesn't survive being forked, so in MULTIPROCESS mode the capture process does this itself
+            self.warming_up_audio = executor.submit(self.open_audio_interface)
+        executor.shutdown(wait=False)
+
+    def open_display(self, subtitle_font=None):
+        lcd = pygame.display.set_mode((480, 1280), pygame.FULLSCREEN)
         # Download retro flavor at https://www.dafont.com/vcr-osd-mono.font
         # The font's licensing is unclear, so I'm not including it here.
-        project_root = os.path.dirname(os.path.abspath(__file__))
-        subtitle_font = pygame.font.Font(os.path.join(project_root, 'res/VCR_OSD_MONO_1.001.ttf'), 125)
-        lcd = pygame.display.set_mode((480, 1280), pygame.FULLSCREEN)
-        self.subtitle_display = SubtitleDisplay(lcd, subtitle_font)
+        if subtitle_font is None:
+            project_root = os.path.dirname(os.path.abspath(__file__))
+            subtitle_font = pygame.font.Font(os.path.join(project_root, 'res/VCR_OSD_MONO_1.001.ttf'), 125)
+        self.instruments = Instruments(enabled=self.INSTRUMENTATION)
+        if self.ARCHIVE_DIR is not None:
+            self.archive = TranscriptArchive(self.ARCHIVE_DIR, flush_interval=self.ARCHIVE_FLUSH_INTERVAL)
+        pacer = CaptionPacer(self.MIN_LINE_DISPLAY_TIME, self.MAX_LINE_DISPLAY_TIME, burst_lag=self.BURST_LAG,
+                             skip_lag=self.SKIP_LAG)
+        self.subtitle_display = SubtitleDisplay(lcd, subtitle_font, instruments=self.instruments,
+                                                max_fps=self.MAX_FPS, render_thread=self.RENDER_THREAD,
+                                                archive=self.archive, pacer=pacer)
+        if self.FAST_START and self.READY_TEXT:
+            # Nothing else is drawing yet, so go straight to the renderer. The first caption paints right over it.
+            self.subtitle_display.renderer.draw([self.READY_TEXT])
 
     # Simple callback that dumps the response straight in the transcription queue.
     # A loop will collect and handle it automatically.
@@ -426,128 +821,506 @@ class SubtitleHoodie:
     async def get_a_chunk(self, stream, queue):
         # Things tend to freeze if we try to read audio before there's a full buffer's worth.
         while stream.get_read_available() < self.FRAMES_PER_BUFFER:
-            await asyncio.sleep(0.005)
+            await asyncio.sleep(self.capture_poll_interval)
 
         # No time to interpret the audio. Dump it into a queue to deal with later, so we can immediately listen for more
-        queue.put_nowait((datetime.datetime.now(), stream.read(self.FRAMES_PER_BUFFER)))
+        # If the queue's full, this either drops the oldest chunk or waits, depending on AUDIO_BACKPRESSURE
+        await queue.put((time.monotonic(), stream.read(self.FRAMES_PER_BUFFER)))
 
     # Keeping that buffer dry is so important it gets its own dedicated loop
     async def audio_receiver(self, stream, queue):
         stream.start_stream()
-        print('Stream opened')
+        log.info('Stream opened')
 
         while not self.done:
             await self.get_a_chunk(stream, queue)
 
-    # God method so overburdened and all-encompassing it can cause functional programmers to projectile-diarrhea
-    async def do_the_thing(self):
-        last_loud_enough_timestamp = None
-
-        def has_been_quiet_for_too_long(last_noisy_chunk_timestamp):
-            return last_noisy_chunk_timestamp is None or (
-                    datetime.datetime.now() - last_noisy_chunk_timestamp).total_seconds() >= self.QUIET_DEADLINE
+    # Fire up PortAudio and find our IQaudio Codec Zero sound board. Returns (PyAudio, the board's device index).
+    # Blocks for a while, so FAST_START runs it on a thread.
+    def open_audio_interface(self):
+        p = self.audio_interface()
 
-        p = pyaudio.PyAudio()
-
-        # Find our IQaudio Codec Zero sound board. It automatically switches between onboard and plug-in mics.
+        # Did we find it last time? Then just make sure it's still there instead of interrogating every device.
+        if self.FAST_START and self.AUDIO_DEVICE_CACHE is not None:
+            try:
+                with open(self.AUDIO_DEVICE_CACHE) as f:
+                    cached = json.load(f)
+                if p.get_device_info_by_index(cached['index'])['name'] == cached['name']:
+                    log.info('Mic input index: %d (cached)', cached['index'])
+                    return p, cached['index']
+            except (OSError, ValueError, KeyError, TypeError):
+                pass  # No cache, junk in the cache, or the device moved. Do it the slow way.
+
+        # It automatically switches between onboard and plug-in mics.
         iqaudio_product_index = -1
-        print('Audio interfaces:')
+        log.info('Audio interfaces:')
         for i in range(p.get_device_count()):
             interface_name = p.get_device_info_by_index(i)["name"]
-            print(f'  {i}: {interface_name}')
+            log.info('  %d: %s', i, interface_name)
             if 'iqaudiocodec' in interface_name.casefold():
                 iqaudio_product_index = i
+                iqaudio_product_name = interface_name
 
         if iqaudio_product_index == -1:
             raise RuntimeError('IQAudio product (Codec Zero) not found!')
 
-        print(f'Mic input index: {iqaudio_product_index}')
+        log.info('Mic input index: %d', iqaudio_product_index)
+        if self.FAST_START and self.AUDIO_DEVICE_CACHE is not None:
+            try:
+                with open(self.AUDIO_DEVICE_CACHE, 'w') as f:
+                    json.dump({'index': iqaudio_product_index, 'name': iqaudio_product_name}, f)
+            except OSError as e:
+                log.warning('Could not remember the mic: %s', e)
+        return p, iqaudio_product_index
+
+    # Start listening to the Codec Zero - whatever start_warming_up() got ready, or from scratch.
+    # Returns the stream, an async function that gets the next (timestamp, chunk), and whichever of the capture ring
+    # or audio queue is keeping track of the audio we've lost.
+    async def open_microphone(self):
+        if self.warming_up_audio is not None:
+            warming_up, self.warming_up_audio = self.warming_up_audio, None
+            p, iqaudio_product_index = await asyncio.wrap_future(warming_up)
+        else:
+            p, iqaudio_product_index = self.open_audio_interface()
+
+        if self.CAPTURE_MODE == 'callback':
+            # PortAudio calls us with small blocks whenever it has 'em, and we only wake up for full chunks
+            capture = RingBufferCapture(asyncio.get_running_loop(), self.SAMPLE_RATE,
+                                        wake_frames=self.CHUNK_FRAMES, capacity_frames=self.RING_BUFFER_FRAMES)
+            s = p.open(input_device_index=iqaudio_product_index,
+                       format=PA_INT16, rate=self.SAMPLE_RATE, channels=1,
+                       input=True, output=False,
+                       frames_per_buffer=self.CALLBACK_FRAMES,
+                       stream_callback=capture.callback)
+            s.start_stream()
+            log.info('Stream opened')
+            return s, capture.get_chunk, capture
 
         s = p.open(input_device_index=iqaudio_product_index,
-                   format=pyaudio.paInt16, rate=self.SAMPLE_RATE, channels=1,
+                   format=PA_INT16, rate=self.SAMPLE_RATE, channels=1,
                    input=True, output=False,
                    frames_per_buffer=self.FRAMES_PER_BUFFER, )
 
-        q: asyncio.Queue[tuple[datetime.datetime, bytearray]] = asyncio.Queue()
+        q = AudioQueue(self.AUDIO_QUEUE_LIMIT, self.AUDIO_BACKPRESSURE)
 
         asyncio.create_task(self.audio_receiver(s, q))
+        return s, q.get, q
 
-        # IT'S HAPPENING
-        self.subtitle_display.start_the_loops_brother()
+    # Gripe whenever we lose audio. Returns the new total so we only gripe about it once.
+    @staticmethod
+    def complain_about_overruns(audio_source, reported_overruns):
+        if isinstance(audio_source, RingBufferCapture):
+            overruns = audio_source.overruns + audio_source.input_overflows
+        else:
+            overruns = audio_source.dropped
+        if overruns != reported_overruns:
+            log.warning('Audio is falling behind! %s', audio_source.stats())
+        return overruns
+
+    # Run a chunk past the VAD. Returns whether it's worth sending, whether it had speech in it, and whether it's
+    # audible - speech, or loud enough that it might be, so it shouldn't get trimmed as silence.
+    def gate(self, vad, timestamp, incoming):
+        vad_started = time.monotonic()
+        worth_sending = vad.process(incoming)
+        speech = vad.speech_in_last_chunk
+        audible = speech
+        if worth_sending and not speech and self.TRAILING_SILENCE is not None:
+            # Same bar as waking up from a doze, just further below the VAD's
+            if self.loudness is None:
+                self.loudness = WakeDetector(self.SAMPLE_RATE)
+            self.loudness.threshold_db = speech_threshold_db(vad) - self.SILENCE_MARGIN_DB
+            audible = self.loudness.process(incoming)
+        decided = time.monotonic()
+        self.instruments.record('vad', decided - vad_started)
+        self.instruments.record('capture_to_vad', decided - timestamp)
+        return worth_sending, speech, audible
+
+    # If start_warming_up() is still importing the SDK, wait for it without blocking the event loop
+    async def wait_for_the_sdk(self):
+        if self.warming_up_sdk is not None:
+            warming_up, self.warming_up_sdk = self.warming_up_sdk, None
+            await asyncio.wrap_future(warming_up)
+
+    # OH MY GOD IT'S HAPPENING
+    def create_connection(self):
+        # Imported here, not up top, so it stays out of the way of the display coming up. Free if it's warmed up.
+        from deepgram import Deepgram
+
+        if self.DEEPGRAM_API_URL is None:
+            deepgram = Deepgram(self.DEEPGRAM_API_KEY)
+        else:
+            deepgram = Deepgram({'api_key': self.DEEPGRAM_API_KEY, 'api_url': self.DEEPGRAM_API_URL})
+
+        # Built now, not in __init__(), so it goes by whatever the uplink config is by the time we connect
+        self.uplink = UplinkEncoder(self.SAMPLE_RATE, self.UPLINK_SAMPLE_RATE, self.UPLINK_ENCODING,
+                                    send_chunk_seconds=self.SEND_CHUNK_SECONDS)
+        # No more paying for a buffer of zeros just so we always have a socket - the manager deals with not having one
+        self.usage = UsageMeter(self.SAMPLE_RATE, log_path=self.USAGE_LOG)
+        connection = LiveConnectionManager(lambda: self.create_live_transcription_websocket(deepgram),
+                                           self.SAMPLE_RATE, preroll_seconds=self.PREROLL_SECONDS,
+                                           prewarm=self.PREWARM_CONNECTION, uplink=self.uplink, meter=self.usage,
+                                           trailing_silence=self.TRAILING_SILENCE,
+                                           max_seconds_without_words=self.MAX_SECONDS_WITHOUT_WORDS)
+        connection.start()
+        return connection
+
+    # Do whatever the VAD said to do with a chunk: open a socket, send it, hang up, or keep it as pre-roll
+    async def forward_audio(self, connection, timestamp, incoming, worth_sending, speech_started, audible=True):
+        if not audible:
+            connection.ignoring_noise = False  # Whatever racket made Deepgram hear nothing is over
+
+        if speech_started and not connection.is_open and not connection.ignoring_noise:
+            # Callback mode hands us a view into the ring buffer that gets recycled, and we might be a while
+            # setting up a socket, so hang on to our own copy
+            incoming = bytes(incoming)
+            # We can't reuse an instance - we need another one. The pre-roll goes in first.
+            log.info('We got some action! Opening a live transcription websocket')
+            await connection.open()
+            log.info('Opened')
+
+        # Kill the connection after a few seconds of silence to conserve API credit
+        if not worth_sending:
+            if connection.is_open:
+                log.info('Quiet for too long. Killing live transcription websocket')
+                await connection.finish()
+                log.info('Done')
+            connection.remember(incoming)  # Might be the run-up to something worth hearing
+        else:
+            # Off to the uplink encoder and out the door. Silence might get held back - see TRAILING_SILENCE.
+            await connection.send(incoming, speech=audible)
+            self.instruments.record('capture_to_send', time.monotonic() - timestamp)
+
+    def start_power_management(self):
+        meter = None
+        if self.POWER_MEASUREMENT:
+            meter = PowerMeter()
+            meter.install(asyncio.get_running_loop())
+        self.power = PowerManager(self.IDLE_AFTER, meter=meter)
+        self.instruments.watch('power', self.power.stats)
+
+    # Big chunks, or lazy polling, while dozing. Normal chunks otherwise.
+    def set_capture_pace(self, audio_source, idle):
+        if isinstance(audio_source, RingBufferCapture):
+            audio_source.set_chunk_frames(int(self.IDLE_CHUNK_SECONDS * self.SAMPLE_RATE) if idle
+                                          else self.CHUNK_FRAMES)
+        else:
+            self.capture_poll_interval = self.IDLE_POLL_INTERVAL if idle else 0.005
+
+    # Nothing's going on, so stop burning battery til something is. See IDLE_AFTER.
+    # In MULTIPROCESS mode the display's in the parent, so the capture process mails it about blanking instead.
+    def doze(self, vad, audio_source, mailbox=None):
+        self.power.doze(WakeDetector(self.SAMPLE_RATE, speech_threshold_db(vad) - self.WAKE_MARGIN_DB))
+        self.set_capture_pace(audio_source, idle=True)
+        self.instruments.pause_stall_watch()
+        if mailbox is not None:
+            mailbox.send(('power', IDLE))
+        else:
+            self.blank_display()  # Nothing's on my chest or we wouldn't be here, but READY_TEXT might be
+
+    # Back to full operation. The chunk that woke us up still needs to go through the VAD.
+    def wake_up(self, audio_source, timestamp, incoming, mailbox=None):
+        self.power.wake()
+        self.set_capture_pace(audio_source, idle=False)
+        self.instruments.resume_stall_watch()
+        if mailbox is not None:
+            mailbox.send(('power', ACTIVE))
+        else:
+            self.unblank_display()
+        # From the start of the chunk that woke us up, IE the longest anybody could've been talking to a dozing hoodie
+        self.instruments.record('wake', time.monotonic() - timestamp + len(incoming) / 2 / self.SAMPLE_RATE)
+
+    # See IDLE_BLANK
+    def blank_display(self):
+        if not self.IDLE_BLANK or self.display_blanked:
+            return
+        self.display_blanked = True
+        self.subtitle_display.frames.submit([], ())
+        if self.DISPLAY_OFF_COMMAND:
+            asyncio.create_task(run_display_command(self.DISPLAY_OFF_COMMAND))
+
+    def unblank_display(self):
+        if not self.display_blanked:
+            return
+        self.display_blanked = False
+        if self.DISPLAY_ON_COMMAND:
+            asyncio.create_task(run_display_command(self.DISPLAY_ON_COMMAND))
+
+    # The capture process only knows it's quiet, not what's on my chest - the connection process might've just mailed
+    # over a final. So the display process lets the captions run out before it blanks.
+    async def blank_when_clear(self):
+        while self.subtitle_display.has_something_to_show():
+            await asyncio.sleep(0.5)
+        self.blank_display()
+
+    # Mail from the capture process: it dozed off or woke up
+    def follow_capture_power(self, state):
+        if self.blanking is not None:
+            self.blanking.cancel()
+            self.blanking = None
+        if state == IDLE:
+            if not self.done:
+                self.blanking = asyncio.create_task(self.blank_when_clear())
+        else:
+            self.unblank_display()
 
-        # OH MY GOD IT'S HAPPENING
-        deepgram = Deepgram(self.DEEPGRAM_API_KEY)
+    # God method so overburdened and all-encompassing it can cause functional programmers to projectile-diarrhea
+    async def do_the_thing(self):
+        if self.MULTIPROCESS:
+            return await self.do_the_thing_on_every_core()
+
+        # Decides what's worth sending to Deepgram. It also rides out QUIET_DEADLINE, counting audio, not wall time.
+        vad = create_vad(self.VAD, self.SAMPLE_RATE, noise_floor=self.NOISE_FLOOR, quiet_deadline=self.QUIET_DEADLINE)
 
-        deepgram_live: LiveTranscription = await self.create_live_transcription_websocket(deepgram)
-        print('Created initial live websocket')
+        # IT'S HAPPENING
+        self.subtitle_display.start_the_loops_brother()
 
-        # If we kill the socket without sending anything, weird things happen.
-        # But, we need to go in with a socket or we'll need to check 'is None' in a million places.
-        # So here's the worst kind of workaround - one that costs money.
-        print('sending bogus data')
-        deepgram_live.send(bytearray([0] * self.FRAMES_PER_BUFFER))
-        print('sent')
+        # Get the websocket warming up first - the handshake can happen while PortAudio's still waking up
+        await self.wait_for_the_sdk()
+        connection = self.create_connection()
+
+        s, next_chunk, audio_source = await self.open_microphone()
+        reported_overruns = 0
+        instruments = self.instruments
+        instruments.watch('audio', audio_source.stats)
+        instruments.watch('transcripts', self.subtitle_display.unprocessed_transcription_queue.stats)
+        instruments.watch('connection', connection.stats)
+        instruments.watch('usage', self.usage.stats)
+        instruments.watch('renderer', self.subtitle_display.renderer.stats)
+        instruments.watch('frames', self.subtitle_display.frames.stats)
+        instruments.watch('pacing', self.subtitle_display.pacer.stats)
+        if self.archive is not None:
+            instruments.watch('archive', self.archive.stats)
+        self.start_power_management()
+        instruments.start(self.STATS_INTERVAL, self.STATS_PORT, self.STALL_CHECK_INTERVAL)
 
         # I'M GONNA... I'M GONNA... SUUUUUUBTITLE
         while not self.done:
-            timestamp, incoming = await asyncio.wait_for(q.get(), None)
-
-            rms = audioop.rms(incoming, 2)  # The 2 is the number of bytes in one sample of our 16-bit int wav
-
-            if rms >= self.NOISE_FLOOR:
-                last_loud_enough_timestamp = timestamp
-                if deepgram_live.done:  # We can't reuse an instance - we need to create another one
-                    print('We got some action! Creating a fresh live transcription websocket')
-                    deepgram_live = await self.create_live_transcription_websocket(deepgram)
-                    print('Created')
-
-            # Kill the connection after a few seconds of silence to conserve API credit
-            if has_been_quiet_for_too_long(last_loud_enough_timestamp):
-                if not deepgram_live.done:
-                    print('Quiet for too long. Killing live transcription websocket')
-                    await deepgram_live.finish()
-                    print('Done')
-            else:
-                deepgram_live.send(incoming)
+            timestamp, incoming = await next_chunk()
+            reported_overruns = self.complain_about_overruns(audio_source, reported_overruns)
+            showing = self.subtitle_display.has_something_to_show()
+            if self.power.dozing:
+                if not self.power.should_wake(incoming, busy=showing):
+                    connection.remember(incoming)  # Still might be the run-up to something worth hearing
+                    continue
+                self.wake_up(audio_source, timestamp, incoming)
+
+            worth_sending, speech_started, audible = self.gate(vad, timestamp, incoming)
+            await self.forward_audio(connection, timestamp, incoming, worth_sending, speech_started, audible)
+            if self.power.should_doze(worth_sending or connection.is_open or showing, speech_started):
+                self.doze(vad, audio_source)
 
         s.stop_stream()  # Cleanly exit
         s.close()
 
-        # Indicate that we've finished sending data by sending a zero-byte message to the Deepgram streaming endpoint,
+        # Indicate that we've finished sending data to the Deepgram streaming endpoint,
         # and wait until we get back the final summary metadata object
-        await deepgram_live.finish()
+        await connection.close()
+        await self.close_the_archive()
+
+    '''
+    The Pi's got four cores and everything above runs on one of 'em, fighting over one GIL. 
+    With MULTIPROCESS on, the work gets split three ways:
+        - The capture process reads the mic and runs the VAD, then drops every chunk and what the VAD thought of it 
+          into a shared memory ring.
+        - The connection process reads the ring and does the Deepgram thing. Responses come back over a pipe.
+        - This process is the supervisor AND the display. It owns pygame, so nobody else ever touches SDL.
+    Each child also mails its stats summary home every PROCESS_REPORT_INTERVAL, so the stats socket covers everybody.
+    '''
+    async def do_the_thing_on_every_core(self):
+        # Forking in the middle of somebody's import would leave the kids waiting on the import lock forever
+        await self.wait_for_the_sdk()
+
+        # Fork, so the kids get this whole object without pickling a font. Linux-only, which the Pi is.
+        context = multiprocessing.get_context('fork')
+        chunk_frames = self.CHUNK_FRAMES if self.CAPTURE_MODE == 'callback' else self.FRAMES_PER_BUFFER
+        ring = SharedChunkRing(context, self.SHARED_AUDIO_SLOTS, chunk_frames * 2)
+        supervisor = ProcessSupervisor(context)
+
+        # Fork before the display starts its loops and worker thread, so the kids don't get copies
+        mailboxes = {}
+        for name, role in (('capture', self.capture_process), ('connection', self.connection_process)):
+            mailbox, sender = context.Pipe(duplex=False)
+            supervisor.spawn(name, role, ring, sender)
+            sender.close()  # Otherwise we'd never hear the pipe close when the kid dies
+            mailboxes[name] = mailbox
+
+        # IT'S HAPPENING
+        self.subtitle_display.start_the_loops_brother()
+
+        loop = asyncio.get_running_loop()
+        instruments = self.instruments
+        for name, mailbox in mailboxes.items():
+            loop.add_reader(mailbox.fileno(), self.check_the_mail, name, mailbox)
+            instruments.watch(name, lambda name=name: self.process_stats.get(name, {}))
+        instruments.watch('shared_audio', ring.stats)
+        instruments.watch('transcripts', self.subtitle_display.unprocessed_transcription_queue.stats)
+        instruments.watch('renderer', self.subtitle_display.renderer.stats)
+        instruments.watch('frames', self.subtitle_display.frames.stats)
+        instruments.watch('pacing', self.subtitle_display.pacer.stats)
+        if self.archive is not None:
+            instruments.watch('archive', self.archive.stats)
+        instruments.start(self.STATS_INTERVAL, self.STATS_PORT, self.STALL_CHECK_INTERVAL)
+
+        # systemd stops the service with SIGTERM. Treat it like done, so everybody gets to hang up properly.
+        loop.add_signal_handler(signal.SIGTERM, self.brother_the_processes_must_end)
+
+        await supervisor.watch(lambda: self.done)
+        self.done = True
+        await supervisor.shutdown()
+        loop.remove_signal_handler(signal.SIGTERM)
+
+        # Last call for transcripts and stats the kids sent on their way out
+        for name, mailbox in mailboxes.items():
+            loop.remove_reader(mailbox.fileno())
+            self.check_the_mail(name, mailbox)
+            mailbox.close()
+        ring.close()
+        await self.close_the_archive()
+
+    # Save whatever's still waiting to be written. The display's interpreter loop might still be chewing on the last
+    # transcripts, so give it a moment to catch up first.
+    async def close_the_archive(self):
+        if self.archive is None:
+            return
+        queue = self.subtitle_display.unprocessed_transcription_queue
+        for _ in range(20):
+            if not queue.qsize():
+                break
+            await asyncio.sleep(0.05)
+        await self.archive.close()
+
+    def brother_the_processes_must_end(self):
+        log.info('Shutting down')
+        self.done = True
+
+    # Mail from the kids: ('transcript', Deepgram response), ('power', IDLE or ACTIVE) or ('stats', Instruments summary)
+    def check_the_mail(self, name, mailbox):
+        try:
+            while mailbox.poll():
+                kind, payload = mailbox.recv()
+                if kind == 'transcript':
+                    self.handle_response(payload)
+                elif kind == 'power':
+                    self.follow_capture_power(payload)
+                else:
+                    self.process_stats[name] = payload
+        except (EOFError, OSError):
+            # The kid's gone. The supervisor's already on it.
+            asyncio.get_running_loop().remove_reader(mailbox.fileno())
+
+    # Child processes keep running til their parent says stop, or the stop Event gets set some other way
+    async def stop_when_told(self, stop, wake=None):
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        self.done = True
+        if wake is not None:
+            wake()
+
+    async def mail_stats_home(self, mailbox):
+        while not self.done:
+            mailbox.send(('stats', self.instruments.summary()))
+            await asyncio.sleep(self.PROCESS_REPORT_INTERVAL)
+
+    # The capture process: mic in, VAD, shared ring out. Nothing else runs here, so nothing makes it miss audio.
+    async def capture_process(self, stop, ring, mailbox):
+        asyncio.create_task(self.stop_when_told(stop))
+        vad = create_vad(self.VAD, self.SAMPLE_RATE, noise_floor=self.NOISE_FLOOR, quiet_deadline=self.QUIET_DEADLINE)
+
+        s, next_chunk, audio_source = await self.open_microphone()
+        reported_overruns = 0
+        self.instruments.watch('audio', audio_source.stats)
+        self.start_power_management()
+        self.instruments.start(stall_check_interval=self.STALL_CHECK_INTERVAL)
+        asyncio.create_task(self.mail_stats_home(mailbox))
+
+        # Whether it's dozing is this process's business. The display's in the parent, so it gets told by mail.
+        while not self.done:
+            timestamp, incoming = await next_chunk()
+            reported_overruns = self.complain_about_overruns(audio_source, reported_overruns)
+            if self.power.dozing:
+                if not self.power.should_wake(incoming):
+                    self.put_in_ring(ring, timestamp, 0, incoming)  # Pre-roll, for the connection process
+                    continue
+                self.wake_up(audio_source, timestamp, incoming, mailbox=mailbox)
+
+            worth_sending, speech_started, audible = self.gate(vad, timestamp, incoming)
+            flags = (WORTH_SENDING if worth_sending else 0) | (SPEECH_STARTED if speech_started else 0) | \
+                (AUDIBLE if audible else 0)
+            self.put_in_ring(ring, timestamp, flags, incoming)
+            if self.power.should_doze(worth_sending, speech_started):
+                self.doze(vad, audio_source, mailbox=mailbox)
+
+        s.stop_stream()  # Cleanly exit
+        s.close()
+        mailbox.send(('stats', self.instruments.summary()))
+
+    # Dozing chunks are bigger than the ring's slots, so they go in a slot at a time, each with its own timestamp
+    def put_in_ring(self, ring, timestamp, flags, incoming):
+        for start in range(0, len(incoming), ring.slot_bytes):
+            piece = incoming[start:start + ring.slot_bytes]
+            piece_timestamp = timestamp - (len(incoming) - start - len(piece)) / 2 / self.SAMPLE_RATE
+            if not ring.put(piece_timestamp, flags, piece):
+                log.warning('Connection process is falling behind! %s', ring.stats())
+
+    # The connection process: shared ring in, Deepgram, transcripts out the mailbox
+    async def connection_process(self, stop, ring, mailbox):
+        asyncio.create_task(self.stop_when_told(stop, wake=ring.ring))
+        # Responses go home instead of into a display that doesn't exist in this process
+        self.handle_response = lambda response: mailbox.send(('transcript', response))
+
+        connection = self.create_connection()
+        self.instruments.watch('connection', connection.stats)
+        self.instruments.watch('usage', self.usage.stats)
+        self.instruments.start(stall_check_interval=self.STALL_CHECK_INTERVAL)
+        asyncio.create_task(self.mail_stats_home(mailbox))
+
+        while not self.done:
+            chunk = await ring.get()
+            if chunk is None:
+                continue  # Woken up to check whether we're done
+            timestamp, flags, incoming = chunk
+            await self.forward_audio(connection, timestamp, incoming,
+                                     bool(flags & WORTH_SENDING), bool(flags & SPEECH_STARTED), bool(flags & AUDIBLE))
+
+        await connection.close()
+        mailbox.send(('stats', self.instruments.summary()))
 
     # We can't reuse an instance of the Deepgram SDK websocket thingy - if we hang up, we need to generate a fresh one.
     # Note that this has absolutely no relationship to Request IDs - those are split by pauses between statements.
     async def create_live_transcription_websocket(self, deepgram):
         # Create a websocket connection to Deepgram
-        # In this example, punctuation is turned on, interim results are turned off, and language is set to UK English.
+        # Punctuation is on, interim results are whatever INTERIM_RESULTS says, and language is set to US English.
+        from deepgram.transcription import LiveTranscription
+
         try:
-            deepgram_live = await deepgram.transcription.live(
+            deepgram_live: LiveTranscription = await deepgram.transcription.live(
                 {
                     'language': 'en-US',  # Change to en-UK or something if you're one of THOSE people
-                    'encoding': 'linear16', 'sample_rate': self.SAMPLE_RATE,  # Corresponds to PyAudio config
+                    **self.uplink.deepgram_options,  # Encoding and sample rate, to match what the uplink sends
                     'punctuate': True,          # I'm such a chad my speech has punctuation
-                    'interim_results': False,    # Return ANYTHING as soon as possible, for responsiveness
+                    'interim_results': self.INTERIM_RESULTS,  # Return ANYTHING as soon as possible
                     'diarize': True,            # TODO: Distinguish yours truly from whoever I'm talking to
                 })
         except Exception as e:
-            print(f'Could not open socket: {e}')
+            log.error('Could not open socket: %s', e)
             raise
 
         # Listen for the connection to close
-        deepgram_live.registerHandler(deepgram_live.event.CLOSE, lambda c: print(f'Connection closed with code {c}.'))
-        # Listen for any transcripts received from Deepgram and write them to the console
-        deepgram_live.registerHandler(deepgram_live.event.TRANSCRIPT_RECEIVED, lambda c: self.handle_response(c))
+        deepgram_live.registerHandler(deepgram_live.event.CLOSE,
+                                      lambda c: log.info('Connection closed with code %s.', c))
+        # Listen for any transcripts received from Deepgram and queue them up for the display
+        deepgram_live.registerHandler(deepgram_live.event.TRANSCRIPT_RECEIVED, self.hear)
         return deepgram_live
 
+    # Every response from Deepgram, on its way to handle_response(). The meter wants to know which ones had words.
+    def hear(self, response):
+        if self.usage is not None:
+            self.usage.heard(response)
+        self.handle_response(response)
+
 
 # Run the whole module as a script, see if I care
 if __name__ == '__main__':
-    # I have no idea where I'm supposed to do this.
-    pygame.init()
-    pygame.mouse.set_visible(False)
-
     # Without this, crashes will also be asynchronous, making debugging sheer h*ck
     def oopsie(ser_loopinus_of_async_upon_io, context):
         exception = context.get('exception')
@@ -556,5 +1329,9 @@ if __name__ == '__main__':
     loop = asyncio.get_event_loop()
     loop.set_exception_handler(oopsie)
 
-    the_project_thats_gonna_make_me_bigger_than_dunkey = SubtitleHoodie()
+    the_project_thats_gonna_make_me_bigger_than_dunkey = SubtitleHoodie(open_display=False)
+    logging.basicConfig(level=the_project_thats_gonna_make_me_bigger_than_dunkey.LOG_LEVEL,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    the_project_thats_gonna_make_me_bigger_than_dunkey.get_ready()
     asyncio.run(the_project_thats_gonna_make_me_bigger_than_dunkey.do_the_thing())
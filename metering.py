@@ -0,0 +1,172 @@
+import argparse
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger('hoodie.usage')
+
+
+# Everything one live connection did that Deepgram bills us for. Audio is counted before the uplink encoder gets it,
+# so resampling and compression don't change how many seconds it was - only how many bytes.
+class ConnectionUsage:
+    __slots__ = ('opened_at', 'closed_at', 'last_words_at', 'bytes_sent', 'audio_seconds', 'speech_seconds',
+                 'silence_seconds', 'trailing_silence_seconds', 'trimmed_seconds', 'closed_because')
+
+    def __init__(self, now):
+        self.opened_at = now
+        self.closed_at = None
+        self.last_words_at = None  # When Deepgram last sent back an actual word
+        self.bytes_sent = 0  # What actually went over the wire, after encoding
+        self.audio_seconds = 0.0  # What we get billed for
+        self.speech_seconds = 0.0  # Of that, chunks the VAD heard speech in
+        self.silence_seconds = 0.0  # The rest - the pre-roll, pauses and the VAD's hangover
+        self.trailing_silence_seconds = 0.0  # Silence sent since the last speech, IE right before finish()
+        self.trimmed_seconds = 0.0  # Silence we held back and never sent
+        self.closed_because = None
+
+    def duration(self, now):
+        return (self.closed_at if self.closed_at is not None else now) - self.opened_at
+
+    # Seconds since this connection last got us any words, or since it opened if it never has
+    def seconds_without_words(self, now):
+        return now - (self.last_words_at if self.last_words_at is not None else self.opened_at)
+
+    def summary(self, now):
+        return {'seconds': round(self.duration(now), 2), 'audio_seconds': round(self.audio_seconds, 2),
+                'speech_seconds': round(self.speech_seconds, 2), 'silence_seconds': round(self.silence_seconds, 2),
+                'trailing_silence_seconds': round(self.trailing_silence_seconds, 2),
+                'trimmed_seconds': round(self.trimmed_seconds, 2), 'bytes_sent': self.bytes_sent,
+                'closed_because': self.closed_because}
+
+
+# Keeps score of what Deepgram's charging us for, one ConnectionUsage per connection that actually got audio.
+# Pre-warmed spares that only ever got KeepAlives cost nothing, so they don't count til they're used.
+# LiveConnectionManager does the counting. Whoever gets the responses tells it when words come back.
+# With a log_path, every closed connection gets a line there too, so the bill adds up across reboots - see main().
+# That's one little append per connection, so it's done right there on the event loop.
+class UsageMeter:
+    def __init__(self, sample_rate, sample_width=2, clock=time.monotonic, log_path=None):
+        self.bytes_per_second = sample_rate * sample_width
+        self.clock = clock
+        self.log_path = log_path
+        self.current = None  # ConnectionUsage for the open connection, if there is one
+
+        # Totals for the whole session, closed connections and the open one alike
+        self.connections = 0
+        self.connection_seconds = 0.0  # Closed ones only - the open one gets added in stats()
+        self.bytes_sent = 0
+        self.audio_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.silence_seconds = 0.0
+        self.trailing_silence_seconds = 0.0  # Closed ones only
+        self.trimmed_seconds = 0.0
+        self.closed_because = {}  # Reason -> how many connections hung up for it
+
+    def opened(self):
+        self.current = ConnectionUsage(self.clock())
+        self.connections += 1
+
+    # A chunk of raw audio that's going out, with how many bytes it turned into. Called with the pre-roll too.
+    def sent(self, chunk_bytes, encoded_bytes, speech):
+        seconds = chunk_bytes / self.bytes_per_second
+        usage = self.current
+        usage.bytes_sent += encoded_bytes
+        usage.audio_seconds += seconds
+        self.bytes_sent += encoded_bytes
+        self.audio_seconds += seconds
+        if speech:
+            usage.speech_seconds += seconds
+            usage.trailing_silence_seconds = 0.0
+            self.speech_seconds += seconds
+        else:
+            usage.silence_seconds += seconds
+            usage.trailing_silence_seconds += seconds
+            self.silence_seconds += seconds
+
+    # Silence we held back, then never sent
+    def trimmed(self, chunk_bytes):
+        seconds = chunk_bytes / self.bytes_per_second
+        if self.current is not None:
+            self.current.trimmed_seconds += seconds
+        self.trimmed_seconds += seconds
+
+    # Encoded bytes that got sent without any new audio, like the encoder's last few when we hang up
+    def flushed(self, encoded_bytes):
+        self.current.bytes_sent += encoded_bytes
+        self.bytes_sent += encoded_bytes
+
+    # Deepgram sent us something. Only responses with words in 'em count as the connection earning its keep.
+    def heard(self, response):
+        if self.current is None or not isinstance(response, dict):
+            return
+        alternatives = response.get('channel', {}).get('alternatives') or [{}]
+        if alternatives[0].get('words'):
+            self.current.last_words_at = self.clock()
+
+    def closed(self, reason):
+        usage, self.current = self.current, None
+        if usage is None:
+            return
+        usage.closed_at = self.clock()
+        usage.closed_because = reason
+        self.connection_seconds += usage.duration(usage.closed_at)
+        self.trailing_silence_seconds += usage.trailing_silence_seconds
+        self.closed_because[reason] = self.closed_because.get(reason, 0) + 1
+        summary = usage.summary(usage.closed_at)
+        log.info('Connection closed (%s): %s', reason, summary)
+        if self.log_path is not None:
+            try:
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(dict(summary, at=time.time())) + '\n')
+            except OSError as e:
+                log.warning('Could not log usage to %s: %s', self.log_path, e)
+
+    def stats(self):
+        now = self.clock()
+        connection_seconds = self.connection_seconds
+        if self.current is not None:
+            connection_seconds += self.current.duration(now)
+        return {
+            'connections': self.connections,
+            'connection_seconds': round(connection_seconds, 2),
+            'audio_seconds': round(self.audio_seconds, 2),
+            'billed_minutes': round(self.audio_seconds / 60, 3),
+            'speech_seconds': round(self.speech_seconds, 2),
+            'silence_seconds': round(self.silence_seconds, 2),
+            'trailing_silence_seconds': round(self.trailing_silence_seconds, 2),
+            'trimmed_seconds': round(self.trimmed_seconds, 2),
+            'bytes_sent': self.bytes_sent,
+            'closed_because': dict(self.closed_because),
+            'current': self.current.summary(now) if self.current is not None else None,
+        }
+
+
+# Adds up a usage log, one line per day
+def main():
+    parser = argparse.ArgumentParser(description='What Deepgram\'s been charging the hoodie for, by day')
+    parser.add_argument('log', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'usage.jsonl'))
+    args = parser.parse_args()
+
+    days = {}
+    with open(args.log) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            day = days.setdefault(time.strftime('%Y-%m-%d', time.localtime(entry['at'])),
+                                  {'connections': 0, 'audio_seconds': 0.0, 'speech_seconds': 0.0,
+                                   'trimmed_seconds': 0.0})
+            day['connections'] += 1
+            for key in ('audio_seconds', 'speech_seconds', 'trimmed_seconds'):
+                day[key] += entry[key]
+
+    print(f'{"":10s} {"connections":>11s} {"billed min":>10s} {"speech min":>10s} {"trimmed min":>11s}')
+    for day, totals in sorted(days.items()):
+        print(f'{day:10s} {totals["connections"]:11d} {totals["audio_seconds"] / 60:10.2f} '
+              f'{totals["speech_seconds"] / 60:10.2f} {totals["trimmed_seconds"] / 60:11.2f}')
+
+
+if __name__ == '__main__':
+    main()
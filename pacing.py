@@ -0,0 +1,82 @@
+from collections import deque
+
+
+# Keeps the captions from falling further and further behind me during a long rant.
+# With a fixed time per line, talking faster than lines scroll means every word waits a little longer than the last.
+# So the pacer looks at the lag - how long ago the newest word on my chest was said, while newer words wait for room -
+# and picks how to scroll:
+#   - Caught up (lag under relaxed_lag): each top line gets maximum_line_display_time, same as always
+#   - Falling behind: lines get less time, sliding down to minimum_line_display_time by hurried_lag
+#   - Way behind (past burst_lag): scroll off a line for every burst_lag seconds of lag, all at once
+#   - Hopelessly behind (past skip_lag): nobody wants to read what I said 20 seconds ago. Skip to the last
+#     skip_keeps seconds of what I've said.
+# Set burst_lag or skip_lag to None to never do that. It only decides - SubtitleDisplay does the scrolling.
+class CaptionPacer:
+    def __init__(self, minimum_line_display_time=0.35, maximum_line_display_time=0.75, relaxed_lag=1.0,
+                 hurried_lag=4.0, burst_lag=4.0, skip_lag=12.0, skip_keeps=3.0, history=120):
+        self.minimum_line_display_time = minimum_line_display_time
+        self.maximum_line_display_time = maximum_line_display_time
+        self.relaxed_lag = relaxed_lag
+        self.hurried_lag = hurried_lag
+        self.burst_lag = burst_lag
+        self.skip_lag = skip_lag
+        self.skip_keeps = skip_keeps
+
+        self.lag = 0.0  # As of the last time a line scrolled
+        self.worst_lag = 0.0
+        self.history = deque(maxlen=history)  # (when, lag) every time a line scrolled, for lag over time
+        self.lines_scrolled = 0
+        self.bursts = 0  # Times we scrolled more than one line at once
+        self.skips = 0
+        self.seconds_skipped = 0.0
+
+    # Seconds each top line gets, for this much lag
+    def line_display_time(self, lag):
+        if lag <= self.relaxed_lag:
+            return self.maximum_line_display_time
+        if lag >= self.hurried_lag:
+            return self.minimum_line_display_time
+        hurry = (lag - self.relaxed_lag) / (self.hurried_lag - self.relaxed_lag)
+        return self.maximum_line_display_time - hurry * (self.maximum_line_display_time -
+                                                         self.minimum_line_display_time)
+
+    # When a top line that went up at line_started should scroll away. While words wait for room, the lag grows a second
+    # per second - it's t - lag_zero at time t - so the line's time shrinks as it sits there. This is the moment the
+    # line's been up as long as the lag by then says it gets. None for lag_zero means nothing's waiting, so no lag.
+    def deadline(self, line_started, lag_zero=None):
+        relaxed = line_started + self.maximum_line_display_time
+        if lag_zero is None or relaxed <= lag_zero + self.relaxed_lag:
+            return relaxed
+        hurried = line_started + self.minimum_line_display_time
+        if hurried >= lag_zero + self.hurried_lag or self.hurried_lag <= self.relaxed_lag:
+            return max(hurried, lag_zero + self.relaxed_lag)
+        # Somewhere on the slide between the two, where the line's time shrinks this much per second of lag
+        slope = (self.maximum_line_display_time - self.minimum_line_display_time) / \
+            (self.hurried_lag - self.relaxed_lag)
+        return (relaxed + slope * (lag_zero + self.relaxed_lag)) / (1 + slope)
+
+    # How many lines to scroll off at once
+    def lines_to_scroll(self, lag):
+        if self.burst_lag is None or lag < self.burst_lag:
+            return 1
+        return 1 + int(lag / self.burst_lag)
+
+    def should_skip(self, lag):
+        return self.skip_lag is not None and lag >= self.skip_lag
+
+    # Called whenever lines scroll, with when (on the display's clock) and what actually happened
+    def note(self, now, lag, lines, skipped=0.0):
+        self.lag = lag
+        self.worst_lag = max(self.worst_lag, lag)
+        self.history.append((now, lag))
+        self.lines_scrolled += lines
+        if lines > 1:
+            self.bursts += 1
+        if skipped > 0:
+            self.skips += 1
+            self.seconds_skipped += skipped
+
+    def stats(self):
+        return {'lag': round(self.lag, 3), 'worst_lag': round(self.worst_lag, 3),
+                'line_display_time': round(self.line_display_time(self.lag), 3), 'lines_scrolled': self.lines_scrolled,
+                'bursts': self.bursts, 'skips': self.skips, 'seconds_skipped': round(self.seconds_skipped, 3)}
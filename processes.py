@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import signal
+import struct
+from multiprocessing import shared_memory
+
+log = logging.getLogger('hoodie.processes')
+
+# What the capture process decided about each chunk, so the connection process doesn't have to run the VAD again
+WORTH_SENDING = 1  # Forward it to Deepgram
+SPEECH_STARTED = 2  # The VAD heard speech in it, so open a socket if there isn't one
+AUDIBLE = 4  # Louder than the room, so never held back as silence - see TRAILING_SILENCE
+
+
+# Hands audio chunks from the capture process to the connection process through shared memory, so nobody pickles
+# 44 kilobytes a second. Fixed-size slots, one writer, one reader.
+#   - The counters live in the shared block too, guarded by a multiprocessing Lock. It's only held long enough to
+#     read or bump a counter, and taking it is what makes sure the other process sees the audio before the count.
+#   - When the reader falls all the way behind, the writer drops the NEWEST chunk and counts an overrun.
+#     It can't move the reader's position out from under it like RingBufferCapture does.
+#   - Every chunk also writes a byte to a pipe, which is what the reader's event loop actually waits on.
+# Made by the supervisor before it forks, so both children inherit the same block, lock and pipe.
+class SharedChunkRing:
+    _slot_header = struct.Struct('dII')  # time.monotonic() the chunk was captured, length in bytes, flags
+    _written, _read, _overruns = range(3)
+
+    def __init__(self, context, slots, slot_bytes):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.slot_size = self._slot_header.size + slot_bytes
+        counters_size = 3 * 8
+        self.memory = shared_memory.SharedMemory(create=True, size=counters_size + slots * self.slot_size)
+        self.counters = self.memory.buf[:counters_size].cast('Q')
+        self.counters[self._written] = self.counters[self._read] = self.counters[self._overruns] = 0
+        self.data = self.memory.buf[counters_size:]
+        self.lock = context.Lock()
+        self.final_stats = None  # What stats() said when the ring got closed
+
+        self.doorbell, self.doorbell_ringer = os.pipe()
+        os.set_blocking(self.doorbell, False)
+        os.set_blocking(self.doorbell_ringer, False)
+
+    def _slot(self, position):
+        return (position % self.slots) * self.slot_size
+
+    # Capture process only. Never waits for the reader. Returns False if the chunk got dropped.
+    def put(self, timestamp, flags, chunk):
+        if len(chunk) > self.slot_bytes:
+            raise ValueError(f'{len(chunk)} byte chunk does not fit in a {self.slot_bytes} byte slot')
+        with self.lock:
+            position = self.counters[self._written]
+            full = position - self.counters[self._read] >= self.slots
+            if full:
+                self.counters[self._overruns] += 1
+        if full:
+            return False
+
+        offset = self._slot(position)
+        self._slot_header.pack_into(self.data, offset, timestamp, len(chunk), flags)
+        start = offset + self._slot_header.size
+        self.data[start:start + len(chunk)] = chunk
+        with self.lock:
+            self.counters[self._written] = position + 1
+        self.ring()
+        return True
+
+    # Wakes up whoever's waiting in get(), even if there's nothing new
+    def ring(self):
+        try:
+            os.write(self.doorbell_ringer, b'\0')
+        except BlockingIOError:
+            pass  # The pipe's full of wakeups already. The reader'll get there.
+
+    # Connection process only. Returns (timestamp, flags, chunk) or None if there's nothing waiting.
+    # The chunk is copied out, so the slot can go straight back to the writer.
+    def get_nowait(self):
+        with self.lock:
+            position = self.counters[self._read]
+            if position == self.counters[self._written]:
+                return None
+        offset = self._slot(position)
+        timestamp, length, flags = self._slot_header.unpack_from(self.data, offset)
+        start = offset + self._slot_header.size
+        chunk = bytes(self.data[start:start + length])
+        with self.lock:
+            self.counters[self._read] = position + 1
+        return timestamp, flags, chunk
+
+    # Wait for the next chunk. Returns None if the doorbell rang with nothing behind it, like when ring() gets called
+    # to make us check whether it's time to quit.
+    async def get(self):
+        self._silence_doorbell()
+        item = self.get_nowait()
+        if item is None:
+            loop = asyncio.get_running_loop()
+            rang = loop.create_future()
+            loop.add_reader(self.doorbell, lambda: rang.done() or rang.set_result(None))
+            try:
+                await rang
+            finally:
+                loop.remove_reader(self.doorbell)
+            item = self.get_nowait()
+        return item
+
+    def _silence_doorbell(self):
+        try:
+            while os.read(self.doorbell, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def stats(self):
+        if self.final_stats is not None:
+            return self.final_stats
+        with self.lock:
+            written, read, overruns = self.counters[self._written], self.counters[self._read], \
+                self.counters[self._overruns]
+        return {'chunks_written': written, 'chunks_read': read, 'depth': written - read, 'overruns': overruns}
+
+    # Supervisor only, once the children are gone
+    def close(self):
+        self.final_stats = self.stats()
+        self.counters.release()
+        self.data.release()
+        self.memory.close()
+        self.memory.unlink()
+        os.close(self.doorbell)
+        os.close(self.doorbell_ringer)
+
+
+# Forked children start here. Ctrl-C goes to the whole process group, but shutting down is the supervisor's call.
+def _child_main(target, stop, args):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(target(stop, *args))
+    finally:
+        stop.set()  # If I'm going down, everybody is
+
+
+# Starts the hoodie's worker processes and keeps an eye on 'em. Everybody shares one multiprocessing Event:
+# a child sets it when it exits for any reason, and the supervisor sets it to tell everybody to wrap up.
+# Children are forked, not spawned, so they inherit the hoodie, its config and whatever got passed in without
+# pickling any of it. Fork before starting any threads or event loop tasks you don't want copied.
+class ProcessSupervisor:
+    def __init__(self, context, check_interval=0.2, shutdown_timeout=5.0):
+        self.context = context
+        self.check_interval = check_interval
+        self.shutdown_timeout = shutdown_timeout
+        self.stop = context.Event()
+        self.children = []
+
+    # target is an async function that gets the stop Event, then args
+    def spawn(self, name, target, *args):
+        process = self.context.Process(target=_child_main, args=(target, self.stop, args), name=name, daemon=True)
+        process.start()
+        self.children.append(process)
+        log.info('Started %s process (pid %d)', name, process.pid)
+        return process
+
+    # Returns once should_stop() says so, a child sets the stop Event, or a child dies
+    async def watch(self, should_stop):
+        while not (should_stop() or self.stop.is_set()):
+            for process in self.children:
+                if not process.is_alive():
+                    log.error('%s process died with exit code %s', process.name, process.exitcode)
+                    return
+            await asyncio.sleep(self.check_interval)
+
+    # Tell everybody to finish up, give 'em a few seconds, then stop asking nicely
+    async def shutdown(self):
+        self.stop.set()
+        loop = asyncio.get_running_loop()
+        for process in self.children:
+            await loop.run_in_executor(None, process.join, self.shutdown_timeout)
+            if process.is_alive():
+                log.warning('%s process would not quit. Terminating it.', process.name)
+                process.terminate()
+                await loop.run_in_executor(None, process.join)
+        log.info('All processes stopped')
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import deque
+
+
+# Pulls the bits of a Deepgram response we need for queueing decisions.
+# Anything without is_final (metadata, status messages, who knows) counts as final so it never gets thrown away.
+def _request_id_and_finality(response):
+    try:
+        return response['metadata']['request_id'], response['is_final']
+    except (KeyError, TypeError):
+        return None, True
+
+
+# If rendering stalls, replaying every stale interim result one after another just makes the captions lag harder.
+# This queue keeps at most one interim result per request - a newer one replaces the queued one in place.
+# Final results are never dropped or merged. When the queue's over its limit, the oldest interim result goes first,
+# and if everything queued is final, we let it grow rather than lose words.
+# It's its own little deque instead of an asyncio.Queue, so none of this leans on asyncio.Queue's private hooks.
+# Only one consumer, the display's interpreter loop, ever waits on it.
+class TranscriptQueue:
+    def __init__(self, limit=32):
+        self.limit = limit
+        # Holds [response, time.monotonic() it arrived] lists, so a queued interim can be swapped out without moving it
+        self.slots = deque()
+        self.pending_interims = {}  # request_id -> slot of the interim result still waiting in the queue
+        self.not_empty = asyncio.Event()
+        self.coalesced = 0  # Interim results replaced by a newer one before anybody looked at them
+        self.dropped = 0  # Interim results thrown out because the queue was full
+        self.high_water = 0  # Deepest the queue ever got
+        self.last_received_at = None  # time.monotonic() when the response get() just returned arrived
+
+    def qsize(self):
+        return len(self.slots)
+
+    def empty(self):
+        return not self.slots
+
+    def put_nowait(self, response):
+        request_id, is_final = _request_id_and_finality(response)
+
+        if is_final:
+            # Any later interim for this request comes after the final, so it needs its own spot in line
+            self.pending_interims.pop(request_id, None)
+        else:
+            slot = self.pending_interims.get(request_id)
+            if slot is not None:
+                slot[0] = response
+                slot[1] = time.monotonic()
+                self.coalesced += 1
+                return
+
+        if len(self.slots) >= self.limit:
+            self._drop_oldest_interim()
+
+        slot = [response, time.monotonic()]
+        if not is_final:
+            self.pending_interims[request_id] = slot
+        self.slots.append(slot)
+        self.not_empty.set()
+        self.high_water = max(self.high_water, len(self.slots))
+
+    def get_nowait(self):
+        if not self.slots:
+            raise asyncio.QueueEmpty
+        slot = self.slots.popleft()
+        if not self.slots:
+            self.not_empty.clear()
+        request_id, is_final = _request_id_and_finality(slot[0])
+        if not is_final and self.pending_interims.get(request_id) is slot:
+            del self.pending_interims[request_id]
+        self.last_received_at = slot[1]
+        return slot[0]
+
+    async def get(self):
+        while not self.slots:
+            await self.not_empty.wait()
+        return self.get_nowait()
+
+    def _drop_oldest_interim(self):
+        for i, slot in enumerate(self.slots):
+            request_id, is_final = _request_id_and_finality(slot[0])
+            if not is_final:
+                del self.slots[i]
+                if self.pending_interims.get(request_id) is slot:
+                    del self.pending_interims[request_id]
+                self.dropped += 1
+                return
+
+    def stats(self):
+        return {'depth': self.qsize(), 'high_water': self.high_water,
+                'coalesced': self.coalesced, 'dropped': self.dropped}
+
+
+# Audio chunks waiting for the gating loop, with a choice of what to do when it can't keep up:
+#   'drop-oldest' - throw out the stalest chunk. Captions skip a bit, but they don't fall further and further behind.
+#   'block' - make the producer wait. Nothing gets lost in here, but PortAudio's buffer might overflow instead.
+class AudioQueue(asyncio.Queue):
+    policies = ('drop-oldest', 'block')
+
+    def __init__(self, maxsize=16, policy='drop-oldest'):
+        if policy not in self.policies:
+            raise ValueError(f'Audio backpressure policy must be one of {self.policies}, not {policy!r}')
+        super().__init__(maxsize)
+        self.policy = policy
+        self.dropped = 0  # Chunks thrown out to make room
+        self.high_water = 0
+
+    async def put(self, item):
+        if self.policy == 'block':
+            await super().put(item)
+        else:
+            self.put_nowait(item)
+        self.high_water = max(self.high_water, self.qsize())
+
+    def put_nowait(self, item):
+        if self.full() and self.policy == 'drop-oldest':
+            self.get_nowait()
+            self.task_done()
+            self.dropped += 1
+        super().put_nowait(item)
+
+    def stats(self):
+        return {'depth': self.qsize(), 'high_water': self.high_water, 'dropped': self.dropped}
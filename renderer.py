@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+
+import pygame
+
+from instrumentation import Instruments
+
+
+# Keeps what's on my chest around between frames, so adding one word doesn't repaint the whole dang display.
+# The old way: fill the screen, allocate a 1280x480 surface, render every line, rotate the whole thing 90°, blit it,
+# then push all 614,400 pixels over HDMI. Every. Single. Update.
+# This way: every line lives in a fixed slot, rendered lines are cached already rotated, only slots whose text changed
+# get repainted, and only their rects go to display.update().
+class RetainedRenderer:
+    def __init__(self, display, font, line_spacing=-2, color=(0xff, 0xff, 0xff), aa=False, cache_size=32,
+                 instruments=None):
+        # The display surface is already in portrait orientation and pygame allocated it once for us,
+        # so it IS our preallocated target. Lines run top-to-bottom in landscape, which is left-to-right here.
+        self.display = display
+        self.font = font
+        self.color = color
+        self.aa = aa
+        self.cache_size = cache_size
+        self.instruments = instruments if instruments is not None else Instruments(enabled=False)
+        self.font_height = self.font.size("Tg")[1]
+        self.line_pitch = self.font_height + line_spacing  # Negative spacing means neighbouring slots overlap a bit
+
+        # Landscape page dimensions, IE what you see when you read my chest
+        self.page_height, self.page_width = self.display.get_size()
+        self.max_lines = 0
+        while self.max_lines * self.line_pitch + self.font_height <= self.page_height:
+            self.max_lines += 1
+
+        self.line_cache = OrderedDict()  # Line text -> pre-rotated surface, least recently used first
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.shown_lines = []  # What's in each slot right now
+        self.needs_full_redraw = True  # Nothing we drew is on screen yet
+
+    # Call this if something else scribbles on the display, so the next frame repaints everything
+    def invalidate(self):
+        self.needs_full_redraw = True
+
+    # Where a landscape line slot ends up once rotated 90° counterclockwise onto the portrait display
+    def slot_rect(self, index):
+        return pygame.Rect(index * self.line_pitch, 0, self.font_height, self.page_width)
+
+    # Rendering and rotating text is the expensive part, so every line we've drawn recently gets remembered
+    def stats(self):
+        return {'cache_hits': self.cache_hits, 'cache_misses': self.cache_misses, 'cached_lines': len(self.line_cache)}
+
+    def get_line_surface(self, line):
+        text = line.replace('\r', '')  # Pygame totally ignores control chars in font rendering
+        surface = self.line_cache.get(text)
+        if surface is not None:
+            self.cache_hits += 1
+            self.line_cache.move_to_end(text)
+            return surface
+
+        self.cache_misses += 1
+        surface = pygame.transform.rotate(self.font.render(text, self.aa, self.color), 90)
+        self.line_cache[text] = surface
+        if len(self.line_cache) > self.cache_size:
+            self.line_cache.popitem(last=False)
+        return surface
+
+    def _blit_line(self, index, line):
+        surface = self.get_line_surface(line)
+        # Landscape x=0 lands at the bottom of the portrait display
+        self.display.blit(surface, (index * self.line_pitch, self.page_width - surface.get_height()))
+
+    # Put these lines on the display, redrawing only the slots that changed.
+    # Returns the list of rects we pushed to the display, which is empty if nothing changed.
+    def draw(self, lines):
+        dirty_rects = self.compose(lines)
+        self.present(dirty_rects)
+        return dirty_rects
+
+    # The first half of draw(): paint the lines onto the display surface, without showing anybody.
+    # Returns the rects present() needs to push, which is empty if nothing changed.
+    def compose(self, lines):
+        started = time.monotonic()
+        lines = list(lines[:self.max_lines])
+        slot_count = max(len(lines), len(self.shown_lines))
+
+        if self.needs_full_redraw:
+            self.display.fill((0, 0, 0))
+            changed = list(range(len(lines)))
+            dirty_rects = [self.display.get_rect()]
+        else:
+            changed = [i for i in range(slot_count)
+                       if i >= len(lines) or i >= len(self.shown_lines) or lines[i] != self.shown_lines[i]]
+            dirty_rects = [self.slot_rect(i) for i in changed]
+            for rect in dirty_rects:
+                self.display.fill((0, 0, 0), rect)
+
+        # Slots overlap by a couple pixels, so clearing one nibbles its neighbours. Redraw anything we touched,
+        # in top-to-bottom order so the overlaps stack the same way they would on a fresh frame.
+        for i, line in enumerate(lines):
+            if i in changed or (i - 1) in changed or (i + 1) in changed:
+                self._blit_line(i, line)
+
+        self.shown_lines = lines
+        self.needs_full_redraw = False
+        self.instruments.record('blit', time.monotonic() - started)
+        return dirty_rects
+
+    # The second half: push what compose() painted to the screen. SDL only promises this works from the thread that
+    # made the window, so whoever calls it had better be on that one.
+    def present(self, dirty_rects):
+        if dirty_rects:
+            started = time.monotonic()
+            pygame.display.update(dirty_rects)
+            self.instruments.record('update', time.monotonic() - started)
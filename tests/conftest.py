@@ -0,0 +1,54 @@
+# The hoodie's modules live in the project root, and the synthetic traffic helpers live with the benchmarks
+import asyncio
+import os
+import selectors
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'benchmarks'))
+
+
+# Instead of blocking til the next timer's due, jumps the clock straight to it. Real file descriptors still get
+# checked, so the loop's own plumbing works. oversleep makes the next wait run that much long, like a starved CPU.
+class TimeTravelSelector(selectors.DefaultSelector):
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self.oversleep = 0.0
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            raise RuntimeError('Nothing left that could ever wake the loop up')
+        self.now += timeout + self.oversleep
+        self.oversleep = 0.0
+        return []
+
+
+class TimeTravelLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self.time_travel = TimeTravelSelector()
+        super().__init__(self.time_travel)
+
+    def time(self):
+        return self.time_travel.now
+
+
+# An event loop on simulated time. Hand loop.time to whatever needs a clock.
+@pytest.fixture
+def loop():
+    loop = TimeTravelLoop()
+    yield loop
+    # The display's loops run til they're cancelled
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        loop.run_until_complete(asyncio.wait(tasks))
+    loop.close()
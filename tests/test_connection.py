@@ -0,0 +1,127 @@
+# What LiveConnectionManager sends Deepgram, and what the UsageMeter says we'll be billed for
+import asyncio
+import json
+
+from connection import LiveConnectionManager
+from metering import UsageMeter
+
+SAMPLE_RATE = 16000
+CHUNK = 3200  # 0.1 s of 16 bit mono
+
+
+# Stands in for the SDK's LiveTranscription. Remembers everything it was sent.
+class FakeLive:
+    def __init__(self):
+        self.sent = []
+        self.done = False
+
+    def send(self, data):
+        self.sent.append(data)
+
+    async def finish(self):
+        self.done = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self):
+        return self.seconds
+
+
+def chunk(value):
+    return bytes([value]) * CHUNK
+
+
+def make_manager(clock, log_path=None, **kwargs):
+    sockets = []
+
+    async def connect():
+        sockets.append(FakeLive())
+        return sockets[-1]
+
+    meter = UsageMeter(SAMPLE_RATE, clock=clock, log_path=log_path)
+    manager = LiveConnectionManager(connect, SAMPLE_RATE, prewarm=False, meter=meter, **kwargs)
+    return manager, sockets
+
+
+def test_preroll_goes_out_first():
+    async def session():
+        manager, sockets = make_manager(FakeClock(), preroll_seconds=0.2)
+        for value in range(5):
+            manager.remember(chunk(value))
+        await manager.open()
+        await manager.send(chunk(9))
+        return manager, sockets
+
+    manager, sockets = asyncio.run(session())
+    # Only the newest 0.2 s of pre-roll, then the live audio
+    assert sockets[0].sent == [chunk(3), chunk(4), chunk(9)]
+    stats = manager.meter.stats()
+    assert stats['speech_seconds'] == 0.1
+    assert stats['silence_seconds'] == 0.2
+
+
+def test_trailing_silence_gets_held_back_and_trimmed():
+    async def session():
+        manager, sockets = make_manager(FakeClock(), trailing_silence=0.2)
+        await manager.open()
+        await manager.send(chunk(1), speech=True)
+        for value in range(2, 7):
+            await manager.send(chunk(value), speech=False)
+        sent_before_finish = list(sockets[0].sent)
+        await manager.finish()
+        return manager, sockets, sent_before_finish
+
+    manager, sockets, sent_before_finish = asyncio.run(session())
+    # 0.2 s of silence goes straight out, the other 0.3 s never does
+    assert sent_before_finish == [chunk(1), chunk(2), chunk(3)]
+    assert sockets[0].sent == sent_before_finish
+    stats = manager.meter.stats()
+    assert stats['audio_seconds'] == 0.3
+    assert stats['trimmed_seconds'] == 0.3
+    assert stats['closed_because'] == {'quiet': 1}
+
+
+def test_held_silence_goes_out_if_i_keep_talking():
+    async def session():
+        manager, sockets = make_manager(FakeClock(), trailing_silence=0.1)
+        await manager.open()
+        await manager.send(chunk(1), speech=True)
+        for value in range(2, 5):
+            await manager.send(chunk(value), speech=False)
+        await manager.send(chunk(5), speech=True)
+        return manager, sockets
+
+    manager, sockets = asyncio.run(session())
+    # Nothing's lost or out of order, so Deepgram's timestamps still line up with the audio
+    assert sockets[0].sent == [chunk(value) for value in range(1, 6)]
+    assert manager.meter.stats()['trimmed_seconds'] == 0.0
+
+
+def test_no_words_for_too_long_hangs_up(tmp_path):
+    clock = FakeClock()
+    log_path = tmp_path / 'usage.jsonl'
+
+    async def session():
+        manager, sockets = make_manager(clock, log_path=str(log_path), max_seconds_without_words=15)
+        await manager.open()
+        await manager.send(chunk(1))
+        clock.seconds = 10
+        manager.meter.heard({'channel': {'alternatives': [{'transcript': 'hi', 'words': [{'word': 'hi'}]}]}})
+        clock.seconds = 24
+        await manager.send(chunk(2))  # 14 s since the last word, so it's still earning its keep
+        clock.seconds = 25
+        await manager.send(chunk(3))
+        return manager, sockets
+
+    manager, sockets = asyncio.run(session())
+    assert sockets[0].sent == [chunk(1), chunk(2)]
+    assert not manager.is_open
+    assert manager.ignoring_noise
+    assert list(manager.preroll) == [chunk(3)]  # Kept in case it's the start of something after all
+    logged = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [entry['closed_because'] for entry in logged] == ['no words']
+    assert logged[0]['audio_seconds'] == 0.2
+    assert logged[0]['bytes_sent'] == 2 * CHUNK
@@ -0,0 +1,106 @@
+# expiration_timing_loop on simulated time: lines should scroll away right at their deadlines, not a tick late
+import asyncio
+import uuid
+
+import pygame
+import pytest
+
+import main
+from pacing import CaptionPacer
+from synthetic import make_response
+
+SPEECH = 'four score and seven years ago abraham lincoln said some stuff and i forgot most of it'.split()
+
+
+@pytest.fixture(scope='module')
+def font():
+    pygame.init()
+    yield pygame.font.Font(None, 125)
+    pygame.quit()
+
+
+# A display with its loops running on the loop's clock. Returns it and a list that fills up with
+# (when, deadline) every time the top line expires.
+def start_display(loop, font, pacer=None):
+    subtitle_display = main.SubtitleDisplay(pygame.display.set_mode((480, 1280)), font, clock=loop.time,
+                                            render_thread=False, pacer=pacer)
+    expired = []
+    expire_top_line = subtitle_display.expire_top_line
+
+    async def record_and_expire():
+        expired.append((loop.time(), subtitle_display.next_expiration_deadline()))
+        await expire_top_line()
+
+    subtitle_display.expire_top_line = record_and_expire
+    subtitle_display.start_the_loops_brother()
+    return subtitle_display, expired
+
+
+# A final result for count words, said seconds_per_word apart, arriving right as the last one ends
+async def say(subtitle_display, count, seconds_per_word=0.3):
+    words = [{'word': SPEECH[i % len(SPEECH)], 'start': i * seconds_per_word,
+              'end': (i + 0.8) * seconds_per_word, 'confidence': 0.99} for i in range(count)]
+    response = make_response(words, str(uuid.uuid4()))
+    await subtitle_display.handle_transcript(response['channel']['alternatives'][0]['transcript'], words,
+                                             response['metadata']['request_id'], True)
+
+
+def test_lines_expire_at_their_deadlines(loop, font):
+    async def session():
+        subtitle_display, expired = start_display(loop, font)
+        await asyncio.sleep(1)
+        await say(subtitle_display, 12)
+        lines = len(subtitle_display.currently_displayed_words)
+        assert lines >= 2 and not subtitle_display.words_waiting
+        await asyncio.sleep(10)
+        return lines, expired
+
+    lines, expired = loop.run_until_complete(session())
+    # Nothing's waiting, so every line gets the full maximum_line_display_time, starting when it hit the top
+    assert [when for when, _ in expired] == pytest.approx([1 + 0.75 * (i + 1) for i in range(lines)], abs=1e-9)
+    for when, deadline in expired:
+        assert when == pytest.approx(deadline, abs=1e-9)
+
+
+def test_earlier_deadline_wakes_the_loop(loop, font):
+    pacer = CaptionPacer(minimum_line_display_time=0.5, maximum_line_display_time=5.0, relaxed_lag=1.0,
+                         hurried_lag=2.0, burst_lag=None, skip_lag=None)
+
+    async def session():
+        subtitle_display, expired = start_display(loop, font, pacer)
+        await asyncio.sleep(1)
+        await say(subtitle_display, 2)
+        first_deadline = subtitle_display.next_expiration_deadline()
+        assert first_deadline == pytest.approx(6.0)
+
+        # While the loop sleeps til then, a statement too long for the screen shows up below the top line.
+        # Words waiting means lag, so the top line has to go sooner.
+        await asyncio.sleep(2)
+        await say(subtitle_display, 40, seconds_per_word=0.05)
+        assert subtitle_display.words_waiting
+        earlier_deadline = subtitle_display.next_expiration_deadline()
+        assert loop.time() < earlier_deadline < first_deadline
+        await asyncio.sleep(10)
+        return earlier_deadline, expired
+
+    earlier_deadline, expired = loop.run_until_complete(session())
+    assert expired[0][0] == pytest.approx(earlier_deadline, abs=1e-9)
+
+
+def test_late_wakeup_expires_right_away(loop, font):
+    async def session():
+        subtitle_display, expired = start_display(loop, font)
+        await asyncio.sleep(1)
+        await say(subtitle_display, 12)
+        loop.time_travel.oversleep = 2.0  # Starved for a couple seconds, right when the first line's due
+        await asyncio.sleep(10)
+        return expired
+
+    expired = loop.run_until_complete(session())
+    # The overdue line goes the moment the loop gets to run, without sleeping again, and the next one gets its full
+    # time from there instead of being hustled off too
+    (first, first_deadline), (second, second_deadline) = expired[:2]
+    assert first_deadline == pytest.approx(1.75, abs=1e-9)
+    assert first == pytest.approx(3.75, abs=1e-9)
+    assert second == pytest.approx(second_deadline, abs=1e-9)
+    assert second == pytest.approx(4.5, abs=1e-9)
@@ -0,0 +1,65 @@
+# The stress suite's regression gate, and the made-up sessions it runs on
+import asyncio
+import copy
+
+import pygame
+
+import main
+import suite
+from synthetic import SimulatedClock, make_session, run_session
+
+BASELINE = {
+    'thresholds': {'time': {'fraction': 0.5, 'slack_us': 20}, 'memory': {'fraction': 0.2, 'slack_kib': 4}},
+    'cases': {'render': {'ops_per_s': 1000.0, 'p50_us': 100.0, 'p99_us': 400.0, 'peak_kib': 10.0}},
+}
+
+
+def test_within_thresholds_is_no_regression():
+    results = copy.deepcopy(BASELINE['cases'])
+    results['render'].update(ops_per_s=700.0, p50_us=160.0, p99_us=600.0, peak_kib=16.0)
+    assert suite.find_regressions(results, BASELINE) == []
+
+
+def test_regressions_get_flagged():
+    results = copy.deepcopy(BASELINE['cases'])
+    results['render'].update(ops_per_s=600.0, p99_us=700.0, peak_kib=17.0)
+    regressions = suite.find_regressions(results, BASELINE)
+    assert [regression.split(':')[0] for regression in regressions] == \
+        ['render ops_per_s', 'render p99_us', 'render peak_kib']
+
+
+def test_missing_case_is_a_regression():
+    assert suite.find_regressions({}, BASELINE) == ['render: missing']
+
+
+def test_suite_covers_every_baseline_case():
+    results = suite.run_suite({'minutes': 0.25, 'words_per_second': 2.5, 'interim_ratio': 2.0, 'repeats': 3})
+    with open(suite.BASELINES) as f:
+        baseline = suite.json.load(f)
+    assert set(results) == set(baseline['cases'])
+    assert all(metrics['count'] > 0 for metrics in results.values())
+
+
+# Interim results and all, talking at a normal clip, every word makes it to my chest
+def test_every_word_gets_shown():
+    pygame.init()
+    responses = make_session(120, words_per_second=2.5, interim_ratio=3.0, jitter=0)
+    clock = SimulatedClock()
+    subtitle_display = main.SubtitleDisplay(pygame.display.set_mode((480, 1280)), pygame.font.Font(None, 125),
+                                            clock=clock, render_thread=False)
+    shown = set()
+    submit = subtitle_display.frames.submit
+
+    def record_and_submit(lines, words):
+        shown.update((word.request_id, word.start) for line in words for word in line)
+        submit(lines, words)
+
+    subtitle_display.frames.submit = record_and_submit
+    asyncio.run(run_session(subtitle_display, responses, clock))
+
+    said = {(response['metadata']['request_id'], word['start'])
+            for _, response in responses if response['is_final']
+            for word in response['channel']['alternatives'][0]['words']}
+    assert len(said) > 100
+    assert said <= shown
+    assert not subtitle_display.currently_displayed_words  # And they all scrolled away afterwards
@@ -0,0 +1,257 @@
+import asyncio
+import io
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# Everything between the mic and deepgram_live.send() that makes the audio smaller.
+# We capture at 44.1kHz for the VAD's benefit, but speech recognition is happy at 16kHz, and the phone hotspot is
+# a lot happier with a third of the bytes. Optionally the audio gets compressed too.
+
+
+# Streaming polyphase resampler for int16 mono. Conceptually it upsamples by `up`, low-pass filters and keeps every
+# `down`th sample - but it only ever computes the samples it keeps, using the slice of filter taps for that phase.
+# The low-pass is a Kaiser-windowed sinc, designed from an explicit spec:
+#   - flat (within a fraction of a dB) up to passband * the lower Nyquist, IE 7kHz of speech going to 16kHz
+#   - at least attenuation_db down from the lower Nyquist on up, so nothing folds back into the speech band
+# The sharper the transition between those two, the more taps per phase it takes - about 190 for the defaults.
+class PolyphaseResampler:
+    def __init__(self, input_rate, output_rate, passband=0.875, attenuation_db=70.0):
+        self.passband = passband
+        self.attenuation_db = attenuation_db
+        divisor = math.gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+
+        # Kaiser's formulas for how long the filter has to be and how wide its window, in input samples
+        nyquist = min(input_rate, output_rate) / 2
+        passband_edge = passband * nyquist
+        transition = 2 * math.pi * (nyquist - passband_edge) / input_rate  # Radians per input sample
+        taps_per_phase = math.ceil((attenuation_db - 7.95) / (2.285 * transition)) + 1
+        if attenuation_db > 50:
+            kaiser_beta = 0.1102 * (attenuation_db - 8.7)
+        else:
+            kaiser_beta = 0.5842 * (attenuation_db - 21) ** 0.4 + 0.07886 * (attenuation_db - 21)
+
+        # Cut off halfway through the transition band
+        length = taps_per_phase * self.up
+        cutoff = (passband_edge + nyquist) / 2 / (input_rate * self.up)  # Cycles per upsampled sample
+        n = np.arange(length) - (length - 1) / 2
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, kaiser_beta) * self.up
+
+        # Row p holds the taps that land on phase p, ready to be dotted with the newest input samples first
+        self.phases = taps.reshape(taps_per_phase, self.up).T.astype(np.float32)
+        self.taps_per_phase = taps_per_phase
+        self.layouts = {}  # See _layout()
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)  # Tail of the previous chunk
+        self.samples_in = 0  # Input samples consumed so far
+        self.samples_out = 0  # Output samples produced so far
+
+    def process(self, samples):
+        samples_in = self.samples_in + len(samples)
+        # Every output sample whose newest input sample has arrived
+        samples_out = (samples_in * self.up + self.down - 1) // self.down
+        if samples_out <= self.samples_out or not len(samples):
+            self.samples_in = samples_in
+            self._keep_history(samples)
+            return np.zeros(0, dtype=np.int16)
+
+        buffer = np.concatenate((self.history, samples.astype(np.float32)))
+        # The first output's newest input sample is never older than this chunk, so its oldest is in the history
+        first_oldest = self.samples_out * self.down // self.up - self.samples_in
+        phases, window = self._layout(self.samples_out, samples_out - self.samples_out)
+        output = np.einsum('ij,ij->i', phases, buffer[first_oldest:][window])
+
+        self.samples_in = samples_in
+        self.samples_out = samples_out
+        self.history = buffer[len(buffer) - len(self.history):]
+        return np.clip(np.rint(output), -32768, 32767).astype(np.int16)
+
+    # The taps for each output, and which buffer samples it's dotted with, counting from the first output's oldest.
+    # That only depends on where in the up/down cycle the outputs start, so same-sized chunks reuse the same ones.
+    def _layout(self, first_output, count):
+        offset = first_output * self.down % self.up
+        layout = self.layouts.get((offset, count))
+        if layout is None:
+            if len(self.layouts) >= 8:
+                self.layouts.clear()  # Chunk sizes are all over the place, so don't hoard 'em
+            positions = np.arange(count, dtype=np.int64) * self.down + offset
+            window = (positions // self.up + self.taps_per_phase - 1)[:, None] - np.arange(self.taps_per_phase)
+            layout = self.layouts[offset, count] = (self.phases[positions % self.up], window)
+        return layout
+
+    def _keep_history(self, samples):
+        if len(self.history):
+            self.history = np.concatenate((self.history, samples.astype(np.float32)))[-len(self.history):]
+
+
+class Linear16Codec:
+    encoding = 'linear16'
+    bytes_per_second_per_hz = 2
+
+    def __init__(self, sample_rate):
+        pass
+
+    def encode(self, samples):
+        return samples.astype('<i2').tobytes()
+
+    def flush(self):
+        return b''
+
+    def close(self):
+        pass
+
+
+# G.711 mu-law - half the bytes of linear16, costs next to nothing, and Deepgram takes it natively
+class MulawCodec:
+    encoding = 'mulaw'
+    bytes_per_second_per_hz = 1
+    bias = 0x84
+    clip = 32635
+    exponents = np.array([max(i.bit_length() - 1, 0) for i in range(256)], dtype=np.int32)
+
+    def __init__(self, sample_rate):
+        pass
+
+    def encode(self, samples):
+        samples = samples.astype(np.int32)
+        sign = (samples < 0).astype(np.int32) << 7
+        magnitude = np.minimum(np.abs(samples), self.clip) + self.bias
+        exponent = self.exponents[(magnitude >> 7) & 0xFF]
+        mantissa = (magnitude >> (exponent + 3)) & 0x0F
+        return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+    def flush(self):
+        return b''
+
+    def close(self):
+        pass
+
+
+# Lossless, but takes real CPU, so it belongs in the worker thread. Needs the soundfile package (pip install soundfile).
+# Heads up: libsndfile only hands over whole FLAC frames of 4096 samples, and there's no making it flush early. At
+# 16kHz that's a packet every 256ms instead of every SEND_CHUNK_SECONDS, so it costs up to a quarter second of latency.
+class FlacCodec:
+    encoding = 'flac'
+    bytes_per_second_per_hz = None  # Depends on the audio
+
+    def __init__(self, sample_rate):
+        import soundfile  # Only needed if you actually want FLAC
+
+        self.buffer = io.BytesIO()
+        self.file = soundfile.SoundFile(self.buffer, mode='w', samplerate=sample_rate, channels=1,
+                                        format='FLAC', subtype='PCM_16')
+        self.sent = 0
+
+    def _new_bytes(self):
+        with self.buffer.getbuffer() as everything:  # A view, so we don't copy the whole stream every time
+            data = bytes(everything[self.sent:])
+        self.sent += len(data)
+        return data
+
+    def encode(self, samples):
+        self.file.write(samples)
+        return self._new_bytes()
+
+    def flush(self):
+        self.file.close()
+        # Closing rewrites the header at the front, which has already gone out, so only the tail is news
+        return self._new_bytes()
+
+    # Toss the stream without sending the rest of it
+    def close(self):
+        self.file.close()
+        self.buffer.close()
+
+
+codecs = {codec.encoding: codec for codec in (Linear16Codec, MulawCodec, FlacCodec)}
+
+
+# Capture-format audio in, Deepgram-ready packets out. One of these lives as long as one websocket - call reset()
+# between sockets, since compressed streams start with a header.
+class UplinkEncoder:
+    def __init__(self, input_rate, output_rate=16000, encoding='linear16', send_chunk_seconds=0.05,
+                 worker_thread=None):
+        if encoding not in codecs:
+            raise ValueError(f'Unknown uplink encoding {encoding!r}, try one of {list(codecs)}')
+        self.input_rate = input_rate
+        self.output_rate = output_rate or input_rate
+        self.codec_class = codecs[encoding]
+        self.encoding = encoding
+        self.send_chunk_seconds = send_chunk_seconds
+
+        bytes_per_hz = self.codec_class.bytes_per_second_per_hz
+        # Packets of a fixed duration when we know the byte rate, otherwise whatever the codec hands us
+        self.packet_bytes = None if bytes_per_hz is None else \
+            max(1, int(send_chunk_seconds * self.output_rate)) * bytes_per_hz
+
+        if worker_thread is None:
+            worker_thread = bytes_per_hz is None  # Only the heavy codecs need it by default
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='uplink') if worker_thread else None
+
+        self.resampler = PolyphaseResampler(input_rate, self.output_rate) if self.output_rate != input_rate else None
+        self.codec = None
+        self.pending = bytearray()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    # What deepgram.transcription.live() needs to know to understand us
+    @property
+    def deepgram_options(self):
+        return {'encoding': self.encoding, 'sample_rate': self.output_rate}
+
+    def reset(self):
+        if self.resampler is not None:
+            self.resampler.reset()
+        if self.codec is not None:
+            self.codec.close()
+        self.codec = None
+        self.pending.clear()
+
+    def _packets(self, data, final=False):
+        if self.packet_bytes is None:
+            return [data] if data else []
+        self.pending += data
+        packets = []
+        while len(self.pending) >= self.packet_bytes or final and self.pending:
+            packets.append(bytes(self.pending[:self.packet_bytes]))
+            del self.pending[:self.packet_bytes]
+        return packets
+
+    # Synchronous version - takes int16 mono bytes at the capture rate, returns a list of packets to send
+    def process(self, chunk):
+        if self.codec is None:
+            self.codec = self.codec_class(self.output_rate)
+        self.bytes_in += len(chunk)
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        packets = self._packets(self.codec.encode(samples))
+        self.bytes_out += sum(len(packet) for packet in packets)
+        return packets
+
+    # Whatever's left over at the end of a stream
+    def finish(self):
+        if self.codec is None:
+            return []
+        packets = self._packets(self.codec.flush(), final=True)
+        self.bytes_out += sum(len(packet) for packet in packets)
+        self.codec.close()
+        self.codec = None
+        return packets
+
+    async def encode(self, chunk):
+        if self.executor is None:
+            return self.process(chunk)
+        chunk = bytes(chunk)  # Capture buffers get recycled while the worker's busy
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.process, chunk)
+
+    async def drain(self):
+        if self.executor is None:
+            return self.finish()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.finish)
@@ -0,0 +1,155 @@
+import numpy as np
+
+
+# Voice activity detection - decides which audio chunks are worth paying Deepgram to hear.
+# Every detector has the same shape, so the main loop doesn't care which one it's got:
+#   process(chunk) takes a chunk of 16-bit mono audio (bytes, bytearray or memoryview - we don't copy it)
+#   and returns True if we should be forwarding audio right now.
+#   speech_in_last_chunk says whether the chunk actually had speech in it, as opposed to riding out the hangover.
+#   onset_offset is how many seconds into the last chunk speech started, or None if it didn't start there.
+#   reset() forgets everything.
+
+
+# Work arrays for the block features, so we don't allocate fresh ones for every chunk
+class _Scratch:
+    def __init__(self):
+        self.shape = None
+        self.squares = None
+        self.signs = None
+        self.crossings = None
+
+    def ensure(self, shape):
+        if shape != self.shape:
+            self.shape = shape
+            self.squares = np.empty(shape, dtype=np.float32)
+            self.signs = np.empty(shape, dtype=bool)
+            self.crossings = np.empty((shape[0], max(shape[1] - 1, 0)), dtype=bool)
+
+
+def _as_samples(chunk):
+    return np.frombuffer(chunk, dtype=np.int16)  # Just a view - no copy
+
+
+# The old gate: RMS of the whole chunk against a fixed floor, then keep forwarding til we've been quiet a while.
+# audioop is gone in Python 3.13, so the RMS comes from numpy now.
+class RmsGate:
+    def __init__(self, sample_rate, noise_floor=125, quiet_deadline=2):
+        self.sample_rate = sample_rate
+        self.noise_floor = noise_floor  # Quietest chunk that could be speech
+        self.quiet_deadline = quiet_deadline  # Seconds of quiet before we stop forwarding audio
+        self.reset()
+
+    def reset(self):
+        self.quiet_samples = None  # Samples since the last loud chunk, None if nothing's been loud yet
+        self.speech_in_last_chunk = False
+        self.onset_offset = None
+
+    def process(self, chunk):
+        samples = _as_samples(chunk).astype(np.float64)  # int16 squares would overflow
+        rms = np.sqrt(np.dot(samples, samples) / len(samples)) if len(samples) else 0
+        was_active = self.quiet_samples is not None and self.quiet_samples < self.quiet_deadline * self.sample_rate
+
+        self.speech_in_last_chunk = rms >= self.noise_floor
+        if self.speech_in_last_chunk:
+            self.quiet_samples = 0
+        elif self.quiet_samples is not None:
+            self.quiet_samples += len(samples)
+
+        active = self.quiet_samples is not None and self.quiet_samples < self.quiet_deadline * self.sample_rate
+        self.onset_offset = 0.0 if active and not was_active else None
+        return active
+
+
+# Chops each chunk into short blocks and looks at their energy and zero-crossing rate.
+#   - The noise floor adapts: it drops straight to quiet blocks, follows louder background noise up over a second or
+#     two, and only creeps up very slowly during speech - otherwise a room that got loud would look like nonstop speech
+#     forever, but normal talking would drag the floor up with it.
+#   - A block is speech if it's well above the noise floor. Hissy consonants (high zero-crossing rate) get some slack,
+#     since they start a lot of words and don't have much energy.
+#   - Speech has to last onset_time before we believe it (hysteresis), and we keep forwarding for hangover seconds
+#     after it stops, which is what QUIET_DEADLINE used to do.
+class EnergyVAD:
+    def __init__(self, sample_rate, block_time=0.01, margin_db=9.0, minimum_db=-50.0, fricative_margin_db=3.0,
+                 fricative_zero_crossing_rate=0.25, noise_rise_db_per_second=5.0, speech_noise_creep_db_per_second=0.5,
+                 onset_time=0.03, hangover=2.0):
+        self.sample_rate = sample_rate
+        self.block_size = max(1, int(sample_rate * block_time))
+        self.block_time = self.block_size / sample_rate
+        self.margin_db = margin_db  # How far above the noise floor speech has to be
+        self.minimum_db = minimum_db  # Never call anything quieter than this speech, however quiet the room gets
+        self.fricative_margin_db = fricative_margin_db  # Margin for blocks that zero-cross like an 's' or 'f'
+        self.fricative_zero_crossing_rate = fricative_zero_crossing_rate  # Crossings per sample
+        self.noise_rise_per_block = noise_rise_db_per_second * self.block_time
+        self.speech_noise_creep_per_block = speech_noise_creep_db_per_second * self.block_time
+        self.onset_blocks = max(1, round(onset_time / self.block_time))
+        self.hangover_blocks = max(1, round(hangover / self.block_time))
+        self.scratch = _Scratch()
+        self.reset()
+
+    def reset(self):
+        self.noise_db = None  # Adaptive noise floor estimate, in dB relative to full scale
+        self.speech_run = 0  # Consecutive speech blocks so far
+        self.quiet_run = self.hangover_blocks  # Consecutive non-speech blocks since we were last active
+        self.active = False
+        self.speech_in_last_chunk = False
+        self.onset_offset = None
+
+    def block_features(self, samples):
+        block_count = len(samples) // self.block_size
+        blocks = samples[:block_count * self.block_size].reshape(block_count, self.block_size)
+        self.scratch.ensure(blocks.shape)
+
+        np.square(blocks, out=self.scratch.squares, dtype=np.float32)
+        energy_db = 10 * np.log10(self.scratch.squares.mean(axis=1) / (32768.0 ** 2) + 1e-12)
+
+        np.signbit(blocks, out=self.scratch.signs)
+        np.not_equal(self.scratch.signs[:, 1:], self.scratch.signs[:, :-1], out=self.scratch.crossings)
+        zero_crossing_rate = self.scratch.crossings.sum(axis=1) / self.block_size
+
+        return energy_db, zero_crossing_rate
+
+    def process(self, chunk):
+        energy_db, zero_crossing_rate = self.block_features(_as_samples(chunk))
+        self.speech_in_last_chunk = False
+        self.onset_offset = None
+
+        # The per-block loop is just bookkeeping on a few dozen floats - the heavy lifting was vectorized above
+        for i, (energy, crossing_rate) in enumerate(zip(energy_db.tolist(), zero_crossing_rate.tolist())):
+            if self.noise_db is None:
+                self.noise_db = energy
+            threshold = max(self.noise_db + self.margin_db, self.minimum_db)
+            if crossing_rate >= self.fricative_zero_crossing_rate:
+                threshold -= self.fricative_margin_db
+            is_speech = energy >= threshold
+
+            if is_speech:
+                self.speech_run += 1
+                if self.speech_run >= self.onset_blocks:
+                    self.speech_in_last_chunk = True
+                    self.quiet_run = 0
+                    if not self.active:
+                        self.active = True
+                        # Speech actually started back when this run of speech blocks did
+                        self.onset_offset = max(0, i + 1 - self.onset_blocks) * self.block_time
+            else:
+                self.speech_run = 0
+                self.quiet_run += 1
+                if self.quiet_run >= self.hangover_blocks:
+                    self.active = False
+
+            if energy < self.noise_db:
+                self.noise_db = energy
+            else:
+                rise = self.speech_noise_creep_per_block if is_speech else self.noise_rise_per_block
+                self.noise_db += min(rise, energy - self.noise_db)
+
+        return self.active
+
+
+# Build whichever detector the config asks for
+def create_vad(kind, sample_rate, noise_floor=125, quiet_deadline=2):
+    if kind == 'rms':
+        return RmsGate(sample_rate, noise_floor=noise_floor, quiet_deadline=quiet_deadline)
+    if kind == 'energy':
+        return EnergyVAD(sample_rate, hangover=quiet_deadline)
+    raise ValueError(f'Unknown voice activity detector {kind!r} - try "energy" or "rms"')
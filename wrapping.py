@@ -0,0 +1,110 @@
+from bisect import bisect_left
+from itertools import accumulate
+
+
+# Glyph advance widths never change for a given font, so measure each character exactly once.
+# Pygame's font.size() walks the whole string through SDL_ttf every call, so asking it about every prefix of a line
+# (like the old wrapping loop did) is quadratic. Dict lookups are not.
+class _AdvanceCache(dict):
+    def __init__(self, font):
+        super().__init__()
+        self.font = font
+
+    def __missing__(self, character):
+        metrics = self.font.metrics(character)
+        if metrics and metrics[0] is not None:
+            advance = metrics[0][4]
+        else:
+            advance = self.font.size(character)[0]  # Control chars and missing glyphs don't get metrics
+        self[character] = advance
+        return advance
+
+
+# Figures out where to break the transcript into lines without rendering or re-measuring every prefix.
+# Produces exactly the same lines as the old character-by-character loop adapted from the pygame wiki:
+#   - a line ends when the text gets at least as wide as the display, at a '\r', or at the end of the text
+#   - lines that overflow are pulled back to the last space, which stays on the end of the line
+#   - lines that hit a '\r' keep it on the end, since pygame ignores control chars when rendering
+class LineWrapper:
+    def __init__(self, font, width):
+        self.font = font
+        self.width = width
+        self.advances = _AdvanceCache(font)
+
+    # Prefix sums of glyph advances - prefix_widths[k] is roughly how wide text[:k] is
+    def _prefix_widths(self, text):
+        return list(accumulate(map(self.advances.__getitem__, text), initial=0))
+
+    # Summed advances ignore kerning, so treat that as a first guess and make SDL_ttf confirm it.
+    # Returns the smallest k in [1, stop) where line[:k] is too wide, or stop if nothing in there overflows.
+    # Width only ever grows with k, so galloping away from the guess and bisecting only costs a couple of size() calls.
+    def _first_overflow(self, line, guess, stop):
+        def overflows(k):
+            return self.font.size(line[:k])[0] >= self.width
+
+        if stop <= 1:
+            return stop
+
+        guess = min(max(guess, 1), stop - 1)
+        if overflows(guess):
+            # Too wide - walk back until we find a prefix that fits
+            hi, step = guess, 1
+            lo = hi - step
+            while lo >= 1 and overflows(lo):
+                hi, step = lo, step * 2
+                lo = hi - step
+            lo = max(lo, 0)
+        else:
+            # Still fits - walk forward until something doesn't
+            lo, step = guess, 1
+            hi = lo + step
+            while hi < stop and not overflows(hi):
+                lo, step = hi, step * 2
+                hi = lo + step
+            if hi >= stop:
+                hi = stop
+                if stop - 1 == lo or not overflows(stop - 1):
+                    return stop
+
+        # Now prefix lo fits (or is empty) and prefix hi overflows (or is the stop)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if overflows(mid):
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+    # Yields each displayed line in order. It's a generator so the caller can stop asking once the screen is full,
+    # and we never bother finding breaks for text that won't fit anyways.
+    def wrap(self, text):
+        if not text:
+            return
+
+        prefix_widths = self._prefix_widths(text)
+        start = 0
+        end = len(text)
+
+        while start < end:
+            # Statement breaks always end the line. The line's first character never counts, same as the old loop.
+            stop = text.find('\r', start + 1)
+            if stop == -1:
+                stop = end
+
+            # The first prefix that's at least as wide as the screen, according to our cached advances
+            guess = bisect_left(prefix_widths, prefix_widths[start] + self.width, start + 1, stop + 1)
+            i = start + self._first_overflow(text[start:stop], guess - start, stop - start)
+
+            if i < end:
+                if text[i] == '\r':
+                    i += 1
+                else:
+                    i = text.rfind(' ', start, i) + 1
+                    if i <= start:
+                        # One word wider than the whole screen. The old loop spat out empty lines forever
+                        # (well, until the screen filled up), so we do too rather than changing what render() sees.
+                        while True:
+                            yield ''
+
+            yield text[start:i]
+            start = i